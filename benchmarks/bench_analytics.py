@@ -0,0 +1,98 @@
+"""Trait aggregation and k-hop propagation: networkx loops versus sparse matrix products.
+
+    python benchmarks/bench_analytics.py --people 10000 100000 --orgs 2000 --hops 2
+    python benchmarks/bench_analytics.py --people 200000 --skip-loop
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.kg_personality.analytics import GraphMatrices  # noqa: E402
+from src.kg_personality.kg_builder import KGBuilder  # noqa: E402
+
+
+def synthetic(people: int, orgs: int, friends: int, seed: int):
+    """People with scores, each working at one org and knowing ``friends`` others."""
+    rng = np.random.default_rng(seed)
+    kg = KGBuilder(nlp=object(), trait_attributes=False)
+    ids = [f"PERSON:p{i}" for i in range(people)]
+    org_ids = [f"ORG:o{i}" for i in range(orgs)]
+    kg.graph.add_nodes_from((n, {"label": "PERSON"}) for n in ids)
+    kg.graph.add_nodes_from((n, {"label": "ORG"}) for n in org_ids)
+    employer = rng.integers(0, orgs, size=people)
+    kg.graph.add_edges_from((ids[i], org_ids[o], {"type": "works_at"}) for i, o in enumerate(employer.tolist()))
+    src = np.repeat(np.arange(people), friends)
+    dst = rng.integers(0, people, size=len(src))
+    kg.graph.add_edges_from((ids[a], ids[b], {"type": "knows"})
+                            for a, b in zip(src.tolist(), dst.tolist()) if a != b)
+    kg.merge_trait_matrix(ids, rng.random((people, 5)))
+    return kg, org_ids
+
+
+def loop_aggregate(kg, org_ids):
+    traits = kg.traits
+    out = {}
+    for org in org_ids:
+        rows = [src for src, _, t in kg.graph.in_edges(org, data="type") if t == "works_at"]
+        if rows:
+            out[org] = np.nanmean(traits.read(rows), axis=0)
+    return out
+
+
+def loop_propagate(kg, hops: int, alpha: float):
+    """Same smoothing as ``GraphMatrices.propagate`` with per-node dict loops."""
+    graph = kg.graph
+    neighbours = {n: list(graph.successors(n)) + list(graph.predecessors(n)) for n in graph}
+    values = {n: np.nan_to_num(kg.traits.read([n])[0].astype(np.float64)) for n in graph}
+    known = {n: (~np.isnan(kg.traits.read([n])[0])).astype(np.float64) for n in graph}
+    totals = {n: v.copy() for n, v in values.items()}
+    mass = {n: k.copy() for n, k in known.items()}
+    for _ in range(hops):
+        values = {n: alpha * sum((values[m] for m in nb), np.zeros(5)) / max(len(nb), 1)
+                  for n, nb in neighbours.items()}
+        known = {n: alpha * sum((known[m] for m in nb), np.zeros(5)) / max(len(nb), 1)
+                 for n, nb in neighbours.items()}
+        for n in graph:
+            totals[n] += values[n]
+            mass[n] += known[n]
+    return {n: totals[n] / mass[n] for n in graph if mass[n].any()}
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--people", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--orgs", type=int, default=2000)
+    parser.add_argument("--friends", type=int, default=5)
+    parser.add_argument("--hops", type=int, default=2)
+    parser.add_argument("--alpha", type=float, default=0.5)
+    parser.add_argument("--skip-loop", action="store_true", help="Only time the sparse path")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for people in args.people:
+        kg, org_ids = synthetic(people, args.orgs, args.friends, args.seed)
+        print(f"people={people} nodes={kg.graph.number_of_nodes()} edges={kg.graph.number_of_edges()}")
+        matrices, export = timed(lambda: GraphMatrices.from_builder(kg))
+        _, aggregate = timed(lambda: matrices.aggregate("works_at"))
+        _, propagate = timed(lambda: matrices.propagate(hops=args.hops, alpha=args.alpha))
+        print(f"  sparse   export {export:8.2f} s  aggregate {aggregate:8.3f} s  "
+              f"propagate {propagate:8.3f} s")
+        if not args.skip_loop:
+            _, aggregate = timed(lambda: loop_aggregate(kg, org_ids))
+            _, propagate = timed(lambda: loop_propagate(kg, args.hops, args.alpha))
+            print(f"  networkx                 aggregate {aggregate:8.3f} s  propagate {propagate:8.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Streaming export time and output size across graph sizes and LOD settings.
+
+    python benchmarks/bench_export.py --sizes 10000 100000 1000000 --degree 3
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import networkx as nx
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.kg_personality.export import export_html, export_ndjson  # noqa: E402
+
+LABELS = ["PERSON", "ORG", "SKILL", "TRAIT"]
+
+
+def synthetic(n_nodes: int, degree: int, seed: int) -> nx.DiGraph:
+    rng = random.Random(seed)
+    graph = nx.DiGraph()
+    graph.add_nodes_from((f"e{i}", {"label": LABELS[i % 4], "text": f"e{i}"}) for i in range(n_nodes))
+    graph.add_edges_from((f"e{rng.randrange(n_nodes)}", f"e{rng.randrange(n_nodes)}",
+                          {"type": "related"}) for _ in range(n_nodes * degree))
+    return graph
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--degree", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    settings = [
+        ("html top_k=2000", export_html, {"top_k": 2000}),
+        ("html collapse=label", export_html, {"collapse": "label"}),
+        ("html sample=2000", export_html, {"sample": 2000}),
+        ("ndjson full", export_ndjson, {}),
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            graph = synthetic(n, args.degree, args.seed)
+            for name, export, options in settings:
+                start = time.perf_counter()
+                stats = export(graph, Path(tmp) / "graph.out", **options)
+                elapsed = time.perf_counter() - start
+                print(f"n={n:>9} {name:<20} {elapsed:8.2f} s  {stats['nodes']:>9} nodes "
+                      f"{stats['edges']:>9} edges  {stats['bytes'] / 1e6:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
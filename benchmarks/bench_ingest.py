@@ -0,0 +1,45 @@
+"""Per-document ``build_from_text`` vs batched ``build_from_corpus`` throughput.
+
+    python benchmarks/bench_ingest.py --docs 2000 --batch-size 256 --n-process 1
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.kg_personality.data_generator import generate_example  # noqa: E402
+from src.kg_personality.kg_builder import KGBuilder  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--n-process", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    docs = [(f"d{i}", generate_example(3)) for i in range(args.docs)]
+
+    kg = KGBuilder()
+    kg.nlp  # load the pipeline outside the timed region
+    start = time.perf_counter()
+    for source_id, text in docs:
+        kg.build_from_text(text, source_id=source_id)
+    single = len(docs) / (time.perf_counter() - start)
+
+    kg = KGBuilder()
+    kg.build_from_corpus(docs, batch_size=args.batch_size, n_process=args.n_process)
+    batched = kg.ingest_stats["docs_per_sec"]
+
+    print(f"build_from_text:   {single:10.1f} docs/s")
+    print(f"build_from_corpus: {batched:10.1f} docs/s  (batch_size={args.batch_size}, "
+          f"n_process={args.n_process}, {batched / single:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
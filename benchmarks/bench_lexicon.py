@@ -0,0 +1,112 @@
+"""Lexicon ruler versus spaCy entity_ruler: build time, cached startup and matching throughput.
+
+    python benchmarks/bench_lexicon.py --terms 100 1000 10000 100000 --docs 2000
+    python benchmarks/bench_lexicon.py --terms 100000 --max-token-patterns 0
+
+Terms are synthesized one- to four-word phrases; the documents are
+``CorpusGenerator`` texts with lexicon terms planted in them. For each size
+the script times building the component (``entity_ruler`` with token
+patterns, with phrase patterns, and ``lexicon_ruler`` compiled and loaded
+from its cache) and the component's matching throughput on pre-tokenized
+documents.
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import spacy
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.kg_personality import nlp_registry  # noqa: E402
+from src.kg_personality.data_generator import SYLLABLES, CorpusGenerator  # noqa: E402
+
+
+def synthetic_terms(n: int, seed: int):
+    rng = random.Random(seed)
+    terms = set()
+    while len(terms) < n:
+        words = ("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3)))
+                 for _ in range(rng.randint(1, 4)))
+        terms.add(" ".join(words).title())
+    return sorted(terms)
+
+
+def planted_texts(terms, docs: int, seed: int):
+    rng = random.Random(seed)
+    texts = []
+    for _, text in CorpusGenerator(seed=seed).corpus(docs):
+        texts.append(f"{text} They also work on {rng.choice(terms)} and {rng.choice(terms).lower()}.")
+    return texts
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def throughput(nlp, texts):
+    """Tokens per second of ``nlp``'s single ruler component and the number of entities it set."""
+    component = nlp.get_pipe(nlp.pipe_names[0])
+    docs = list(nlp.tokenizer.pipe(texts))
+    _, seconds = timed(lambda: [component(doc) for doc in docs])
+    return sum(len(doc) for doc in docs) / seconds, sum(len(doc.ents) for doc in docs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--terms", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--max-token-patterns", type=int, default=10000,
+                        help="Only time entity_ruler with token patterns up to this many terms "
+                             "(its matching slows down linearly with the lexicon)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.terms:
+            terms = synthetic_terms(n, args.seed)
+            lexicon = Path(tmp) / f"skill-{n}.txt"
+            lexicon.write_text("\n".join(terms), encoding="utf-8")
+            cache = Path(tmp) / f"skill-{n}.npz"
+            texts = planted_texts(terms, args.docs, args.seed)
+            print(f"terms={n}")
+
+            variants = []
+            if n <= args.max_token_patterns:
+                token_patterns = [{"label": "SKILL", "pattern": [{"LOWER": w} for w in t.lower().split()]}
+                                  for t in terms]
+                variants.append(("entity_ruler/token", lambda: _with(
+                    nlp_registry.add_entity_ruler, token_patterns)))
+            phrase_patterns = [{"label": "SKILL", "pattern": t} for t in terms]
+            variants.append(("entity_ruler/phrase", lambda: _phrase_ruler(phrase_patterns)))
+            variants.append(("lexicon/compile", lambda: _with(
+                nlp_registry.add_lexicon_ruler, {"SKILL": lexicon}, cache=cache)))
+            variants.append(("lexicon/cached", lambda: _with(
+                nlp_registry.add_lexicon_ruler, {"SKILL": lexicon}, cache=cache)))
+            for name, build in variants:
+                nlp, seconds = timed(build)
+                tokens_per_sec, ents = throughput(nlp, texts)
+                print(f"  {name:<20} build {seconds * 1000:10.1f} ms  match {tokens_per_sec:12.0f} tokens/s  "
+                      f"entities {ents}")
+
+
+def _with(add, *args, **kwargs):
+    nlp = spacy.blank("en")
+    add(nlp, *args, **kwargs)
+    return nlp
+
+
+def _phrase_ruler(patterns):
+    nlp = spacy.blank("en")
+    # phrase_matcher_attr LOWER matches case-insensitively, like the lexicon ruler
+    nlp.add_pipe("entity_ruler", config={"phrase_matcher_attr": "LOWER"}).add_patterns(patterns)
+    return nlp
+
+
+if __name__ == "__main__":
+    main()
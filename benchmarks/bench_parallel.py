@@ -0,0 +1,75 @@
+"""Parallel graph build throughput versus worker count on a generated corpus.
+
+    python benchmarks/bench_parallel.py --docs 100000 --processes 1 2 4 8
+    python benchmarks/bench_parallel.py --docs 20000 --model en_core_web_sm
+
+The corpus comes from ``data_generator.CorpusGenerator`` with a fixed seed.
+By default every worker uses a rule-based blank pipeline built from the
+generator vocabulary, so parsing cost is small and merge overhead is easier
+to see; pass ``--model`` to time a trained pipeline. Speedup is reported
+against the ``processes=1`` run (in-process, no pool). Each run also checks
+that it produced the same number of nodes and edges as the first.
+"""
+import argparse
+import functools
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.kg_personality import nlp_registry  # noqa: E402
+from src.kg_personality.data_generator import CorpusGenerator, synthesize_vocabulary  # noqa: E402
+from src.kg_personality.parallel import build_parallel  # noqa: E402
+from src.kg_personality.resolution import EntityResolver  # noqa: E402
+
+
+def vocabulary_pipeline(vocab_size: int, seed: int):
+    """Blank pipeline whose entity ruler matches the generator vocabulary (runs in each worker)."""
+    import spacy
+
+    nlp = spacy.blank("en")
+    nlp.add_pipe("sentencizer")
+    patterns = list(nlp_registry.ENTITY_PATTERNS) + synthesize_vocabulary(vocab_size, seed).entity_patterns()
+    nlp_registry.add_entity_ruler(nlp, patterns)
+    return nlp
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=20000)
+    parser.add_argument("--processes", type=int, nargs="+",
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument("--shard-size", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--vocab-size", type=int, default=1000)
+    parser.add_argument("--canonical", action="store_true", help="Merge mentions into canonical nodes")
+    parser.add_argument("--no-traits", dest="traits", action="store_false")
+    parser.add_argument("--model", help="Registry model to load in each worker instead of the blank pipeline")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    generator = CorpusGenerator(vocab_size=args.vocab_size, seed=args.seed)
+    factory = None if args.model else functools.partial(vocabulary_pipeline, args.vocab_size, args.seed)
+    print(f"{args.docs} documents, shard size {args.shard_size}, {os.cpu_count()} CPUs")
+
+    baseline = expected = None
+    for processes in args.processes:
+        start = time.perf_counter()
+        kg = build_parallel(generator.corpus(args.docs), processes=processes, shard_size=args.shard_size,
+                            model=args.model or nlp_registry.DEFAULT_MODEL, nlp_factory=factory,
+                            resolver=EntityResolver() if args.canonical else None,
+                            score_traits=args.traits, batch_size=args.batch_size)
+        seconds = time.perf_counter() - start
+        size = (kg.graph.number_of_nodes(), kg.graph.number_of_edges())
+        if expected is None:
+            baseline, expected = seconds, size
+        stats = kg.ingest_stats
+        print(f"  processes={processes:<3} {seconds:8.2f} s  {stats['docs_per_sec']:10.1f} docs/s  "
+              f"speedup {baseline / seconds:5.2f}x  partials {stats['partial_bytes'] / 1e6:8.1f} MB  "
+              f"nodes {size[0]} edges {size[1]}" + ("" if size == expected else "  MISMATCH"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""Stage-by-stage timings and peak memory of the KG + personality pipeline.
+
+    python benchmarks/bench_pipeline.py --sizes 100 1000 10000 --output results.json
+    python benchmarks/bench_pipeline.py --sizes 1000 --compare results.json
+
+Corpora are generated with ``data_generator`` from a fixed seed; sizes count
+paragraphs. Each stage is timed on its own (optionally under tracemalloc) and
+results are written as JSON so runs on different commits can be compared with
+``--compare``. The LLM stages use an in-process fake Groq client, so the suite
+runs offline; ``--blank`` swaps the trained spaCy model for a rule-based
+pipeline when no model is installed.
+"""
+import argparse
+import gc
+import json
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.kg_personality import data_generator, nlp_registry  # noqa: E402
+from src.kg_personality.analysis import DocumentAnalyzer  # noqa: E402
+from src.kg_personality.api_integration import GroqAPIIntegrator  # noqa: E402
+from src.kg_personality.export import export_html, export_ndjson  # noqa: E402
+from src.kg_personality.kg_builder import KGBuilder  # noqa: E402
+from src.kg_personality.personality import TRAITS, PersonalityEstimator  # noqa: E402
+
+STAGES = [
+    "extract_entities", "build_from_text", "build_from_corpus", "add_relationships",
+    "estimate_traits", "estimate_traits_batch", "analyze_corpus", "estimate_for_entities",
+    "merge_personality", "export_html", "export_ndjson", "llm_single", "llm_packed",
+]
+# Stages that call spaCy once per document; skipped above --per-doc-limit documents
+PER_DOC_STAGES = {"extract_entities", "build_from_text", "estimate_traits"}
+
+
+class FakeGroqClient:
+    """``groq.Groq`` stand-in that answers score prompts after a fixed latency."""
+
+    def __init__(self, latency: float = 0.0, chunk_chars: int = 16):
+        self.latency = latency
+        self.chunk_chars = chunk_chars
+        self.requests = 0
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, messages, stream=False, **kwargs):
+        self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        prompt = messages[0]["content"]
+        items = prompt.count("\n[")
+        scores = {trait.capitalize(): 0.5 for trait in TRAITS}
+        if items:
+            reply = json.dumps([{"id": i, **scores} for i in range(items)])
+        else:
+            reply = json.dumps(scores)
+        if not stream:
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=reply))])
+        return [SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=reply[i:i + self.chunk_chars]))])
+                for i in range(0, len(reply), self.chunk_chars)]
+
+
+def blank_pipeline():
+    """Rule-based pipeline covering the generator vocabulary (no trained model needed)."""
+    import spacy
+    from spacy.language import Language
+
+    if "bench_lower_lemmas" not in Language.factories:
+        @Language.component("bench_lower_lemmas")
+        def lower_lemmas(doc):
+            for token in doc:
+                token.lemma_ = token.lower_
+            return doc
+
+    nlp = spacy.blank("en")
+    nlp.add_pipe("sentencizer")
+    nlp.add_pipe("bench_lower_lemmas")
+    patterns = list(nlp_registry.ENTITY_PATTERNS)
+    for label, values in (("PERSON", data_generator.NAMES), ("ORG", data_generator.ORGANIZATIONS),
+                          ("SKILL", data_generator.SKILLS), ("TRAIT", data_generator.TRAITS)):
+        patterns.extend({"label": label, "pattern": value} for value in values)
+    nlp_registry.add_entity_ruler(nlp, patterns)
+    return nlp
+
+
+def make_corpus(paragraphs: int, per_doc: int, seed: int):
+    random.seed(seed)
+    docs = []
+    while paragraphs > 0:
+        n = min(per_doc, paragraphs)
+        docs.append((f"d{len(docs)}", data_generator.generate_example(n)))
+        paragraphs -= n
+    return docs
+
+
+def measure(name, items, fn, trace_memory):
+    gc.collect()
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    peak = None
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+    record = {
+        "stage": name,
+        "items": items,
+        "seconds": seconds,
+        "items_per_s": items / seconds if seconds > 0 else None,
+        "peak_mb": peak,
+        # ru_maxrss is KiB on Linux (bytes on macOS); high-water mark of the process
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+    return result, record
+
+
+def run_size(size, args, nlp, stages):
+    docs = make_corpus(size, args.paragraphs_per_doc, args.seed)
+    texts = [text for _, text in docs]
+    per_doc_ok = args.per_doc_limit is None or len(docs) <= args.per_doc_limit
+    records = []
+    state = {}
+
+    def run(name, items, fn):
+        if name not in stages or (name in PER_DOC_STAGES and not per_doc_ok):
+            return None
+        result, record = measure(name, items, fn, args.memory)
+        record.update(size=size, documents=len(docs))
+        records.append(record)
+        print(f"  {name:<22} {record['seconds']:9.3f} s  {record['items_per_s'] or 0:12.1f} items/s"
+              + (f"  peak {record['peak_mb']:8.1f} MB" if record["peak_mb"] is not None else ""))
+        return result
+
+    kg_single = KGBuilder(nlp=nlp, trait_attributes=False)
+    run("extract_entities", len(docs), lambda: [kg_single.extract_entities(t) for t in texts])
+
+    def build_single():
+        for source_id, text in docs:
+            kg_single.build_from_text(text, source_id)
+    run("build_from_text", len(docs), build_single)
+
+    kg = KGBuilder(nlp=nlp, trait_attributes=False)
+    run("build_from_corpus", len(docs), lambda: kg.build_from_corpus(docs, batch_size=args.batch_size))
+    run("add_relationships", len(kg.mentions), kg.add_relationships)
+
+    pe = PersonalityEstimator(nlp=nlp)
+    run("estimate_traits", len(texts), lambda: [pe.estimate_traits(t) for t in texts])
+    run("estimate_traits_batch", len(texts),
+        lambda: pe.estimate_traits_batch(texts, batch_size=args.batch_size))
+
+    analyzer = DocumentAnalyzer(estimator=pe, nlp=nlp)
+    kg_analyzed = KGBuilder(nlp=nlp, trait_attributes=False)
+    run("analyze_corpus", len(docs), lambda: kg_analyzed.build_from_analyses(
+        analyzer.analyze_corpus(docs, batch_size=args.batch_size)))
+    if kg_analyzed.contexts.node_ids:
+        entities = [n for n, d in kg_analyzed.graph.nodes(data=True) if d.get("label") == "PERSON"]
+        state["personality"] = run("estimate_for_entities", len(entities),
+                                   lambda: pe.estimate_for_entities(entities, contexts=kg_analyzed.contexts))
+    personality = state.get("personality")
+    if personality is not None:
+        run("merge_personality", len(personality),
+            lambda: kg_analyzed.merge_personality(kg_analyzed.graph, personality))
+
+    export_graph = kg_analyzed.graph if kg_analyzed.graph.number_of_nodes() else kg.graph
+    with tempfile.TemporaryDirectory() as tmp:
+        run("export_html", export_graph.number_of_nodes(), lambda: export_html(
+            export_graph, Path(tmp) / "graph.html", traits=kg_analyzed.traits, top_k=args.export_top_k))
+        run("export_ndjson", export_graph.number_of_nodes(), lambda: export_ndjson(
+            export_graph, Path(tmp) / "graph.ndjson", traits=kg_analyzed.traits))
+
+    llm_texts = texts[:args.llm_texts]
+    api = GroqAPIIntegrator(client=FakeGroqClient(args.llm_latency_ms / 1000), personality_estimator=pe)
+    run("llm_single", len(llm_texts), lambda: [api.analyze_text_with_llm(t) for t in llm_texts])
+    run("llm_packed", len(llm_texts), lambda: api.analyze_texts_packed(llm_texts))
+    return records
+
+
+def metadata(args, nlp):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                cwd=Path(__file__).resolve().parents[1]).stdout.strip() or None
+    except OSError:
+        commit = None
+    import spacy
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "spacy": spacy.__version__,
+        "pipeline": "blank" if args.blank else nlp.meta.get("name", args.model),
+        "seed": args.seed,
+        "paragraphs_per_doc": args.paragraphs_per_doc,
+        "tracemalloc": args.memory,
+    }
+
+
+def compare(report, baseline_path, threshold):
+    """Print per-stage slowdowns against a previous run; returns the regressions."""
+    baseline = json.loads(Path(baseline_path).read_text())
+    before = {(r["size"], r["stage"]): r for r in baseline["results"]}
+    regressions = []
+    print(f"\nvs {baseline_path} (commit {baseline['meta'].get('commit')})")
+    for key in ("pipeline", "tracemalloc", "paragraphs_per_doc"):
+        if baseline["meta"].get(key) != report["meta"][key]:
+            print(f"  warning: {key} differs ({baseline['meta'].get(key)} vs {report['meta'][key]})")
+    results = report["results"]
+    for record in results:
+        old = before.get((record["size"], record["stage"]))
+        if old is None or not old["seconds"]:
+            continue
+        ratio = record["seconds"] / old["seconds"]
+        flag = "  REGRESSION" if ratio > threshold else ""
+        print(f"  {record['size']:>9} {record['stage']:<22} {old['seconds']:9.3f} s -> "
+              f"{record['seconds']:9.3f} s  ({ratio:5.2f}x){flag}")
+        if flag:
+            regressions.append(record)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000],
+                        help="Corpus sizes in paragraphs (e.g. 100 ... 1000000)")
+    parser.add_argument("--paragraphs-per-doc", type=int, default=3,
+                        help="Paragraphs per generated document (at most 10)")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--per-doc-limit", type=int, default=20000,
+                        help="Skip per-document stages above this many documents")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--export-top-k", type=int, default=2000)
+    parser.add_argument("--llm-texts", type=int, default=200)
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0)
+    parser.add_argument("--model", default=nlp_registry.DEFAULT_MODEL)
+    parser.add_argument("--blank", action="store_true", help="Use a rule-based blank pipeline")
+    parser.add_argument("--no-memory", dest="memory", action="store_false",
+                        help="Skip tracemalloc (it slows allocation-heavy stages)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--compare", help="Previous results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="Slowdown ratio reported as a regression")
+    args = parser.parse_args()
+
+    nlp = blank_pipeline() if args.blank else nlp_registry.get_nlp(args.model)
+    results = []
+    for size in args.sizes:
+        print(f"size={size} paragraphs")
+        results.extend(run_size(size, args, nlp, set(args.stages)))
+
+    report = {"meta": metadata(args, nlp), "results": results}
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"Results written to {args.output}")
+    if args.compare and compare(report, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
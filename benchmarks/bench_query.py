@@ -0,0 +1,92 @@
+"""Indexed queries versus full attribute scans on synthetic graphs.
+
+    python benchmarks/bench_query.py --people 1000000 --orgs 10000 --skills 1000
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.kg_personality.kg_builder import KGBuilder  # noqa: E402
+
+
+def synthetic(people: int, orgs: int, skills: int, seed: int) -> KGBuilder:
+    rng = random.Random(seed)
+    kg = KGBuilder(nlp=object(), trait_attributes=False)
+    persons = [f"PERSON:p{i}" for i in range(people)]
+    kg.graph.add_nodes_from((n, {"label": "PERSON"}) for n in persons)
+    kg.graph.add_nodes_from((f"ORG:o{i}", {"label": "ORG"}) for i in range(orgs))
+    kg.graph.add_nodes_from((f"SKILL:s{i}", {"label": "SKILL"}) for i in range(skills))
+    kg.graph.add_edges_from((p, f"ORG:o{rng.randrange(orgs)}", {"type": "works_at"}) for p in persons)
+    kg.graph.add_edges_from((p, f"SKILL:s{rng.randrange(skills)}", {"type": "has_skill"})
+                            for p in persons for _ in range(2))
+    kg.traits.assign(persons, np.random.default_rng(seed).random((people, 5)))
+    return kg
+
+
+def scan_people_at(kg: KGBuilder, org: str, trait: str, threshold: float):
+    """What callers did before the query layer: scan every node."""
+    found = []
+    for n, d in kg.graph.nodes(data=True):
+        if d.get("label") != "PERSON":
+            continue
+        if kg.graph.succ[n].get(org, {}).get("type") != "works_at":
+            continue
+        if kg.node_traits(n).get(trait, 0.0) >= threshold:
+            found.append(n)
+    return found
+
+
+def timed(fn, repeat: int = 5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--people", type=int, default=200000)
+    parser.add_argument("--orgs", type=int, default=2000)
+    parser.add_argument("--skills", type=int, default=500)
+    parser.add_argument("--updates", type=int, default=1000, help="Trait rows rewritten before re-querying")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    kg = synthetic(args.people, args.orgs, args.skills, args.seed)
+    print(f"{kg.graph.number_of_nodes()} nodes, {kg.graph.number_of_edges()} edges")
+    _, build = timed(lambda: kg.query, repeat=1)
+    q = kg.query
+    q.trait_range("conscientiousness", 0.7)
+    q.trait_range("extraversion", 0.7)
+    print(f"  index build (labels, relations) {build * 1000:10.2f} ms")
+
+    scanned, scan = timed(lambda: scan_people_at(kg, "ORG:o1", "conscientiousness", 0.7), repeat=1)
+    found, indexed = timed(lambda: q.find(label="PERSON", related=[("works_at", "ORG:o1")],
+                                          traits={"conscientiousness": (0.7, None)}))
+    assert sorted(found) == sorted(scanned)
+    print(f"  people at org, trait >= 0.7    scan {scan * 1000:10.2f} ms  index {indexed * 1000:8.3f} ms")
+
+    _, top = timed(lambda: q.top_k("extraversion", 10, label="PERSON"))
+    _, top_skill = timed(lambda: q.top_k("extraversion", 10, label="PERSON", related=[("has_skill", "SKILL:s1")]))
+    _, neighbours = timed(lambda: q.neighbors("ORG:o1", "works_at", direction="in"))
+    print(f"  top-10 extraverts                          index {top * 1000:8.3f} ms")
+    print(f"  top-10 extraverts with skill               index {top_skill * 1000:8.3f} ms")
+    print(f"  neighbourhood of an org                    index {neighbours * 1000:8.3f} ms")
+
+    rng = np.random.default_rng(args.seed)
+    rows = rng.choice(args.people, size=min(args.updates, args.people), replace=False)
+    kg.merge_trait_matrix([f"PERSON:p{i}" for i in rows.tolist()], rng.random((len(rows), 5)))
+    _, stale = timed(lambda: q.top_k("extraversion", 10, label="PERSON"))
+    print(f"  top-10 after {len(rows)} trait updates              index {stale * 1000:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""Latency and throughput of the resident worker under configurable load.
+
+    python benchmarks/bench_service.py --blank --rate 200 500 1000 --requests 5000
+    python benchmarks/bench_service.py --blank --concurrency 1 8 64 --max-batch 32
+    python benchmarks/bench_service.py --blank --rate 500 --http
+
+``--rate`` drives an open-loop load (requests are sent on schedule whether or
+not earlier ones finished, and latency is measured from the scheduled send
+time, so queueing is not hidden); ``--concurrency`` runs closed-loop clients
+that each wait for their reply. Texts come from ``data_generator``'s
+``CorpusGenerator``. ``--http`` sends every request through the HTTP front end
+instead of calling the service in-process.
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bench_pipeline import blank_pipeline  # noqa: E402
+from src.kg_personality import nlp_registry  # noqa: E402
+from src.kg_personality.data_generator import CorpusGenerator  # noqa: E402
+from src.kg_personality.service import Overloaded, WorkerService, make_http_server  # noqa: E402
+
+
+class HttpClient:
+    """Submits through ``POST /analyze`` from a thread pool, mirroring ``WorkerService.submit``."""
+
+    def __init__(self, url: str, threads: int):
+        self.url = url
+        self.pool = ThreadPoolExecutor(threads)
+
+    def _post(self, text: str, request_id):
+        request = urllib.request.Request(f"{self.url}/analyze",
+                                         data=json.dumps({"id": request_id, "text": text}).encode("utf-8"))
+        try:
+            with urllib.request.urlopen(request) as response:
+                return json.load(response)
+        except urllib.error.HTTPError as e:
+            if e.code == 503:
+                raise Overloaded(e.reason) from None
+            raise
+
+    def submit(self, text: str, request_id=None) -> Future:
+        return self.pool.submit(self._post, text, request_id)
+
+    def close(self):
+        self.pool.shutdown()
+
+
+def open_loop(client, texts, rate: float):
+    """Send ``texts`` at ``rate`` per second; returns latencies (s), rejections, wall time."""
+    latencies = []
+    rejected = 0
+    lock = threading.Lock()
+    pending = []
+    start = time.perf_counter()
+    for i, text in enumerate(texts):
+        scheduled = start + i / rate
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+        def done(future, scheduled=scheduled):
+            if future.exception() is None:
+                with lock:
+                    latencies.append(time.perf_counter() - scheduled)
+        try:
+            future = client.submit(text, i)
+        except Overloaded:
+            rejected += 1
+            continue
+        future.add_done_callback(done)
+        pending.append(future)
+    for future in pending:
+        try:
+            future.result()
+        except Overloaded:
+            rejected += 1
+    return latencies, rejected, time.perf_counter() - start
+
+
+def closed_loop(client, texts, concurrency: int):
+    """``concurrency`` clients each send their next text once the previous reply arrives."""
+    latencies = []
+    rejected = 0
+    lock = threading.Lock()
+    chunks = [texts[i::concurrency] for i in range(concurrency)]
+
+    def run(chunk):
+        nonlocal rejected
+        for i, text in enumerate(chunk):
+            sent = time.perf_counter()
+            try:
+                client.submit(text, i).result()
+            except Overloaded:
+                with lock:
+                    rejected += 1
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - sent)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=run, args=(chunk,)) for chunk in chunks]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, rejected, time.perf_counter() - start
+
+
+def report(name, latencies, rejected, seconds):
+    ms = np.asarray(latencies) * 1000
+    p50, p99 = (np.percentile(ms, [50, 99]) if len(ms) else (0.0, 0.0))
+    print(f"  {name:<18} {len(ms) / seconds:9.1f} req/s  p50 {p50:8.2f} ms  p99 {p99:8.2f} ms  "
+          f"rejected {rejected}")
+    return {"load": name, "completed": len(ms), "rejected": rejected, "seconds": seconds,
+            "throughput": len(ms) / seconds, "p50_ms": float(p50), "p99_ms": float(p99)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--rate", type=float, nargs="+", help="Open-loop request rates (req/s)")
+    load.add_argument("--concurrency", type=int, nargs="+", help="Closed-loop client counts")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--queue-size", type=int, default=1024)
+    parser.add_argument("--http", action="store_true", help="Go through the HTTP front end")
+    parser.add_argument("--http-threads", type=int, default=64)
+    parser.add_argument("--model", default=nlp_registry.DEFAULT_MODEL)
+    parser.add_argument("--blank", action="store_true", help="Use a rule-based blank pipeline")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results JSON here")
+    args = parser.parse_args()
+
+    texts = [text for _, text in CorpusGenerator(seed=args.seed).corpus(args.requests)]
+    start = time.perf_counter()
+    nlp = blank_pipeline() if args.blank else nlp_registry.get_nlp(args.model)
+    service = WorkerService(nlp=nlp, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms,
+                            queue_size=args.queue_size).start()
+    print(f"worker ready in {time.perf_counter() - start:.2f} s; {args.requests} requests per run")
+
+    client, server = service, None
+    if args.http:
+        server = make_http_server(service, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        client = HttpClient(f"http://127.0.0.1:{server.server_address[1]}", args.http_threads)
+
+    results = []
+    try:
+        if args.concurrency:
+            for concurrency in args.concurrency:
+                results.append(report(f"concurrency={concurrency}", *closed_loop(client, texts, concurrency)))
+        else:
+            for rate in args.rate or [200.0, 1000.0]:
+                results.append(report(f"rate={rate:g}/s", *open_loop(client, texts, rate)))
+    finally:
+        if server is not None:
+            client.close()
+            server.shutdown()
+            server.server_close()
+        service.close()
+    stats = service.stats()
+    print(f"worker: mean batch {stats['mean_batch']:.1f}, queue wait p99 {stats['queue_wait_ms']['p99']:.2f} ms")
+    if args.output:
+        Path(args.output).write_text(json.dumps({"results": results, "worker": stats}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Trait-vector k-NN: brute force versus KD-tree, batched queries and incremental updates.
+
+    python benchmarks/bench_similarity.py --people 10000 100000 1000000 --queries 1000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.kg_personality.kg_builder import KGBuilder  # noqa: E402
+from src.kg_personality.similarity import SimilarityIndex  # noqa: E402
+
+
+def synthetic(people: int, seed: int):
+    kg = KGBuilder(nlp=object(), trait_attributes=False)
+    ids = [f"PERSON:p{i}" for i in range(people)]
+    kg.graph.add_nodes_from((n, {"label": "PERSON"}) for n in ids)
+    kg.merge_trait_matrix(ids, np.random.default_rng(seed).random((people, 5)))
+    return kg, ids
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--people", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--updates", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    for people in args.people:
+        kg, ids = synthetic(people, args.seed)
+        queries = [ids[i] for i in rng.choice(people, size=min(args.queries, people), replace=False)]
+        print(f"people={people}")
+        for backend in ("brute", "kdtree"):
+            index, build = timed(lambda: SimilarityIndex(kg, backend=backend))
+            _, knn = timed(lambda: index.knn(queries, k=args.k))
+            _, radius = timed(lambda: index.radius(queries, 0.1))
+            rows = rng.choice(people, size=min(args.updates, people), replace=False)
+            kg.merge_trait_matrix([ids[i] for i in rows.tolist()], rng.random((len(rows), 5)))
+            _, stale = timed(lambda: index.knn(queries, k=args.k))
+            index.close()
+            print(f"  {backend:<7} build {build * 1000:9.1f} ms  knn {len(queries) / knn:10.0f} q/s  "
+                  f"radius {len(queries) / radius:10.0f} q/s  knn after {len(rows)} updates "
+                  f"{len(queries) / stale:10.0f} q/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Snapshot save, mmap open, materialize and lookup times for synthetic graphs.
+
+    python benchmarks/bench_snapshot.py --nodes 1000000 --degree 3
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.kg_personality.kg_builder import KGBuilder  # noqa: E402
+from src.kg_personality.snapshot import GraphSnapshot  # noqa: E402
+
+LABELS = ["PERSON", "ORG", "SKILL", "TRAIT"]
+RELATIONS = ["works_at", "has_skill", "exhibits"]
+
+
+def synthetic(n_nodes: int, degree: int, seed: int) -> KGBuilder:
+    rng = random.Random(seed)
+    kg = KGBuilder(nlp=object(), trait_attributes=False)
+    nodes = [(f"{LABELS[i % 4]}:e{i}", {"label": LABELS[i % 4], "text": f"e{i}"})
+             for i in range(n_nodes)]
+    kg.graph.add_nodes_from(nodes)
+    ids = [n for n, _ in nodes]
+    kg.graph.add_edges_from((ids[rng.randrange(n_nodes)], ids[rng.randrange(n_nodes)],
+                             {"type": RELATIONS[k % 3]}) for k in range(n_nodes * degree))
+    people = ids[::4]
+    kg.traits.assign(people, np.random.default_rng(seed).random((len(people), 5)))
+    return kg
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=200_000)
+    parser.add_argument("--degree", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    kg = synthetic(args.nodes, args.degree, args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "graph.kgs"
+        _, save_s = timed(lambda: kg.save(path))
+        snap, open_s = timed(lambda: GraphSnapshot.open(path))
+        _, lookup_s = timed(lambda: [snap.neighbors(snap.node_index(f"PERSON:e{i}"))
+                                     for i in range(0, min(args.nodes, 4000), 4)])
+        _, load_s = timed(lambda: KGBuilder.load(path, nlp=object(), trait_attributes=False))
+        size_mb = path.stat().st_size / 1e6
+
+    print(f"nodes={args.nodes} edges={kg.graph.number_of_edges()} file={size_mb:.1f} MB")
+    print(f"save:           {save_s * 1e3:10.1f} ms")
+    print(f"open (mmap):    {open_s * 1e3:10.3f} ms")
+    print(f"1000 lookups:   {lookup_s * 1e3:10.1f} ms")
+    print(f"load (networkx):{load_s * 1e3:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
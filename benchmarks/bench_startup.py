@@ -0,0 +1,73 @@
+"""Startup time and resident memory of the spaCy pipeline setup.
+
+Compares the previous behaviour (one ``spacy.load`` at ``kg_builder`` import
+plus one per ``PersonalityEstimator``) with the shared registry. Each variant
+runs in a fresh interpreter so import caches and RSS do not leak between them.
+
+    python benchmarks/bench_startup.py [--estimators 2]
+"""
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+LEGACY = """
+import time, resource, spacy
+t0 = time.perf_counter()
+nlp = spacy.load("en_core_web_sm")
+nlp.add_pipe("entity_ruler", before="ner")
+import_s = time.perf_counter() - t0
+t1 = time.perf_counter()
+copies = [spacy.load("en_core_web_sm") for _ in range({n})]
+copies[0]("Alex Johnson works at TechCorp.")
+first_use_s = time.perf_counter() - t1
+"""
+
+REGISTRY = """
+import time, resource
+t0 = time.perf_counter()
+import src.kg_personality
+from src.kg_personality.kg_builder import KGBuilder
+from src.kg_personality.personality import PersonalityEstimator
+import_s = time.perf_counter() - t0
+t1 = time.perf_counter()
+kg = KGBuilder()
+estimators = [PersonalityEstimator() for _ in range({n})]
+kg.build_from_text("Alex Johnson works at TechCorp.")
+estimators[0].estimate_traits("Alex Johnson works at TechCorp.")
+first_use_s = time.perf_counter() - t1
+"""
+
+REPORT = """
+import json
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"import_s": import_s, "first_use_s": first_use_s, "max_rss_mb": rss_kb / 1024}))
+"""
+
+
+def run(script: str) -> dict:
+    out = subprocess.run([sys.executable, "-c", script + REPORT], cwd=ROOT,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--estimators", type=int, default=1,
+                        help="PersonalityEstimator instances per process")
+    args = parser.parse_args()
+
+    results = {
+        "legacy": run(LEGACY.format(n=args.estimators)),
+        "registry": run(REGISTRY.format(n=args.estimators)),
+    }
+    for name, r in results.items():
+        print(f"{name:>8}: import {r['import_s']:.3f}s  first use {r['first_use_s']:.3f}s  "
+              f"max RSS {r['max_rss_mb']:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Per-text ``estimate_traits`` vs ``estimate_traits_batch`` throughput.
+
+    python benchmarks/bench_traits.py --texts 5000
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.kg_personality.data_generator import generate_example  # noqa: E402
+from src.kg_personality.personality import PersonalityEstimator  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--texts", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    texts = [generate_example(3) for _ in range(args.texts)]
+    pe = PersonalityEstimator()
+    pe.nlp  # load the pipeline outside the timed region
+
+    start = time.perf_counter()
+    single = [pe.estimate_traits(text) for text in texts]
+    single_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = pe.estimate_traits_batch(texts, batch_size=args.batch_size)
+    batch_s = time.perf_counter() - start
+
+    assert batch == single, "batch scores differ from per-text scores"
+    print(f"estimate_traits:       {len(texts) / single_s:10.1f} texts/s")
+    print(f"estimate_traits_batch: {len(texts) / batch_s:10.1f} texts/s  ({single_s / batch_s:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
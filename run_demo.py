@@ -1,4 +1,5 @@
 """Demo runner for the KG + Personality pipeline with visualization"""
+from src.kg_personality.analysis import DocumentAnalyzer
 from src.kg_personality.kg_builder import KGBuilder
 from src.kg_personality.personality import PersonalityEstimator
 from pathlib import Path
@@ -8,14 +9,17 @@ SAMPLE = Path("data/complex_example.txt").read_text()
 
 
 def main():
+    # Parse once; the same Doc feeds the KG and the trait scorer
+    pe = PersonalityEstimator()
+    analysis = DocumentAnalyzer(estimator=pe).analyze(SAMPLE, source_id="doc")
+
     # Initialize and build KG
     kg = KGBuilder()
-    G = kg.build_from_text(SAMPLE, source_id="doc")
+    G = kg.add_analysis(analysis)
     
     # Get entities and estimate personality
     entities = [n for n, d in G.nodes(data=True) if n.startswith("doc_ent_")]
-    pe = PersonalityEstimator()
-    personality = pe.estimate_for_entities(entities)
+    personality = pe.estimate_for_entities(entities, contexts=kg.contexts)
     
     # Merge personality traits and add relationships
     kg.merge_personality(G, personality)
@@ -27,9 +31,8 @@ def main():
     for n, d in G.nodes(data=True):
         if n.startswith("doc_ent_"):
             print(f"\n{d.get('text', '')} ({d.get('label', '')}):")
-            traits = {k:v for k,v in d.items() if k.startswith('trait_')}
-            for trait, score in traits.items():
-                print(f"  {trait.replace('trait_', '').capitalize()}: {score:.2f}")
+            for trait, score in kg.node_traits(n).items():
+                print(f"  {trait.capitalize()}: {score:.2f}")
     
     print("\nRelationships:")
     for u, v, d in G.edges(data=True):
@@ -7,6 +7,8 @@ setup(
     install_requires=[
         "spacy>=3.0.0",
         "networkx>=2.8.0",
+        "numpy>=1.21.0",
+        "scipy>=1.8.0",
         "pandas>=1.5.0",
         "pyvis>=0.3.0",
         "nltk>=3.8.0",
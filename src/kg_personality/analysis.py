@@ -0,0 +1,79 @@
+"""Single-pass document analysis shared by graph building and trait scoring
+"""
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from . import nlp_registry
+from .personality import PersonalityEstimator
+
+
+class DocAnalysis(NamedTuple):
+    """Everything later stages need from one parsed document."""
+    source_id: str
+    doc: object  # spacy.tokens.Doc
+    # (text, label, start_char, end_char)
+    entities: List[Tuple[str, str, int, int]]
+    # (start_char, end_char)
+    sentences: List[Tuple[int, int]]
+    # (token start_char, trait index) for every trait keyword lemma
+    trait_hits: np.ndarray
+    trait_counts: np.ndarray
+
+
+class DocumentAnalyzer:
+    def __init__(self, estimator: Optional[PersonalityEstimator] = None, nlp=None,
+                 model: str = nlp_registry.DEFAULT_MODEL, disable: Tuple[str, ...] = ()):
+        """
+        Parse each document once and derive entities, sentences and trait counts.
+
+        Args:
+            estimator: Supplies the trait keyword lookup; shares the registry
+                pipeline by default
+            nlp: Optional spaCy pipeline; defaults to the shared registry pipeline
+            model: Registry model name used when ``nlp`` is not given
+            disable: Pipeline components to skip
+        """
+        self._nlp = nlp
+        self.model = model
+        self.disable = tuple(disable)
+        self.estimator = estimator or PersonalityEstimator(nlp=nlp, model=model)
+
+    @property
+    def nlp(self):
+        if self._nlp is None:
+            self._nlp = nlp_registry.get_nlp(self.model)
+        return self._nlp
+
+    def _disabled(self) -> List[str]:
+        return nlp_registry.disabled_for(self.nlp, disable=self.disable)
+
+    def from_doc(self, doc, source_id: str = "doc") -> DocAnalysis:
+        """Build a :class:`DocAnalysis` from an already parsed ``Doc``."""
+        entities = [(ent.text, ent.label_, ent.start_char, ent.end_char) for ent in doc.ents]
+        if doc.has_annotation("SENT_START") or doc.has_annotation("DEP"):
+            sentences = [(sent.start_char, sent.end_char) for sent in doc.sents]
+        else:
+            sentences = [(0, len(doc.text))]
+        hits = self.estimator.trait_hits(doc)
+        counts = np.bincount(hits[:, 1], minlength=len(self.estimator.trait_keywords))
+        return DocAnalysis(source_id, doc, entities, sentences, hits, counts)
+
+    def analyze(self, text: str, source_id: str = "doc") -> DocAnalysis:
+        """Parse ``text`` once and return its analysis."""
+        return self.from_doc(self.nlp(text, disable=self._disabled()), source_id)
+
+    def analyze_corpus(self, docs: Iterable[Tuple[str, str]], batch_size: int = 256,
+                       n_process: int = 1) -> Iterator[DocAnalysis]:
+        """
+        Lazily analyze ``(source_id, text)`` pairs with one ``nlp.pipe`` pass.
+
+        Args:
+            docs: Iterable of ``(source_id, text)`` pairs
+            batch_size: Number of texts spaCy buffers per batch
+            n_process: Number of spaCy worker processes
+        """
+        stream = ((text, source_id) for source_id, text in docs)
+        for doc, source_id in self.nlp.pipe(stream, as_tuples=True, batch_size=batch_size,
+                                            n_process=n_process, disable=self._disabled()):
+            yield self.from_doc(doc, source_id)
@@ -0,0 +1,251 @@
+"""Sparse-matrix trait aggregation and propagation over relation types
+"""
+from typing import Dict, Iterable, List, Optional
+
+import networkx as nx
+import numpy as np
+import scipy.sparse as sp
+
+from . import instrumentation
+
+
+class GraphMatrices:
+    def __init__(self, node_ids: List, adjacency: Dict[Optional[str], sp.csr_matrix],
+                 traits: np.ndarray, trait_names: List[str]):
+        """
+        A graph as one CSR adjacency matrix per relation type plus an aligned
+        (nodes, traits) score matrix. Build with :meth:`from_builder`.
+
+        Args:
+            node_ids: Node of each row/column
+            adjacency: ``{relation type: (n, n) CSR}``, row = source, column =
+                target, values = edge weights
+            traits: ``float64`` scores, NaN where a node has no score
+            trait_names: Column names of ``traits``
+        """
+        self.node_ids = node_ids
+        self.index = {n: i for i, n in enumerate(node_ids)}
+        self.adjacency = adjacency
+        self.traits = traits
+        self.trait_names = trait_names
+
+    @classmethod
+    def from_builder(cls, kg, relation_types: Optional[Iterable[str]] = None,
+                     edge_weight: Optional[str] = None) -> "GraphMatrices":
+        """
+        Export ``kg.graph`` and ``kg.traits`` in one pass over the edges.
+
+        Args:
+            kg: ``KGBuilder`` (scores come from its trait store, i.e. the
+                ``merge_personality`` / ``merge_trait_matrix`` output)
+            relation_types: Only export these edge types (default: all)
+            edge_weight: Edge attribute used as the matrix value (e.g.
+                ``"count"``); 1 when unset or missing
+        """
+        return cls.from_graph(kg.graph, kg.traits, relation_types, edge_weight)
+
+    @classmethod
+    def from_graph(cls, graph: nx.DiGraph, traits=None, relation_types: Optional[Iterable[str]] = None,
+                   edge_weight: Optional[str] = None) -> "GraphMatrices":
+        """Like :meth:`from_builder` for a bare graph and optional ``TraitStore``."""
+        with instrumentation.stage("analytics.matrices"):
+            node_ids = list(graph.nodes)
+            index = {n: i for i, n in enumerate(node_ids)}
+            wanted = None if relation_types is None else set(relation_types)
+            coords: Dict[Optional[str], List[List]] = {}
+            for u, v, attrs in graph.edges(data=True):
+                rel_type = attrs.get("type")
+                if wanted is not None and rel_type not in wanted:
+                    continue
+                rows, cols, values = coords.setdefault(rel_type, [[], [], []])
+                rows.append(index[u])
+                cols.append(index[v])
+                values.append(attrs.get(edge_weight, 1) if edge_weight else 1)
+            n = len(node_ids)
+            adjacency = {
+                rel_type: sp.csr_matrix((np.asarray(values, dtype=np.float64),
+                                         (np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64))),
+                                        shape=(n, n))
+                for rel_type, (rows, cols, values) in coords.items()
+            }
+            if traits is None:
+                scores, names = np.zeros((n, 0)), []
+            else:
+                scores, names = traits.read(node_ids).astype(np.float64), list(traits.traits)
+        return cls(node_ids, adjacency, scores, names)
+
+    def relation(self, rel_type: Optional[str]) -> sp.csr_matrix:
+        """Adjacency of one relation type (all zeros if the graph has none)."""
+        matrix = self.adjacency.get(rel_type)
+        if matrix is None:
+            n = len(self.node_ids)
+            matrix = sp.csr_matrix((n, n))
+        return matrix
+
+    def combined(self, relation_types: Optional[Iterable[str]] = None, symmetric: bool = True) -> sp.csr_matrix:
+        """Sum of several relation adjacencies; with ``symmetric`` edges are followed both ways."""
+        types = list(self.adjacency) if relation_types is None else list(relation_types)
+        matrix = sp.csr_matrix((len(self.node_ids), len(self.node_ids)))
+        for rel_type in types:
+            matrix = matrix + self.relation(rel_type)
+        if symmetric:
+            matrix = matrix + matrix.T
+        return matrix.tocsr()
+
+    def _known(self):
+        """Scores with NaN replaced by 0, and the 0/1 has-score mask per trait."""
+        known = ~np.isnan(self.traits)
+        return np.where(known, self.traits, 0.0), known.astype(np.float64)
+
+    def aggregate(self, rel_type: str, direction: str = "in", weighted: bool = False,
+                  node_weight: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Mean trait profile of each node's neighbours over one relation type.
+
+        For ``works_at`` edges (PERSON -> ORG), ``direction="in"`` gives each
+        ORG the mean of the people working there; ``"out"`` gives each person
+        the mean of their orgs. Neighbours without a score for a trait are
+        left out of that trait's mean.
+
+        Args:
+            rel_type: Relation type to aggregate over
+            direction: ``"in"`` (over sources of incoming edges) or ``"out"``
+            weighted: Weight neighbours by the edge values (see ``edge_weight``)
+                instead of counting each once
+            node_weight: Optional per-node weights (e.g. mention counts)
+
+        Returns:
+            (nodes, traits) array; NaN rows for nodes without scored neighbours
+        """
+        if direction not in ("in", "out"):
+            raise ValueError(f"Unknown direction {direction!r}; expected 'in' or 'out'")
+        with instrumentation.stage("analytics.aggregate"):
+            matrix = self.relation(rel_type)
+            if not weighted:
+                matrix = (matrix != 0).astype(np.float64)
+            if direction == "in":
+                matrix = matrix.T.tocsr()
+            values, known = self._known()
+            if node_weight is not None:
+                weights = np.asarray(node_weight, dtype=np.float64)[:, None]
+                values, known = values * weights, known * weights
+            totals = matrix @ values
+            mass = matrix @ known
+            with np.errstate(invalid="ignore", divide="ignore"):
+                return np.where(mass > 0, totals / mass, np.nan)
+
+    def propagate(self, relation_types: Optional[Iterable[str]] = None, hops: int = 2,
+                  alpha: float = 0.5, symmetric: bool = True) -> np.ndarray:
+        """
+        k-hop smoothed trait profiles.
+
+        Every scored node spreads its profile along the chosen relations;
+        a contribution ``h`` hops away is weighted by ``alpha ** h`` and by
+        the row-normalized edge weights on the path. The result is the
+        weighted mean of the profiles reached within ``hops``, so a node's own
+        score (hop 0) counts most and unscored nodes (an ORG, a SKILL) get
+        the profile of the people around them.
+
+        Args:
+            relation_types: Relations to follow (default: all)
+            hops: Number of propagation steps
+            alpha: Decay per hop, between 0 and 1
+            symmetric: Follow edges in both directions
+
+        Returns:
+            (nodes, traits) array; NaN rows for nodes no score reaches
+        """
+        with instrumentation.stage("analytics.propagate"):
+            matrix = self.combined(relation_types, symmetric)
+            degree = np.asarray(matrix.sum(axis=1)).ravel()
+            with np.errstate(divide="ignore"):
+                scale = np.where(degree > 0, 1.0 / degree, 0.0)
+            transition = sp.diags(scale) @ matrix
+
+            values, known = self._known()
+            totals, mass = values.copy(), known.copy()
+            step_values, step_known = values, known
+            for _ in range(hops):
+                step_values = alpha * (transition @ step_values)
+                step_known = alpha * (transition @ step_known)
+                totals += step_values
+                mass += step_known
+            with np.errstate(invalid="ignore", divide="ignore"):
+                return np.where(mass > 0, totals / mass, np.nan)
+
+    def write_attributes(self, graph: nx.DiGraph, values: np.ndarray, prefix: str,
+                         nodes: Optional[Iterable] = None) -> int:
+        """
+        Store ``values`` rows as ``<prefix><trait>`` node attributes.
+
+        NaN entries are skipped.
+
+        Args:
+            nodes: Only write these nodes (default: every row with a value)
+
+        Returns:
+            Number of nodes written
+        """
+        names = [f"{prefix}{trait}" for trait in self.trait_names]
+        if nodes is None:
+            rows = np.flatnonzero(~np.isnan(values).all(axis=1))
+        else:
+            rows = np.fromiter((self.index[n] for n in nodes if n in self.index), dtype=np.int64)
+        graph_nodes = graph.nodes
+        for row, scores in zip(rows.tolist(), values[rows].tolist()):
+            graph_nodes[self.node_ids[row]].update((k, v) for k, v in zip(names, scores) if v == v)
+        return len(rows)
+
+
+def aggregate_traits(kg, rel_type: str, direction: str = "in", weighted: bool = False,
+                     edge_weight: Optional[str] = None, prefix: Optional[str] = None,
+                     label: Optional[str] = None) -> Dict:
+    """
+    Per-entity trait means over one relation, written back as node attributes.
+
+    Example: the average profile of every ORG's people becomes
+    ``works_at_mean_<trait>`` attributes on the ORG nodes::
+
+        aggregate_traits(kg, "works_at")
+
+    Args:
+        kg: ``KGBuilder`` with trait scores
+        rel_type, direction, weighted: See :meth:`GraphMatrices.aggregate`
+        edge_weight: Edge attribute used as weight when ``weighted``
+        prefix: Attribute prefix (default ``"<rel_type>_mean_"``)
+        label: Only write nodes with this label
+
+    Returns:
+        ``{node_id: {trait: score}}`` for the nodes written
+    """
+    matrices = GraphMatrices.from_builder(kg, [rel_type], edge_weight)
+    values = matrices.aggregate(rel_type, direction, weighted)
+    return _write(kg, matrices, values, prefix or f"{rel_type}_mean_", label)
+
+
+def propagate_traits(kg, relation_types: Optional[Iterable[str]] = None, hops: int = 2,
+                     alpha: float = 0.5, prefix: str = "smoothed_", label: Optional[str] = None) -> Dict:
+    """
+    k-hop smoothed trait profiles (see :meth:`GraphMatrices.propagate`),
+    written back as ``<prefix><trait>`` node attributes.
+
+    Returns:
+        ``{node_id: {trait: score}}`` for the nodes written
+    """
+    matrices = GraphMatrices.from_builder(kg, relation_types)
+    values = matrices.propagate(relation_types, hops, alpha)
+    return _write(kg, matrices, values, prefix, label)
+
+
+def _write(kg, matrices: GraphMatrices, values: np.ndarray, prefix: str, label: Optional[str]) -> Dict:
+    rows = np.flatnonzero(~np.isnan(values).all(axis=1))
+    nodes = [matrices.node_ids[r] for r in rows.tolist()]
+    if label is not None:
+        node_data = kg.graph.nodes
+        nodes = [n for n in nodes if node_data[n].get("label") == label]
+    matrices.write_attributes(kg.graph, values, prefix, nodes)
+    result = {}
+    for node in nodes:
+        row = values[matrices.index[node]]
+        result[node] = {t: float(v) for t, v in zip(matrices.trait_names, row.tolist()) if v == v}
+    return result
@@ -1,29 +1,202 @@
 """
 Groq API integration for enhancing knowledge graph personality analysis.
 """
+import importlib
+import importlib.util
 import os
-from typing import Dict, List, Optional
-from groq import Groq
-from . import config
-from .personality import PersonalityEstimator
+import time
+import types
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+import json
+from . import instrumentation
+from .llm_cache import TraitScoreCache, cache_key
+from .personality import PersonalityEstimator, TRAITS
+from .stream_parser import TraitStreamParser
+
+# GROQ_API_KEY value in config.template.py; treated as "no key configured"
+PLACEHOLDER_API_KEY = "your-api-key-here"
+
+
+def load_config() -> types.ModuleType:
+    """
+    Settings from ``config.template.py``, overridden by a local ``config.py``.
+
+    ``config.py`` holds credentials and is not tracked; without it the
+    template defaults are used and no API key is configured.
+    """
+    spec = importlib.util.spec_from_file_location(
+        f"{__package__}.config_template", Path(__file__).with_name("config.template.py"))
+    settings = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(settings)
+    try:
+        local = importlib.import_module(".config", __package__)
+    except ImportError:
+        return settings
+    settings.__dict__.update((k, v) for k, v in vars(local).items() if k.isupper())
+    return settings
+
+
+config = load_config()
+
+
+def configured_api_key() -> Optional[str]:
+    """``GROQ_API_KEY`` from the config, or None if unset or still the template placeholder."""
+    key = getattr(config, "GROQ_API_KEY", None)
+    return None if not key or key == PLACEHOLDER_API_KEY else key
+
+
+# Bump whenever build_prompt / build_packed_prompt change so cached scores are not reused
+PROMPT_VERSION = "1"
+PACKED_PROMPT_VERSION = "packed-1"
+
+# Completion tokens reserved per item of a packed request (one JSON object)
+TOKENS_PER_PACKED_ITEM = 48
+
+
+def build_prompt(text: str) -> str:
+    """Prompt asking the LLM for Big Five scores of a single text."""
+    return f'''Analyze the following text and rate the Big Five personality traits
+        (Openness, Conscientiousness, Extraversion, Agreeableness, Neuroticism)
+        on a scale of 0.0 to 1.0. Provide only the numerical scores in JSON format.
+        
+        Text to analyze: {text}'''
+
+
+def build_packed_prompt(texts: Sequence[str]) -> str:
+    """Prompt asking for Big Five scores of several numbered texts at once."""
+    items = "\n".join(f"[{i}] {' '.join(text.split())}" for i, text in enumerate(texts))
+    return f'''Analyze each numbered text below and rate the Big Five personality traits
+        (openness, conscientiousness, extraversion, agreeableness, neuroticism)
+        on a scale of 0.0 to 1.0 for each one. Reply with only a JSON array containing
+        one object per text, in order, like
+        [{{"id": 0, "openness": 0.5, "conscientiousness": 0.5, "extraversion": 0.5, "agreeableness": 0.5, "neuroticism": 0.5}}]
+
+        Texts to analyze:
+{items}'''
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)."""
+    return len(text) // 4 + 1
+
+
+def pack_texts(texts: Sequence[str], max_prompt_tokens: int,
+               max_completion_tokens: int) -> List[List[int]]:
+    """
+    Greedily group text indices so each packed request fits the token budget.
+
+    Args:
+        texts: Texts to pack
+        max_prompt_tokens: Estimated prompt tokens allowed per request
+        max_completion_tokens: Completion tokens per request; bounds the
+            number of items at ``max_completion_tokens // TOKENS_PER_PACKED_ITEM``
+
+    Returns:
+        Lists of indices into ``texts``; oversized texts get a pack of their own
+    """
+    max_items = max(1, max_completion_tokens // TOKENS_PER_PACKED_ITEM)
+    overhead = estimate_tokens(build_packed_prompt([]))
+    packs: List[List[int]] = []
+    current: List[int] = []
+    used = overhead
+    for i, text in enumerate(texts):
+        cost = estimate_tokens(text) + 4
+        if current and (used + cost > max_prompt_tokens or len(current) >= max_items):
+            packs.append(current)
+            current, used = [], overhead
+        current.append(i)
+        used += cost
+    if current:
+        packs.append(current)
+    return packs
+
+
+def parse_packed_scores(response_text: str, n_items: int) -> Dict[int, Dict[str, float]]:
+    """
+    Parse a packed reply into per-item scores, keeping only valid items.
+
+    An item is valid when its ``id`` is in range and all five traits are
+    numbers; values are clamped to [0, 1]. Items that fail validation are
+    left out so the caller can retry just those.
+    """
+    start, end = response_text.find("["), response_text.rfind("]")
+    if start < 0 or end < start:
+        return {}
+    try:
+        items = json.loads(response_text[start:end + 1])
+    except ValueError:
+        return {}
+
+    out: Dict[int, Dict[str, float]] = {}
+    for position, item in enumerate(items if isinstance(items, list) else []):
+        if not isinstance(item, dict):
+            continue
+        lowered = {str(k).lower(): v for k, v in item.items()}
+        item_id = lowered.get("id", position)
+        if not isinstance(item_id, int) or not 0 <= item_id < n_items:
+            continue
+        values = [lowered.get(trait) for trait in TRAITS]
+        if not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+            continue
+        out[item_id] = {trait: min(max(float(v), 0.0), 1.0) for trait, v in zip(TRAITS, values)}
+    return out
+
+
+def neutral_scores() -> Dict[str, float]:
+    return {trait: 0.5 for trait in TRAITS}
+
+
+def parse_scores(response_text: str) -> Dict[str, float]:
+    """
+    Extract the trait scores from a complete LLM reply.
+
+    Keys are normalized to lowercase trait names, values clamped to [0, 1]
+    and missing traits default to 0.5.
+
+    Raises:
+        ValueError: If the reply contains no trait scores
+    """
+    parser = TraitStreamParser()
+    parser.feed(response_text)
+    return parser.result()
+
+
+def llm_cache_key(text: str) -> str:
+    """Cache key for the LLM scores of ``text`` under the current model settings."""
+    return cache_key(text, config.DEFAULT_MODEL, config.TEMPERATURE, PROMPT_VERSION)
+
 
 class GroqAPIIntegrator:
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None,
+                 personality_estimator: Optional[PersonalityEstimator] = None,
+                 cache: Optional[TraitScoreCache] = None, client=None):
         """
         Initialize Groq API integration.
         
         Args:
             api_key: Groq API key. If not provided, looks for GROQ_API_KEY environment variable.
+            personality_estimator: Optional estimator to reuse; one sharing the
+                registry spaCy pipeline is created otherwise
+            cache: Optional score cache; cached texts are answered without a request
+            client: Optional ``groq.Groq``-compatible client (e.g. a fake for tests)
         """
-        self.api_key = api_key or os.getenv("GROQ_API_KEY") or config.GROQ_API_KEY
-        if not self.api_key:
-            raise ValueError("Groq API key not found. Please provide it in config.py or set GROQ_API_KEY environment variable.")
-        
-        self.client = Groq(
-            api_key=self.api_key,
-            default_headers={"Groq-Model-Version": "latest"}
-        )
-        self.personality_estimator = PersonalityEstimator()
+        self.cache = cache
+        if client is None:
+            self.api_key = api_key or os.getenv("GROQ_API_KEY") or configured_api_key()
+            if not self.api_key:
+                raise ValueError("Groq API key not found. Please provide it in config.py or set GROQ_API_KEY environment variable.")
+
+            from groq import Groq
+
+            client = Groq(
+                api_key=self.api_key,
+                default_headers={"Groq-Model-Version": "latest"}
+            )
+        self.client = client
+        self.personality_estimator = personality_estimator or PersonalityEstimator()
+        self.packing_stats: Dict[str, float] = {}
+        self.stream_stats = {"chunks": 0, "early_stops": 0, "parse_failures": 0}
 
     def analyze_text_with_llm(self, text: str) -> Dict[str, float]:
         """
@@ -35,11 +208,17 @@ class GroqAPIIntegrator:
         Returns:
             Dictionary of personality traits and their scores
         """
-        prompt = f'''Analyze the following text and rate the Big Five personality traits
-        (Openness, Conscientiousness, Extraversion, Agreeableness, Neuroticism)
-        on a scale of 0.0 to 1.0. Provide only the numerical scores in JSON format.
-        
-        Text to analyze: {text}'''
+        key = None
+        if self.cache is not None:
+            key = llm_cache_key(text)
+            cached = self.cache.get(key)
+            if cached is not None:
+                instrumentation.incr("llm_cache_hits")
+                return cached
+
+        prompt = build_prompt(text)
+        instrumentation.incr("llm_calls")
+        start = time.perf_counter()
 
         completion = self.client.chat.completions.create(
             model=config.DEFAULT_MODEL,
@@ -55,44 +234,131 @@ class GroqAPIIntegrator:
 
         # Parse the response to get trait scores
         try:
-            # Handle streaming response
-            response_text = ""
-            for chunk in completion:
-                if chunk.choices[0].delta.content:
-                    response_text += chunk.choices[0].delta.content
-            
-            # Clean up response to ensure it's valid JSON
-            response_text = response_text.strip()
-            if not response_text.startswith("{"):
-                response_text = response_text[response_text.find("{"):]
-            if not response_text.endswith("}"):
-                response_text = response_text[:response_text.rfind("}") + 1]
-            
-            import json
-            scores = json.loads(response_text)
-            
-            # Ensure all traits are present
-            required_traits = ["openness", "conscientiousness", "extraversion", 
-                             "agreeableness", "neuroticism"]
-            for trait in required_traits:
-                if trait.lower() not in {k.lower() for k in scores.keys()}:
-                    scores[trait] = 0.5  # Default score if missing
-            
+            parser = TraitStreamParser()
+            if config.STREAM:
+                # Parse chunk by chunk and stop generation once all traits are in
+                for chunk in completion:
+                    if parser.feed(chunk.choices[0].delta.content or ""):
+                        self.stream_stats["early_stops"] += 1
+                        close = getattr(completion, "close", None)
+                        if close is not None:
+                            close()
+                        break
+            else:
+                parser.feed(completion.choices[0].message.content or "")
+            instrumentation.observe("llm_latency_seconds", time.perf_counter() - start)
+            self.stream_stats["chunks"] += parser.chunks
+
+            scores = parser.result()
+            if key is not None:
+                self.cache.put(key, scores)
             return scores
         
         except Exception as e:
+            self.stream_stats["parse_failures"] += 1
+            instrumentation.incr("llm_parse_failures")
             print(f"Error parsing LLM response: {e}")
-            return {trait: 0.5 for trait in ["openness", "conscientiousness", 
-                                           "extraversion", "agreeableness", "neuroticism"]}
+            return neutral_scores()
+
+    def _request_text(self, prompt: str, max_tokens: int) -> str:
+        """Send one chat completion and return the full reply text."""
+        completion = self.client.chat.completions.create(
+            model=config.DEFAULT_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=config.TEMPERATURE,
+            max_tokens=max_tokens,
+            top_p=config.TOP_P,
+            stream=config.STREAM
+        )
+        if not config.STREAM:
+            return completion.choices[0].message.content or ""
+        return "".join(chunk.choices[0].delta.content or "" for chunk in completion)
+
+    def analyze_texts_packed(self, texts: Sequence[str], max_prompt_tokens: int = 6000,
+                             max_completion_tokens: Optional[int] = None
+                             ) -> List[Dict[str, float]]:
+        """
+        Score many short texts with few requests by packing them into one prompt.
+
+        Texts are grouped under a token budget, the model returns a JSON array
+        with one score object per text, and each item is validated on its own.
+        Only items that are missing or invalid are retried, by splitting their
+        pack in half until single items remain; those fall back to neutral
+        scores.
+
+        Args:
+            texts: Input texts to analyze
+            max_prompt_tokens: Estimated prompt tokens per request
+            max_completion_tokens: Completion tokens per request; defaults to
+                ``config.MAX_COMPLETION_TOKENS``
+
+        Returns:
+            Trait scores, one dict per text, in input order
+        """
+        max_completion_tokens = max_completion_tokens or config.MAX_COMPLETION_TOKENS
+        results: List[Optional[Dict[str, float]]] = [None] * len(texts)
+        keys: List[Optional[str]] = [None] * len(texts)
+        pending = []
+        for i, text in enumerate(texts):
+            if self.cache is not None:
+                keys[i] = cache_key(text, config.DEFAULT_MODEL, config.TEMPERATURE,
+                                    PACKED_PROMPT_VERSION)
+                results[i] = self.cache.get(keys[i])
+            if results[i] is None:
+                pending.append(i)
+
+        stack = [[pending[j] for j in pack] for pack in
+                 pack_texts([texts[i] for i in pending], max_prompt_tokens, max_completion_tokens)]
+        self.packing_stats = {"texts": len(texts), "cached": len(texts) - len(pending),
+                              "requests": 0, "retried_items": 0, "failed_items": 0}
+        instrumentation.incr("llm_cache_hits", self.packing_stats["cached"])
+        while stack:
+            pack = stack.pop()
+            tokens = min(max_completion_tokens, TOKENS_PER_PACKED_ITEM * len(pack) + 16)
+            self.packing_stats["requests"] += 1
+            instrumentation.incr("llm_calls")
+            try:
+                start = time.perf_counter()
+                reply = self._request_text(build_packed_prompt([texts[i] for i in pack]), tokens)
+                instrumentation.observe("llm_latency_seconds", time.perf_counter() - start)
+                parsed = parse_packed_scores(reply, len(pack))
+            except Exception as e:
+                print(f"Packed LLM request failed: {e}")
+                parsed = {}
+            failed = []
+            for position, i in enumerate(pack):
+                scores = parsed.get(position)
+                if scores is None:
+                    failed.append(i)
+                    continue
+                results[i] = scores
+                if keys[i] is not None:
+                    self.cache.put(keys[i], scores)
+            if not failed:
+                continue
+            instrumentation.incr("llm_parse_failures", len(failed))
+            if len(pack) == 1:
+                self.packing_stats["failed_items"] += 1
+                results[pack[0]] = neutral_scores()
+                continue
+            self.packing_stats["retried_items"] += len(failed)
+            half = (len(failed) + 1) // 2
+            stack.extend([failed[half:], failed[:half]] if len(failed) > 1 else [failed])
+        requests = self.packing_stats["requests"]
+        self.packing_stats["packing_factor"] = len(pending) / requests if requests else 0.0
+        return results
 
     def enhance_personality_estimation(self, text: str, 
-                                    base_scores: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+                                    base_scores: Optional[Dict[str, float]] = None,
+                                    analysis=None) -> Dict[str, float]:
         """
         Combine traditional personality estimation with LLM-based analysis.
         
         Args:
             text: Input text to analyze
             base_scores: Optional baseline scores from traditional analysis
+            analysis: Optional :class:`~.analysis.DocAnalysis` of ``text``; its
+                trait counts are used as the baseline without re-parsing
             
         Returns:
             Enhanced personality trait scores
@@ -100,6 +366,8 @@ class GroqAPIIntegrator:
         # Get LLM-based analysis
         llm_scores = self.analyze_text_with_llm(text)
         
+        if base_scores is None and analysis is not None:
+            base_scores = self.personality_estimator.estimate_from_analyses([analysis])[0]
         if base_scores is None:
             # Use traditional analysis as base
             base_scores = self.personality_estimator.estimate_traits(text)
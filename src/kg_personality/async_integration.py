@@ -0,0 +1,274 @@
+"""
+Asyncio Groq client for bulk, concurrency-limited personality enhancement.
+"""
+import asyncio
+import collections
+import math
+import os
+import random
+import time
+from typing import Any, Deque, Dict, Iterable, List, Optional, Sequence
+
+from . import instrumentation
+from .api_integration import (build_prompt, config, configured_api_key, estimate_tokens, llm_cache_key,
+                              neutral_scores, parse_scores)
+from .llm_cache import TraitScoreCache
+from .personality import PersonalityEstimator
+
+RETRYABLE_ERRORS = ("APIConnectionError", "APITimeoutError")
+# Most recent request latencies kept for the percentiles in ``stats``
+LATENCY_WINDOW = 10000
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        """
+        Async token bucket refilled continuously at ``per_minute`` units.
+
+        Args:
+            per_minute: Sustained rate (requests or tokens per minute)
+            capacity: Burst size; defaults to one minute's worth
+        """
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        # asyncio primitives bind to one event loop; a new lock is made per loop
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1.0):
+        """Wait until ``amount`` units are available and take them."""
+        amount = min(amount, self.capacity)
+        loop = asyncio.get_running_loop()
+        if self._lock_loop is not loop:
+            self._lock, self._lock_loop = asyncio.Lock(), loop
+        async with self._lock:
+            self._refill()
+            while self.tokens < amount:
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= amount
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of ``values`` (``q`` in 0-100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(q / 100.0 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class AsyncGroqAPIIntegrator:
+    def __init__(self, api_key: Optional[str] = None, client: Any = None,
+                 base_url: Optional[str] = None, max_in_flight: int = 8,
+                 requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None,
+                 max_retries: int = 5, timeout: float = 30.0,
+                 backoff_base: float = 0.5, backoff_max: float = 20.0,
+                 personality_estimator: Optional[PersonalityEstimator] = None,
+                 cache: Optional[TraitScoreCache] = None, latency_window: int = LATENCY_WINDOW):
+        """
+        Initialize the async Groq integration.
+
+        Args:
+            api_key: Groq API key. If not provided, looks for GROQ_API_KEY environment variable.
+            client: Optional ``groq.AsyncGroq``-compatible client (e.g. a fake for tests)
+            base_url: Optional API base URL, e.g. a local fake endpoint
+            max_in_flight: Maximum concurrent requests
+            requests_per_minute: Optional request rate limit
+            tokens_per_minute: Optional prompt + completion token rate limit
+            max_retries: Retries on 429, 5xx, connection errors and timeouts
+            timeout: Per-request timeout in seconds
+            backoff_base: First retry delay upper bound in seconds (doubles per attempt)
+            backoff_max: Maximum retry delay in seconds
+            personality_estimator: Estimator used by :meth:`enhance_many`
+            cache: Optional score cache; cached texts are answered without a request
+            latency_window: Number of recent request latencies kept for percentiles
+        """
+        if client is None:
+            api_key = api_key or os.getenv("GROQ_API_KEY") or configured_api_key()
+            if not api_key:
+                raise ValueError("Groq API key not found. Please provide it in config.py or set GROQ_API_KEY environment variable.")
+            import httpx
+            from groq import AsyncGroq
+
+            # One pooled HTTP client shared by every request
+            http_client = httpx.AsyncClient(limits=httpx.Limits(
+                max_connections=max_in_flight, max_keepalive_connections=max_in_flight))
+            client = AsyncGroq(api_key=api_key, base_url=base_url, max_retries=0,
+                               timeout=timeout, http_client=http_client,
+                               default_headers={"Groq-Model-Version": "latest"})
+        self.client = client
+        self.cache = cache
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.request_limiter = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.token_limiter = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._estimator = personality_estimator
+        # Created for the running event loop, so the integrator can be reused across asyncio.run calls
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+        # Bounded so long-lived integrators do not grow without limit
+        self.latencies: Deque[float] = collections.deque(maxlen=latency_window)
+        self.completed = 0
+        self.counters = {"requests": 0, "retries": 0, "failures": 0, "parse_errors": 0}
+        self._elapsed = 0.0
+
+    @property
+    def personality_estimator(self) -> PersonalityEstimator:
+        if self._estimator is None:
+            self._estimator = PersonalityEstimator()
+        return self._estimator
+
+    def _retryable(self, exc: BaseException) -> bool:
+        if isinstance(exc, asyncio.TimeoutError):
+            return True
+        status = getattr(exc, "status_code", None)
+        if status is not None:
+            return status == 429 or status >= 500
+        return type(exc).__name__ in RETRYABLE_ERRORS
+
+    def _backoff(self, attempt: int, exc: BaseException) -> float:
+        response = getattr(exc, "response", None)
+        retry_after = getattr(response, "headers", {}).get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        # Full jitter
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def _complete(self, prompt: str, max_tokens: int) -> str:
+        """Send one chat completion with rate limiting, timeout and retries."""
+        attempt = 0
+        while True:
+            # Retries count against the limits like any other request
+            if self.request_limiter:
+                await self.request_limiter.acquire(1)
+            if self.token_limiter:
+                await self.token_limiter.acquire(estimate_tokens(prompt) + max_tokens)
+            self.counters["requests"] += 1
+            instrumentation.incr("llm_calls")
+            start = time.perf_counter()
+            try:
+                response = await asyncio.wait_for(self.client.chat.completions.create(
+                    model=config.DEFAULT_MODEL,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=config.TEMPERATURE,
+                    max_tokens=max_tokens,
+                    top_p=config.TOP_P,
+                    stream=False,
+                ), timeout=self.timeout)
+                latency = time.perf_counter() - start
+                self.latencies.append(latency)
+                self.completed += 1
+                instrumentation.observe("llm_latency_seconds", latency)
+                return response.choices[0].message.content or ""
+            except Exception as exc:
+                if attempt >= self.max_retries or not self._retryable(exc):
+                    raise
+                attempt += 1
+                self.counters["retries"] += 1
+                instrumentation.incr("llm_retries")
+                await asyncio.sleep(self._backoff(attempt, exc))
+
+    async def analyze_text_async(self, text: str) -> Dict[str, float]:
+        """
+        Analyze one text with the LLM, bounded by the in-flight limit.
+
+        Returns neutral 0.5 scores if the request ultimately fails or the reply
+        cannot be parsed.
+        """
+        key = None
+        if self.cache is not None:
+            key = llm_cache_key(text)
+            cached = self.cache.get(key)
+            if cached is not None:
+                instrumentation.incr("llm_cache_hits")
+                return cached
+        loop = asyncio.get_running_loop()
+        if self._semaphore_loop is not loop:
+            self._semaphore, self._semaphore_loop = asyncio.Semaphore(self.max_in_flight), loop
+        async with self._semaphore:
+            try:
+                reply = await self._complete(build_prompt(text), config.MAX_COMPLETION_TOKENS)
+            except Exception as e:
+                self.counters["failures"] += 1
+                instrumentation.incr("llm_failures")
+                print(f"LLM request failed: {e}")
+                return neutral_scores()
+        try:
+            scores = parse_scores(reply)
+        except Exception as e:
+            self.counters["parse_errors"] += 1
+            instrumentation.incr("llm_parse_failures")
+            print(f"Error parsing LLM response: {e}")
+            return neutral_scores()
+        if key is not None:
+            self.cache.put(key, scores)
+        return scores
+
+    async def analyze_texts_async(self, texts: Iterable[str]) -> List[Dict[str, float]]:
+        """Analyze many texts concurrently; results are in input order."""
+        start = time.perf_counter()
+        results = await asyncio.gather(*(self.analyze_text_async(t) for t in texts))
+        self._elapsed += time.perf_counter() - start
+        return list(results)
+
+    async def enhance_many(self, texts: Sequence[str],
+                           base_scores: Optional[Sequence[Dict[str, float]]] = None
+                           ) -> List[Dict[str, float]]:
+        """
+        Bulk version of ``GroqAPIIntegrator.enhance_personality_estimation``.
+
+        Args:
+            texts: Input texts to analyze
+            base_scores: Optional baseline scores per text; computed with
+                ``PersonalityEstimator.estimate_traits_batch`` otherwise
+
+        Returns:
+            Enhanced personality trait scores, one dict per text
+        """
+        llm_scores = await self.analyze_texts_async(texts)
+        if base_scores is None:
+            base_scores = self.personality_estimator.estimate_traits_batch(texts)
+        enhanced = []
+        for base, llm in zip(base_scores, llm_scores):
+            enhanced.append({trait: (base[trait] + llm.get(trait, 0.5)) / 2 for trait in base})
+        return enhanced
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """
+        Counters, achieved throughput and latency percentiles (seconds) over
+        the last ``latency_window`` requests.
+        """
+        completed = self.completed
+        return {
+            **self.counters,
+            "completed": completed,
+            "elapsed_s": self._elapsed,
+            "requests_per_s": completed / self._elapsed if self._elapsed > 0 else 0.0,
+            "p50_s": percentile(self.latencies, 50),
+            "p90_s": percentile(self.latencies, 90),
+            "p99_s": percentile(self.latencies, 99),
+        }
+
+    async def aclose(self):
+        """Close the underlying connection pool."""
+        close = getattr(self.client, "close", None)
+        if close is not None:
+            result = close()
+            if asyncio.iscoroutine(result):
+                await result
@@ -7,6 +7,9 @@ GROQ_API_KEY = "your-api-key-here"  # Replace with your Groq API key
 # Model Configuration
 DEFAULT_MODEL = "mixtral-8x7b-32768"  # Default model to use
 TEMPERATURE = 0.3  # Default temperature for generation
+MAX_COMPLETION_TOKENS = 1024  # Maximum tokens generated per request
+TOP_P = 1  # Nucleus sampling
+STREAM = True  # Stream replies in GroqAPIIntegrator.analyze_text_with_llm
 
 # Analysis Settings
 COMBINE_WEIGHT = {
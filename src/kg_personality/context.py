@@ -0,0 +1,77 @@
+"""Compact per-document index of mention and context offsets
+"""
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# Columns of the per-document span array
+ENT_START, ENT_END, SENT_START, SENT_END = range(4)
+
+
+class ContextIndex:
+    def __init__(self):
+        """
+        Character offsets of every mention and its sentence, per source document.
+
+        Spans are kept as one ``int32`` array of shape (mentions, 4) per
+        document, in ``ENT_START, ENT_END, SENT_START, SENT_END`` column order.
+        Trait keyword hits (see :meth:`PersonalityEstimator.trait_hits`) can be
+        attached so entities are scored later without the Doc.
+        """
+        self.node_ids: Dict[str, List[str]] = {}
+        self.spans: Dict[str, np.ndarray] = {}
+        self.hits: Dict[str, np.ndarray] = {}
+
+    def add_doc(self, source_id: str, doc, node_ids: List[str]):
+        """Record the spans of ``doc.ents``; ``node_ids`` are their graph nodes, in order."""
+        spans = np.zeros((len(doc.ents), 4), dtype=np.int32)
+        has_sents = doc.has_annotation("SENT_START") or doc.has_annotation("DEP")
+        for row, ent in enumerate(doc.ents):
+            sent = ent.sent if has_sents else doc[:]
+            spans[row] = (ent.start_char, ent.end_char, sent.start_char, sent.end_char)
+        self.node_ids[source_id] = list(node_ids)
+        self.spans[source_id] = spans
+        self.hits.pop(source_id, None)
+
+    def add_spans(self, source_id: str, node_ids: List[str], spans: np.ndarray):
+        """Record precomputed ``(mentions, 4)`` spans, e.g. from another process."""
+        self.node_ids[source_id] = list(node_ids)
+        self.spans[source_id] = np.asarray(spans, dtype=np.int32).reshape(-1, 4)
+        self.hits.pop(source_id, None)
+
+    def set_hits(self, source_id: str, hits: np.ndarray):
+        """Attach ``(start_char, trait index)`` keyword hits for a document."""
+        hits = np.asarray(hits, dtype=np.int64).reshape(-1, 2)
+        self.hits[source_id] = hits[np.argsort(hits[:, 0], kind="stable")]
+
+    def remove(self, source_id: str):
+        self.node_ids.pop(source_id, None)
+        self.spans.pop(source_id, None)
+        self.hits.pop(source_id, None)
+
+    def windows(self, source_id: str, window: Optional[int] = None) -> np.ndarray:
+        """
+        Context ``(start, end)`` character windows for a document's mentions.
+
+        Args:
+            window: ``None`` for the mention's sentence, otherwise the mention
+                widened by this many characters on each side
+        """
+        spans = self.spans[source_id]
+        if window is None:
+            return spans[:, [SENT_START, SENT_END]]
+        return np.stack([np.maximum(spans[:, ENT_START] - window, 0),
+                         spans[:, ENT_END] + window], axis=1)
+
+    def mentions(self, node_id: str) -> Iterator[Tuple[str, Tuple[int, int, int, int]]]:
+        """Yield ``(source_id, span)`` for every recorded mention of ``node_id`` (linear scan)."""
+        for source_id, node_ids in self.node_ids.items():
+            for row, nid in enumerate(node_ids):
+                if nid == node_id:
+                    yield source_id, tuple(int(v) for v in self.spans[source_id][row])
+
+    def __len__(self) -> int:
+        return sum(len(ids) for ids in self.node_ids.values())
+
+    def __contains__(self, source_id: str) -> bool:
+        return source_id in self.spans
@@ -1,6 +1,13 @@
 """Synthetic data generator for knowledge graph examples"""
+import argparse
+import bisect
+import itertools
+import json
+import math
 import random
+from multiprocessing import Pool
 from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
 
 NAMES = [
     "Alex Johnson", "Maria Garcia", "Wei Chen", "James Smith", "Priya Patel",
@@ -53,7 +60,275 @@ def generate_example(num_people=3):
     
     return "\n\n".join(paragraphs)
 
-def main():
+# Building blocks for synthesized vocabularies
+SYLLABLES = [
+    "ka", "ren", "mi", "lo", "ta", "vin", "so", "ra", "del", "fi", "na", "bor", "el", "an",
+    "ju", "mar", "ko", "li", "sa", "ten", "ri", "vo", "ha", "zen", "da", "mel", "on", "gi",
+    "pe", "tru", "wa", "nel", "ya", "quin", "be", "lor", "cha", "dor", "xi", "fen",
+]
+ORG_SUFFIXES = ["Labs", "Systems", "Analytics", "Research", "Dynamics", "Solutions", "Inc.", "Group"]
+SKILL_PREFIXES = ["Applied", "Distributed", "Scalable", "Probabilistic", "Embedded", "Quantum",
+                  "Statistical", "Interactive", "Secure", "Realtime"]
+
+DISTRIBUTIONS = ("fixed", "uniform", "poisson", "pareto")
+
+
+class Vocabulary(NamedTuple):
+    names: List[str]
+    organizations: List[str]
+    skills: List[str]
+    # (trait keyword, Big Five trait) pairs planted in the text
+    traits: List[Tuple[str, str]]
+
+    def entity_patterns(self) -> List[Dict[str, str]]:
+        """``entity_ruler`` patterns matching every vocabulary entry."""
+        patterns = [{"label": "PERSON", "pattern": n} for n in self.names]
+        patterns += [{"label": "ORG", "pattern": o} for o in self.organizations]
+        patterns += [{"label": "SKILL", "pattern": s} for s in self.skills]
+        patterns += [{"label": "TRAIT", "pattern": w} for w, _ in self.traits]
+        return patterns
+
+
+def _word(rng: random.Random, syllables: int) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(syllables)).capitalize()
+
+
+def _unique(rng: random.Random, size: int, make) -> List[str]:
+    seen = set()
+    out = []
+    while len(out) < size:
+        value = make(rng)
+        if value not in seen:
+            seen.add(value)
+            out.append(value)
+    return out
+
+
+def synthesize_vocabulary(size: int = 1000, seed: int = 0) -> Vocabulary:
+    """
+    Build a reproducible vocabulary with ``size`` people, ``size // 10``
+    organizations and ``size // 20`` skills (at least the built-in lists).
+
+    Trait words are the ``PersonalityEstimator`` keywords, so planted traits
+    can be checked against estimated scores.
+    """
+    from .personality import PersonalityEstimator
+
+    rng = random.Random(seed)
+    names = _unique(rng, size, lambda r: f"{_word(r, 2)} {_word(r, r.randint(2, 3))}")
+    n_orgs = max(len(ORGANIZATIONS), size // 10)
+    organizations = ORGANIZATIONS + _unique(
+        rng, n_orgs - len(ORGANIZATIONS), lambda r: f"{_word(r, r.randint(2, 3))} {r.choice(ORG_SUFFIXES)}")
+    n_skills = max(len(SKILLS), size // 20)
+    skills = SKILLS + _unique(
+        rng, n_skills - len(SKILLS), lambda r: f"{r.choice(SKILL_PREFIXES)} {_word(r, 3)}")
+    keywords = PersonalityEstimator().trait_keywords
+    traits = [(word, trait) for trait, words in keywords.items() for word in words]
+    return Vocabulary(names, organizations, skills, traits)
+
+
+def _people_count(rng: random.Random, distribution: str, mean: float, max_people: int) -> int:
+    if distribution == "fixed":
+        k = round(mean)
+    elif distribution == "uniform":
+        k = rng.randint(1, max(1, round(2 * mean - 1)))
+    elif distribution == "poisson":
+        # Knuth's method; fine for the small means used here
+        limit, k, p = math.exp(-mean), 0, 1.0
+        while True:
+            p *= rng.random()
+            if p <= limit:
+                break
+            k += 1
+    elif distribution == "pareto":
+        # Heavy tail with the requested mean (shape 2 => mean = 2 * scale)
+        k = int(rng.paretovariate(2.0) * mean / 2)
+    else:
+        raise ValueError(f"Unknown distribution {distribution!r}; expected one of {DISTRIBUTIONS}")
+    return max(1, min(k, max_people))
+
+
+def _zipf_weights(n: int, exponent: float) -> List[float]:
+    return list(itertools.accumulate(1.0 / (rank ** exponent) for rank in range(1, n + 1)))
+
+
+class CorpusGenerator:
+    def __init__(self, vocab_size: int = 1000, seed: int = 0, distribution: str = "poisson",
+                 mean_people: float = 3.0, max_people: int = 50,
+                 zipf_exponent: Optional[float] = None):
+        """
+        Lazily generate synthetic documents with ground truth.
+
+        Document ``i`` depends only on ``(seed, i)``, so any range of
+        documents can be generated independently (e.g. one shard per process)
+        and the corpus is identical however it is split.
+
+        Args:
+            vocab_size: Number of synthesized people (orgs and skills scale with it)
+            seed: Seed for the vocabulary and every document
+            distribution: People per document: ``fixed``, ``uniform``,
+                ``poisson`` or ``pareto`` (heavy tailed)
+            mean_people: Mean people per document
+            max_people: Upper bound on people per document
+            zipf_exponent: If set, entities are drawn with Zipf popularity
+                (a few very frequent names/orgs) instead of uniformly
+        """
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown distribution {distribution!r}; expected one of {DISTRIBUTIONS}")
+        self.vocab = synthesize_vocabulary(vocab_size, seed)
+        self.seed = seed
+        self.distribution = distribution
+        self.mean_people = mean_people
+        self.max_people = min(max_people, len(self.vocab.names))
+        self.zipf_exponent = zipf_exponent
+        self._weights = {}
+        if zipf_exponent is not None:
+            for field in ("names", "organizations", "skills"):
+                self._weights[field] = _zipf_weights(len(getattr(self.vocab, field)), zipf_exponent)
+
+    def _pick(self, rng: random.Random, field: str) -> str:
+        values = getattr(self.vocab, field)
+        weights = self._weights.get(field)
+        if weights is None:
+            return values[rng.randrange(len(values))]
+        return values[min(bisect.bisect(weights, rng.random() * weights[-1]), len(values) - 1)]
+
+    def _pick_distinct(self, rng: random.Random, field: str, k: int) -> List[str]:
+        if field not in self._weights:
+            return rng.sample(getattr(self.vocab, field), k)
+        picked: Dict[str, None] = {}
+        while len(picked) < k:
+            picked[self._pick(rng, field)] = None
+        return list(picked)
+
+    def document(self, index: int) -> Tuple[str, str, Dict]:
+        """
+        Generate document ``index``.
+
+        Returns:
+            ``(doc_id, text, truth)`` where ``truth`` lists each planted person
+            with their organization, skills, trait word and Big Five trait,
+            and the ``(subject, relation, object)`` triples that imply
+        """
+        rng = random.Random(self.seed * 1_000_003 + index)
+        k = _people_count(rng, self.distribution, self.mean_people, self.max_people)
+        paragraphs = []
+        people = []
+        relations = []
+        for name in self._pick_distinct(rng, "names", k):
+            org = self._pick(rng, "organizations")
+            skill1, skill2 = self._pick_distinct(rng, "skills", 2)
+            word, trait = self.vocab.traits[rng.randrange(len(self.vocab.traits))]
+            template = rng.choice(TEMPLATES)
+            paragraphs.append(template.format(name=name, org=org, skill1=skill1, skill2=skill2,
+                                              trait=word))
+            skills = [skill1, skill2] if "{skill2}" in template else [skill1]
+            people.append({"name": name, "org": org, "skills": skills,
+                           "trait_word": word, "trait": trait})
+            relations.append([name, "works_at", org])
+            relations.extend([name, "has_skill", skill] for skill in skills)
+            relations.append([name, "exhibits", word])
+        doc_id = f"doc{index}"
+        return doc_id, "\n\n".join(paragraphs), {"id": doc_id, "people": people, "relations": relations}
+
+    def documents(self, n_docs: int, start: int = 0) -> Iterator[Tuple[str, str, Dict]]:
+        """Yield documents ``start`` to ``start + n_docs - 1`` lazily."""
+        for index in range(start, start + n_docs):
+            yield self.document(index)
+
+    def corpus(self, n_docs: int, start: int = 0) -> Iterator[Tuple[str, str]]:
+        """``(source_id, text)`` pairs, as accepted by ``KGBuilder.build_from_corpus``."""
+        for doc_id, text, _ in self.documents(n_docs, start):
+            yield doc_id, text
+
+
+def _write_shard(job) -> Dict:
+    params, shard, start, count, out_dir = job
+    gen = CorpusGenerator(**params)
+    docs_path = Path(out_dir) / f"docs-{shard:05d}.jsonl"
+    truth_path = Path(out_dir) / f"truth-{shard:05d}.jsonl"
+    people = 0
+    with open(docs_path, "w", encoding="utf-8") as docs_f, \
+            open(truth_path, "w", encoding="utf-8") as truth_f:
+        for doc_id, text, truth in gen.documents(count, start):
+            docs_f.write(json.dumps({"id": doc_id, "text": text}))
+            docs_f.write("\n")
+            truth_f.write(json.dumps(truth))
+            truth_f.write("\n")
+            people += len(truth["people"])
+    return {"shard": shard, "docs": docs_path.name, "truth": truth_path.name,
+            "start": start, "count": count, "people": people}
+
+
+def write_sharded_corpus(out_dir: str, n_docs: int, n_shards: int = 8, processes: int = 1,
+                         **params) -> Dict:
+    """
+    Write ``n_docs`` documents as ``docs-NNNNN.jsonl`` shards plus matching
+    ``truth-NNNNN.jsonl`` ground truth, generating shards in parallel.
+
+    Also writes ``manifest.json`` (parameters and shard list) and
+    ``vocabulary.json``.
+
+    Args:
+        out_dir: Output directory (created if missing)
+        n_docs: Total number of documents
+        n_shards: Number of shard files
+        processes: Worker processes generating shards
+        **params: ``CorpusGenerator`` arguments (vocab_size, seed, distribution, ...)
+
+    Returns:
+        The manifest
+    """
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    n_shards = max(1, min(n_shards, n_docs))
+    bounds = [n_docs * i // n_shards for i in range(n_shards + 1)]
+    jobs = [(params, i, bounds[i], bounds[i + 1] - bounds[i], str(out)) for i in range(n_shards)]
+    if processes > 1:
+        with Pool(processes) as pool:
+            shards = sorted(pool.imap_unordered(_write_shard, jobs), key=lambda s: s["shard"])
+    else:
+        shards = [_write_shard(job) for job in jobs]
+
+    vocab = CorpusGenerator(**params).vocab
+    (out / "vocabulary.json").write_text(json.dumps(vocab._asdict()))
+    manifest = {"n_docs": n_docs, "params": params, "shards": shards,
+                "people": sum(s["people"] for s in shards)}
+    (out / "manifest.json").write_text(json.dumps(manifest, indent=2))
+    return manifest
+
+
+def read_jsonl_corpus(paths: Sequence[str]) -> Iterator[Tuple[str, str]]:
+    """Stream ``(source_id, text)`` pairs from ``docs-*.jsonl`` shards."""
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                yield record["id"], record["text"]
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Generate synthetic knowledge graph text")
+    parser.add_argument("--docs", type=int, help="Write a sharded JSONL corpus of this many documents")
+    parser.add_argument("--out", default="data/corpus")
+    parser.add_argument("--shards", type=int, default=8)
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--vocab-size", type=int, default=1000)
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="poisson")
+    parser.add_argument("--mean-people", type=float, default=3.0)
+    parser.add_argument("--max-people", type=int, default=50)
+    parser.add_argument("--zipf", type=float, help="Zipf exponent for entity popularity")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    if args.docs:
+        manifest = write_sharded_corpus(
+            args.out, args.docs, n_shards=args.shards, processes=args.processes,
+            vocab_size=args.vocab_size, seed=args.seed, distribution=args.distribution,
+            mean_people=args.mean_people, max_people=args.max_people, zipf_exponent=args.zipf)
+        print(f"Generated {manifest['n_docs']} documents ({manifest['people']} people) "
+              f"in {len(manifest['shards'])} shards under {args.out}")
+        return
+
     # Generate examples of different sizes
     examples = {
         'small': generate_example(2),
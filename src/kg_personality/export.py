@@ -0,0 +1,307 @@
+"""Streaming graph export for vis-network, with level-of-detail reduction
+"""
+import json
+import random
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import networkx as nx
+import numpy as np
+
+from . import instrumentation
+
+# vis-network assets vendored with the repository (the files pyvis references);
+# not present when the package is installed, in which case VIS_CDN is linked
+VIS_ASSETS = Path(__file__).resolve().parents[2] / "lib" / "vis-9.1.2"
+VIS_FILES = ("vis-network.min.js", "vis-network.css")
+VIS_CDN = {
+    "vis-network.min.js": "https://cdnjs.cloudflare.com/ajax/libs/vis-network/9.1.2/dist/vis-network.min.js",
+    "vis-network.css": "https://cdnjs.cloudflare.com/ajax/libs/vis-network/9.1.2/dist/dist/vis-network.min.css",
+}
+
+COLORS = {
+    "PERSON": "#4CAF50",
+    "ORG": "#2196F3",
+    "SKILL": "#FFC107",
+    "TRAIT": "#9C27B0",
+}
+DEFAULT_COLOR = "#607D8B"
+
+# vis-network stays interactive up to a few thousand nodes
+MAX_NODES = 5000
+MAX_EDGES = 20000
+
+_HTML_HEAD = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<link rel="stylesheet" href="{css}">
+<script src="{js}"></script>
+<style>#graph {{ width: 100%; height: {height}; border: 1px solid lightgray; }}</style>
+</head>
+<body>
+<div id="graph"></div>
+<script>var nodes = new vis.DataSet(); var edges = new vis.DataSet();</script>
+"""
+
+_HTML_TAIL = """<script>
+var network = new vis.Network(document.getElementById("graph"),
+                              {{nodes: nodes, edges: edges}}, {options});
+</script>
+</body>
+</html>
+"""
+
+
+def collapse_graph(graph: nx.DiGraph, by: str = "label") -> nx.DiGraph:
+    """
+    Merge nodes into one node per group, with edges counted between groups.
+
+    Args:
+        graph: Graph to reduce
+        by: ``"label"`` to group by the node ``label`` attribute, or
+            ``"community"`` for label-propagation communities (near linear)
+
+    Returns:
+        Graph of ``group:<name>`` nodes with ``size`` attributes and edges
+        with ``count`` attributes; edges inside a group are dropped
+    """
+    if by == "label":
+        group_of = {n: d.get("label") or "OTHER" for n, d in graph.nodes(data=True)}
+    elif by == "community":
+        communities = nx.community.label_propagation_communities(graph.to_undirected(as_view=True))
+        group_of = {n: f"community {i}" for i, members in enumerate(communities) for n in members}
+    else:
+        raise ValueError(f"Unknown collapse mode {by!r}; expected 'label' or 'community'")
+
+    sizes: Dict[str, int] = {}
+    for group in group_of.values():
+        sizes[group] = sizes.get(group, 0) + 1
+    counts: Dict[Tuple[str, str], int] = {}
+    for u, v in graph.edges():
+        gu, gv = group_of[u], group_of[v]
+        if gu != gv:
+            counts[(gu, gv)] = counts.get((gu, gv), 0) + 1
+
+    collapsed = nx.DiGraph()
+    collapsed.add_nodes_from((f"group:{g}", {"label": g if by == "label" else None,
+                                             "text": f"{g} ({size})", "size": size})
+                             for g, size in sizes.items())
+    collapsed.add_edges_from((f"group:{gu}", f"group:{gv}", {"type": f"{count} edges", "count": count})
+                             for (gu, gv), count in counts.items())
+    return collapsed
+
+
+def top_k_nodes(graph: nx.DiGraph, k: int) -> List[Any]:
+    """The ``k`` highest-degree nodes, highest first (linear-time selection)."""
+    nodes = list(graph.nodes)
+    if k >= len(nodes):
+        return nodes
+    degrees = np.fromiter((d for _, d in graph.degree(nodes)), dtype=np.int64, count=len(nodes))
+    top = np.argpartition(-degrees, k - 1)[:k]
+    top = top[np.argsort(-degrees[top], kind="stable")]
+    return [nodes[i] for i in top.tolist()]
+
+
+def select_nodes(graph: nx.DiGraph, top_k: Optional[int] = None, sample: Optional[int] = None,
+                 max_nodes: Optional[int] = MAX_NODES, seed: int = 0) -> List[Any]:
+    """
+    Pick the nodes to draw.
+
+    Args:
+        top_k: Keep the ``top_k`` highest-degree nodes
+        sample: Keep a uniform random sample of this many nodes
+        max_nodes: Hard cap applied last (by degree); ``None`` for no cap
+        seed: Sampling seed
+    """
+    nodes = list(graph.nodes)
+    view = graph
+    ranked = False
+    if sample is not None and sample < len(nodes):
+        nodes = random.Random(seed).sample(nodes, sample)
+        view = graph.subgraph(nodes)
+    if top_k is not None and top_k < len(nodes):
+        nodes = top_k_nodes(view, top_k)
+        ranked = True
+    if max_nodes is not None and len(nodes) > max_nodes:
+        print(f"Graph has {len(nodes)} nodes to draw; keeping the {max_nodes} with highest degree")
+        nodes = nodes[:max_nodes] if ranked else top_k_nodes(view, max_nodes)
+    return nodes
+
+
+def _tooltip(attrs: Dict[str, Any], scores: Optional[Dict[str, float]]) -> str:
+    lines = [f"Type: {attrs.get('label') or 'OTHER'}"]
+    if "size" in attrs:
+        lines.append(f"Nodes: {attrs['size']}")
+    elif "count" in attrs:
+        lines.append(f"Mentions: {attrs['count']}")
+    if scores:
+        lines.append("Personality Traits:")
+        lines.extend(f"{trait.capitalize()}: {score:.2f}" for trait, score in scores.items())
+    return "\n".join(lines)
+
+
+def vis_elements(graph: nx.DiGraph, nodes: List[Any], traits=None,
+                 max_edges: Optional[int] = MAX_EDGES
+                 ) -> Tuple[Iterator[Dict[str, Any]], Iterator[Dict[str, Any]]]:
+    """
+    Lazily build vis-network node and edge records for ``nodes``.
+
+    Only edges between selected nodes are emitted, found through each
+    node's adjacency, so the work is linear in the drawn subgraph.
+
+    Args:
+        traits: Optional :class:`~.trait_store.TraitStore` for tooltips
+        max_edges: Maximum number of edges to emit
+    """
+    selected = set(nodes)
+
+    def node_records():
+        for node in nodes:
+            attrs = graph.nodes[node]
+            group = attrs.get("label") or "OTHER"
+            record = {"id": str(node), "label": str(attrs.get("text", node)), "group": group,
+                      "color": COLORS.get(group, DEFAULT_COLOR),
+                      "title": _tooltip(attrs, traits.get(node) if traits is not None else None)}
+            if "size" in attrs:
+                record["value"] = attrs["size"]
+            yield record
+
+    def edge_records():
+        emitted = 0
+        for u in nodes:
+            for v, data in graph.adj[u].items():
+                if v not in selected:
+                    continue
+                if max_edges is not None and emitted >= max_edges:
+                    return
+                record = {"from": str(u), "to": str(v), "title": data.get("type", ""), "arrows": "to"}
+                if "count" in data:
+                    record["value"] = data["count"]
+                yield record
+                emitted += 1
+
+    return node_records(), edge_records()
+
+
+def _chunks(records: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def reduce_graph(graph: nx.DiGraph, top_k: Optional[int] = None, collapse: Optional[str] = None,
+                 sample: Optional[int] = None, max_nodes: Optional[int] = MAX_NODES,
+                 seed: int = 0) -> Tuple[nx.DiGraph, List[Any]]:
+    """Apply the level-of-detail options; returns the graph to draw from and its selected nodes."""
+    if collapse is not None:
+        graph = collapse_graph(graph, by=collapse)
+    return graph, select_nodes(graph, top_k=top_k, sample=sample, max_nodes=max_nodes, seed=seed)
+
+
+def export_html(graph: nx.DiGraph, output_path: str, traits=None, top_k: Optional[int] = None,
+                collapse: Optional[str] = None, sample: Optional[int] = None,
+                max_nodes: Optional[int] = MAX_NODES, max_edges: Optional[int] = MAX_EDGES,
+                chunk_size: int = 5000, seed: int = 0, title: str = "Knowledge Graph",
+                height: str = "800px", physics: Optional[bool] = None) -> Dict[str, int]:
+    """
+    Stream a vis-network HTML page straight to disk.
+
+    Nodes and edges are written as chunked JSON ``<script>`` blocks that feed
+    ``vis.DataSet`` objects, so nothing larger than one chunk is held as a
+    string. The vendored vis-network assets are copied to ``lib/vis-9.1.2``
+    next to the output file, or loaded from ``VIS_CDN`` when the package
+    was installed without them. Level-of-detail options are applied in the
+    order collapse, sample, top-k, then the ``max_nodes`` cap.
+
+    Args:
+        graph: Graph to export
+        output_path: HTML file to write
+        traits: Optional :class:`~.trait_store.TraitStore` for tooltips
+        top_k: Keep only the ``top_k`` highest-degree nodes
+        collapse: ``"label"`` or ``"community"`` to draw one node per group
+        sample: Keep a random sample of this many nodes
+        max_nodes: Upper bound on drawn nodes; ``None`` disables it
+        max_edges: Upper bound on drawn edges; ``None`` disables it
+        chunk_size: Records per ``<script>`` block
+        seed: Sampling seed
+        title: Page title
+        height: CSS height of the graph canvas
+        physics: Enable the physics layout; by default only for graphs of
+            at most 1000 drawn nodes
+
+    Returns:
+        Counts of drawn ``nodes`` and ``edges`` and the file size in ``bytes``
+    """
+    output_path = Path(output_path)
+    with instrumentation.stage("export.html"):
+        graph, nodes = reduce_graph(graph, top_k, collapse, sample, max_nodes, seed)
+        node_records, edge_records = vis_elements(graph, nodes, traits, max_edges)
+        assets = _copy_assets(output_path.parent / "lib" / VIS_ASSETS.name)
+        if physics is None:
+            physics = len(nodes) <= 1000
+        options = {"physics": {"enabled": physics, "stabilization": {"iterations": 100}},
+                   "layout": {"improvedLayout": len(nodes) <= 1000},
+                   "edges": {"smooth": False}, "interaction": {"hideEdgesOnDrag": True}}
+
+        n_edges = 0
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(_HTML_HEAD.format(title=title, height=height, css=assets["vis-network.css"],
+                                      js=assets["vis-network.min.js"]))
+            for dataset, records in (("nodes", node_records), ("edges", edge_records)):
+                for chunk in _chunks(records, chunk_size):
+                    if dataset == "edges":
+                        n_edges += len(chunk)
+                    f.write(f"<script>{dataset}.add(")
+                    # "</" cannot appear inside an inline script
+                    f.write(json.dumps(chunk, separators=(",", ":")).replace("</", "<\\/"))
+                    f.write(");</script>\n")
+            f.write(_HTML_TAIL.format(options=json.dumps(options)))
+        return {"nodes": len(nodes), "edges": n_edges, "bytes": output_path.stat().st_size}
+
+
+def export_ndjson(graph: nx.DiGraph, output_path: str, traits=None, top_k: Optional[int] = None,
+                  collapse: Optional[str] = None, sample: Optional[int] = None,
+                  max_nodes: Optional[int] = None, max_edges: Optional[int] = None,
+                  seed: int = 0) -> Dict[str, int]:
+    """
+    Stream the graph as NDJSON: one ``{"node": {...}}`` or ``{"edge": {...}}``
+    vis-network record per line, nodes first.
+
+    Takes the same level-of-detail options as :func:`export_html` but is
+    uncapped by default, for loading into other tools or paging into a
+    viewer.
+    """
+    output_path = Path(output_path)
+    with instrumentation.stage("export.ndjson"):
+        graph, nodes = reduce_graph(graph, top_k, collapse, sample, max_nodes, seed)
+        node_records, edge_records = vis_elements(graph, nodes, traits, max_edges)
+        n_edges = 0
+        with open(output_path, "w", encoding="utf-8") as f:
+            for record in node_records:
+                f.write(json.dumps({"node": record}, separators=(",", ":")))
+                f.write("\n")
+            for record in edge_records:
+                f.write(json.dumps({"edge": record}, separators=(",", ":")))
+                f.write("\n")
+                n_edges += 1
+    return {"nodes": len(nodes), "edges": n_edges, "bytes": output_path.stat().st_size}
+
+
+def _copy_assets(target: Path) -> Dict[str, str]:
+    """Copy the vendored assets to ``target``; returns the URL to reference for each file."""
+    if not all((VIS_ASSETS / name).exists() for name in VIS_FILES):
+        return dict(VIS_CDN)
+    target.mkdir(parents=True, exist_ok=True)
+    for name in VIS_FILES:
+        dest = target / name
+        if not dest.exists():
+            shutil.copyfile(VIS_ASSETS / name, dest)
+    return {name: f"lib/{target.name}/{name}" for name in VIS_FILES}
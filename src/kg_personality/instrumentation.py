@@ -0,0 +1,364 @@
+"""
+Lightweight pipeline instrumentation: stage timers, counters and histograms.
+
+Everything is off by default; while disabled, :func:`stage` returns a shared
+no-op context manager and :func:`incr` / :func:`observe` return after one
+attribute check. Enable with :func:`enable`, read with :func:`snapshot` and
+publish to sinks with :func:`flush`.
+"""
+import bisect
+import contextlib
+import cProfile
+import io
+import json
+import math
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+# Upper bounds in seconds; suits both per-document stages and LLM round trips
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_NULL = contextlib.nullcontext()
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """Fixed-bucket histogram with count, sum, min and max (Prometheus layout)."""
+        self.bounds = tuple(buckets)
+        # One extra bucket for values above the last bound (+Inf)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Estimate the ``q`` quantile (0-1) by interpolating inside its bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lo = self.bounds[i - 1] if i > 0 else 0.0
+                hi = self.bounds[i] if i < len(self.bounds) else self.max
+                lo, hi = max(lo, self.min), min(hi, self.max)
+                return lo + (hi - lo) * (rank - seen) / n
+            seen += n
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else 0.0,
+            "max": self.max if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "buckets": dict(zip([str(b) for b in self.bounds] + ["+Inf"], self.counts)),
+        }
+
+
+class Metrics:
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        Registry of counters, stage timers and value histograms.
+
+        Stage durations are recorded in seconds, one observation per
+        :meth:`stage` block. Stages listed in :meth:`profile_stage` also run
+        under cProfile and/or tracemalloc.
+        """
+        self.enabled = False
+        self.buckets = tuple(buckets)
+        self.counters: Dict[str, float] = {}
+        self.stages: Dict[str, Histogram] = {}
+        self.histograms: Dict[str, Histogram] = {}
+        self.sinks: List[Any] = []
+        # stage -> {"cpu": bool, "memory": bool}
+        self.profiled: Dict[str, Dict[str, bool]] = {}
+        self.profiles: Dict[str, pstats.Stats] = {}
+        self.memory_peaks: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, value: float = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float):
+        with self._lock:
+            hist = self.histograms.get(name)
+            if hist is None:
+                hist = self.histograms[name] = Histogram(self.buckets)
+            hist.observe(value)
+
+    def record_stage(self, name: str, seconds: float):
+        with self._lock:
+            hist = self.stages.get(name)
+            if hist is None:
+                hist = self.stages[name] = Histogram(self.buckets)
+            hist.observe(seconds)
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        """Time a block as one observation of stage ``name``."""
+        profile = self.profiled.get(name)
+        if profile is None:
+            start = time.perf_counter()
+            try:
+                yield
+            finally:
+                self.record_stage(name, time.perf_counter() - start)
+            return
+
+        profiler = cProfile.Profile() if profile["cpu"] else None
+        if profiler is not None:
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another profiler is active (e.g. a profiled enclosing stage)
+                profiler = None
+        # Do not stop tracemalloc if someone else started it
+        own_trace = profile["memory"] and not tracemalloc.is_tracing()
+        if own_trace:
+            tracemalloc.start()
+        if profile["memory"]:
+            if hasattr(tracemalloc, "reset_peak"):  # Python 3.9+
+                tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            if profiler is not None:
+                profiler.disable()
+                with self._lock:
+                    stats = self.profiles.get(name)
+                    if stats is None:
+                        self.profiles[name] = pstats.Stats(profiler, stream=io.StringIO())
+                    else:
+                        stats.add(profiler)
+            if profile["memory"]:
+                peak = tracemalloc.get_traced_memory()[1] - base
+                if own_trace:
+                    tracemalloc.stop()
+                with self._lock:
+                    self.memory_peaks[name] = max(self.memory_peaks.get(name, 0), peak)
+            self.record_stage(name, elapsed)
+
+    def profile_stage(self, name: str, cpu: bool = True, memory: bool = False):
+        """Run future ``stage(name)`` blocks under cProfile (``cpu``) and/or tracemalloc (``memory``)."""
+        self.profiled[name] = {"cpu": cpu, "memory": memory}
+
+    def profile_report(self, name: str, sort: str = "cumulative", limit: int = 25) -> str:
+        """Text report of the accumulated cProfile stats of a stage."""
+        stats = self.profiles.get(name)
+        if stats is None:
+            return ""
+        stream = io.StringIO()
+        stats.stream = stream
+        stats.sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current values as plain dicts (JSON serializable)."""
+        with self._lock:
+            return {
+                "timestamp": time.time(),
+                "counters": dict(self.counters),
+                "stages": {name: h.to_dict() for name, h in self.stages.items()},
+                "histograms": {name: h.to_dict() for name, h in self.histograms.items()},
+                "memory_peaks": dict(self.memory_peaks),
+            }
+
+    def flush(self) -> Dict[str, Any]:
+        """Send a snapshot to every sink and return it."""
+        snap = self.snapshot()
+        for sink in self.sinks:
+            sink.emit(snap)
+        return snap
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.stages.clear()
+            self.histograms.clear()
+            self.profiles.clear()
+            self.memory_peaks.clear()
+
+
+class DictSink:
+    """Keeps every emitted snapshot in memory (``last`` is the newest)."""
+
+    def __init__(self):
+        self.snapshots: List[Dict[str, Any]] = []
+
+    @property
+    def last(self) -> Optional[Dict[str, Any]]:
+        return self.snapshots[-1] if self.snapshots else None
+
+    def emit(self, snap: Dict[str, Any]):
+        self.snapshots.append(snap)
+
+
+class JSONLogSink:
+    """Appends one JSON line per snapshot to ``path``."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+
+    def emit(self, snap: Dict[str, Any]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(snap))
+            f.write("\n")
+
+
+class PrometheusTextSink:
+    """
+    Writes the Prometheus text exposition format to ``path``, e.g. for the
+    node_exporter textfile collector. The file is replaced atomically.
+    """
+
+    def __init__(self, path: str, prefix: str = "kg"):
+        self.path = Path(path)
+        self.prefix = prefix
+
+    def emit(self, snap: Dict[str, Any]):
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(prometheus_text(snap, self.prefix), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def _metric_name(prefix: str, name: str) -> str:
+    cleaned = "".join(c if c.isalnum() else "_" for c in name)
+    return f"{prefix}_{cleaned}"
+
+
+def _histogram_lines(metric: str, hist: Dict[str, Any], labels: str = "") -> List[str]:
+    lines = []
+    cumulative = 0
+    sep = "," if labels else ""
+    for bound, n in hist["buckets"].items():
+        cumulative += n
+        lines.append(f'{metric}_bucket{{{labels}{sep}le="{bound}"}} {cumulative}')
+    suffix = f"{{{labels}}}" if labels else ""
+    lines.append(f"{metric}_sum{suffix} {hist['sum']}")
+    lines.append(f"{metric}_count{suffix} {hist['count']}")
+    return lines
+
+
+def prometheus_text(snap: Dict[str, Any], prefix: str = "kg") -> str:
+    """Render a :meth:`Metrics.snapshot` in the Prometheus text format."""
+    lines = []
+    for name, value in sorted(snap["counters"].items()):
+        metric = _metric_name(prefix, name) + "_total"
+        lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+    if snap["stages"]:
+        metric = f"{prefix}_stage_seconds"
+        lines.append(f"# TYPE {metric} histogram")
+        for name, hist in sorted(snap["stages"].items()):
+            lines += _histogram_lines(metric, hist, f'stage="{name}"')
+    for name, hist in sorted(snap["histograms"].items()):
+        metric = _metric_name(prefix, name)
+        lines.append(f"# TYPE {metric} histogram")
+        lines += _histogram_lines(metric, hist)
+    if snap.get("memory_peaks"):
+        metric = f"{prefix}_stage_memory_peak_bytes"
+        lines.append(f"# TYPE {metric} gauge")
+        lines += [f'{metric}{{stage="{name}"}} {peak}' for name, peak in sorted(snap["memory_peaks"].items())]
+    return "\n".join(lines) + "\n"
+
+
+# Process-wide registry used by the pipeline classes
+metrics = Metrics()
+
+
+def enable(sinks: Iterable[Any] = (), profile: Optional[Dict[str, str]] = None) -> Metrics:
+    """
+    Turn instrumentation on.
+
+    Args:
+        sinks: Sinks receiving snapshots on :func:`flush`
+        profile: Optional ``{stage: "cpu" | "memory" | "both"}`` to profile
+
+    Returns:
+        The process-wide :class:`Metrics`
+    """
+    metrics.sinks.extend(sinks)
+    for name, kind in (profile or {}).items():
+        metrics.profile_stage(name, cpu=kind in ("cpu", "both"), memory=kind in ("memory", "both"))
+    metrics.enabled = True
+    return metrics
+
+
+def disable():
+    metrics.enabled = False
+
+
+def is_enabled() -> bool:
+    return metrics.enabled
+
+
+def stage(name: str):
+    """Context manager timing a pipeline stage; a no-op while disabled."""
+    if not metrics.enabled:
+        return _NULL
+    return metrics.stage(name)
+
+
+def incr(name: str, value: float = 1):
+    if metrics.enabled:
+        metrics.incr(name, value)
+
+
+def observe(name: str, value: float):
+    if metrics.enabled:
+        metrics.observe(name, value)
+
+
+def timed_iter(name: str, iterable: Iterable) -> Iterator:
+    """
+    Yield from ``iterable``, recording the total time spent producing items
+    (e.g. spaCy parsing inside ``nlp.pipe``) as one ``name`` stage observation.
+    """
+    if not metrics.enabled:
+        yield from iterable
+        return
+    iterator = iter(iterable)
+    total = 0.0
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                total += time.perf_counter() - start
+            yield item
+    finally:
+        metrics.record_stage(name, total)
+
+
+def snapshot() -> Dict[str, Any]:
+    return metrics.snapshot()
+
+
+def flush() -> Dict[str, Any]:
+    return metrics.flush()
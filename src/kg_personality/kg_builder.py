@@ -1,31 +1,109 @@
 """Knowledge Graph builder utilities with visualization
 """
-from typing import List, Dict, Tuple, Any, Optional
+from typing import List, Dict, Iterable, NamedTuple, Set, Tuple, Any, Optional
+import time
+from bisect import bisect_right
 import networkx as nx
-import spacy
+import numpy as np
 from pathlib import Path
 import json
 
-# Initialize spaCy with custom pipeline
-nlp = spacy.load("en_core_web_sm")
+from . import instrumentation, nlp_registry
+from .context import ContextIndex
+from .personality import PersonalityEstimator
+from .query import GraphQuery, IndexedDiGraph
+from .relations import Mention, RelationEngine, mention_from_span
+from .resolution import EntityResolver
+from .trait_store import TraitStore
+
+
+def __getattr__(name):
+    # Backwards compatible ``kg_builder.nlp``; loaded on first access
+    if name == "nlp":
+        return nlp_registry.get_nlp()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class Contribution(NamedTuple):
+    """What one source document added to the graph."""
+    # entity node -> mentions of it in the document
+    nodes: Dict[str, int]
+    # (src, dst) relationship edges inferred from the document
+    relations: Set[Tuple[str, str]]
 
-# Add custom entity patterns
-ruler = nlp.add_pipe("entity_ruler", before="ner")
-patterns = [
-    {"label": "SKILL", "pattern": [{"LOWER": "python"}]},
-    {"label": "SKILL", "pattern": [{"LOWER": "java"}]},
-    {"label": "SKILL", "pattern": [{"LOWER": "machine"}, {"LOWER": "learning"}]},
-    {"label": "TRAIT", "pattern": [{"LOWER": "creative"}]},
-    {"label": "TRAIT", "pattern": [{"LOWER": "analytical"}]},
-]
-ruler.add_patterns(patterns)
 
 class KGBuilder:
-    def __init__(self):
-        self.graph = nx.DiGraph()
+    def __init__(self, nlp=None, model: str = nlp_registry.DEFAULT_MODEL,
+                 disable: Tuple[str, ...] = (), relation_engine: Optional[RelationEngine] = None,
+                 resolver: Optional[EntityResolver] = None, trait_attributes: bool = True,
+                 estimator: Optional[PersonalityEstimator] = None):
+        """
+        Args:
+            nlp: Optional spaCy pipeline; defaults to the shared registry pipeline
+            model: Registry model name used when ``nlp`` is not given
+            disable: Pipeline components to skip during entity extraction
+            relation_engine: Engine used by :meth:`add_relationships`;
+                document-scoped by default
+            resolver: Optional entity resolver. When set, mentions are merged
+                into one canonical node per (label, normalized text) instead
+                of one ``{source_id}_ent_{i}`` node per mention.
+            trait_attributes: Also write ``trait_<name>`` node attributes in
+                :meth:`merge_personality`. Scores always go to :attr:`traits`;
+                turn this off for large graphs.
+            estimator: Supplies the trait keywords located in each parsed
+                document, so entities can later be scored from their contexts
+        """
+        self.graph = IndexedDiGraph()
+        self.relation_engine = relation_engine or RelationEngine()
+        self.resolver = resolver
+        # source_id -> mentions recorded at build time
+        self.mentions: Dict[str, List[Mention]] = {}
+        # source_id -> nodes and relationship edges the document contributed
+        self.contributions: Dict[str, Contribution] = {}
+        # Relationship edge -> number of documents it was inferred from
+        self._relation_refs: Dict[Tuple[str, str], int] = {}
+        # Character spans of each mention and its sentence, for per-entity scoring
+        self.contexts = ContextIndex()
+        self.estimator = estimator or PersonalityEstimator(nlp=nlp, model=model)
+        # Trait scores of self.graph nodes (nodes x traits float32 matrix)
+        self.traits = TraitStore()
+        self.trait_attributes = trait_attributes
+        self._nlp = nlp
+        self.model = model
+        self.disable = tuple(disable)
+        self.ingest_stats: Dict[str, float] = {}
+        self._query: Optional[GraphQuery] = None
+
+    @property
+    def nlp(self):
+        if self._nlp is None:
+            self._nlp = nlp_registry.get_nlp(self.model)
+        return self._nlp
+
+    def _disabled(self) -> List[str]:
+        return nlp_registry.disabled_for(self.nlp, disable=self.disable)
+
+    @property
+    def query(self) -> GraphQuery:
+        """
+        Indexed queries over :attr:`graph` and :attr:`traits` (see :mod:`.query`).
+
+        The label, relation and trait indexes are built on first access and
+        then kept up to date as the graph and trait store change. A plain
+        ``nx.DiGraph`` assigned to :attr:`graph` is first copied into an
+        :class:`~.query.IndexedDiGraph`.
+        """
+        query = self._query
+        if query is None or query.graph is not self.graph or query.traits is not self.traits:
+            if query is not None:
+                query.detach()
+            if not isinstance(self.graph, IndexedDiGraph):
+                self.graph = IndexedDiGraph(self.graph)
+            query = self._query = GraphQuery(self.graph, self.traits)
+        return query
 
     def extract_entities(self, text: str) -> List[Tuple[str, str]]:
-        doc = nlp(text)
+        doc = self.nlp(text, disable=self._disabled())
         return [(ent.text, ent.label_) for ent in doc.ents]
 
     def add_entity(self, node_id: str, label: str, attrs: Dict[str, Any] = None):
@@ -35,52 +113,327 @@ class KGBuilder:
         self.graph.add_edge(src, dst, type=rel_type, **(attrs or {}))
 
     def build_from_text(self, text: str, source_id: str = "doc"):
-        ents = self.extract_entities(text)
-        for i, (ent_text, ent_label) in enumerate(ents):
-            node_id = f"{source_id}_ent_{i}"
-            self.add_entity(node_id, ent_label, {"text": ent_text})
-            # link to source doc
-            self.add_relation(source_id, node_id, "mentions")
+        with instrumentation.stage("kg.parse"):
+            doc = self.nlp(text, disable=self._disabled())
+        with instrumentation.stage("kg.collect"):
+            nodes: List = []
+            edges: List = []
+            self._collect_doc(doc, source_id, nodes, edges)
+            self._flush(nodes, edges)
+        return self.graph
+
+    def add_analysis(self, analysis):
+        """Add a document from a :class:`~.analysis.DocAnalysis`, reusing its parsed Doc."""
+        return self.build_from_analyses([analysis])
+
+    def build_from_analyses(self, analyses: Iterable, flush_every: int = 50000):
+        """Add many analyzed documents; the graph is written in bulk."""
+        nodes: List = []
+        edges: List = []
+        for analysis in analyses:
+            self._collect_doc(analysis.doc, analysis.source_id, nodes, edges, analysis.trait_hits)
+            if len(nodes) >= flush_every:
+                self._flush(nodes, edges)
+        self._flush(nodes, edges)
+        return self.graph
+
+    def _collect_doc(self, doc, source_id: str, nodes: List, edges: List,
+                     hits: Optional[np.ndarray] = None):
+        """
+        Append a parsed document's entity nodes and ``mentions`` edges for bulk insertion.
+
+        The mention contexts and trait keyword ``hits`` (located in ``doc``
+        when not given) are recorded in :attr:`contexts`.
+        """
+        instrumentation.incr("documents")
+        instrumentation.incr("tokens", len(doc))
+        instrumentation.incr("entities", len(doc.ents))
+        sent_of = _sentence_index(doc)
+        mentions = self.mentions[source_id] = []
+        if self.resolver is None:
+            for i, ent in enumerate(doc.ents):
+                node_id = f"{source_id}_ent_{i}"
+                nodes.append((node_id, {"label": ent.label_, "text": ent.text}))
+                edges.append((source_id, node_id, {"type": "mentions"}))
+                mentions.append(mention_from_span(node_id, ent, sent_of(ent.start)))
+            self._record_contexts(doc, source_id, mentions, hits)
+            self.contributions[source_id] = Contribution({m.node_id: 1 for m in mentions}, set())
+            return
+
+        # Canonical mode: one node per entity, one counted mentions edge per document
+        counts: Dict[str, int] = {}
+        for ent in doc.ents:
+            node_id, is_new = self.resolver.resolve(ent.text, ent.label_)
+            if is_new:
+                nodes.append((node_id, {"label": ent.label_, "text": ent.text, "count": 0}))
+            counts[node_id] = counts.get(node_id, 0) + 1
+            mentions.append(mention_from_span(node_id, ent, sent_of(ent.start)))
+        self._record_contexts(doc, source_id, mentions, hits)
+        self.contributions[source_id] = Contribution(counts, set())
+        for node_id, count in counts.items():
+            edges.append((source_id, node_id, {"type": "mentions", "count": count}))
+
+    def _record_contexts(self, doc, source_id: str, mentions: List[Mention], hits: Optional[np.ndarray]):
+        self.contexts.add_doc(source_id, doc, [m.node_id for m in mentions])
+        self.contexts.set_hits(source_id, self.estimator.trait_hits(doc) if hits is None else hits)
+
+    def build_from_corpus(self, docs: Iterable[Tuple[str, str]], batch_size: int = 256,
+                          n_process: int = 1, flush_every: int = 50000):
+        """
+        Build the graph from many documents using spaCy's batched ``nlp.pipe``.
+
+        Node ids and edges are the same as calling :meth:`build_from_text` once
+        per document, but parsing is batched and graph writes are done in bulk.
+        Throughput is stored in :attr:`ingest_stats`.
+
+        Args:
+            docs: Iterable of ``(source_id, text)`` pairs; consumed lazily
+            batch_size: Number of texts spaCy buffers per batch
+            n_process: Number of spaCy worker processes
+            flush_every: Pending entities written to the graph per bulk insert
+
+        Returns:
+            The updated graph
+        """
+        start = time.perf_counter()
+        n_docs = n_ents = 0
+        nodes: List = []
+        edges: List = []
+        stream = ((text, source_id) for source_id, text in docs)
+        parsed = self.nlp.pipe(stream, as_tuples=True, batch_size=batch_size,
+                               n_process=n_process, disable=self._disabled())
+        with instrumentation.stage("kg.build_from_corpus"):
+            # "kg.parse" gets the time spent inside nlp.pipe
+            for doc, source_id in instrumentation.timed_iter("kg.parse", parsed):
+                n_docs += 1
+                self._collect_doc(doc, source_id, nodes, edges)
+                if len(nodes) >= flush_every:
+                    n_ents += len(nodes)
+                    self._flush(nodes, edges)
+            n_ents += len(nodes)
+            self._flush(nodes, edges)
+
+        elapsed = time.perf_counter() - start
+        self.ingest_stats = {
+            "documents": n_docs,
+            "entities": n_ents,
+            "seconds": elapsed,
+            "docs_per_sec": n_docs / elapsed if elapsed > 0 else 0.0,
+        }
         return self.graph
 
+    def _flush(self, nodes: List, edges: List):
+        instrumentation.incr("edges", len(edges))
+        self.graph.add_nodes_from(nodes)
+        if self.resolver is not None:
+            graph_nodes = self.graph.nodes
+            for _, node_id, attrs in edges:
+                graph_nodes[node_id]["count"] += attrs["count"]
+        self.graph.add_edges_from(edges)
+        nodes.clear()
+        edges.clear()
+
     def merge_personality(self, graph: nx.DiGraph, personality: Dict[str, Dict[str, float]]):
         # personality: {entity_node_id: {trait:score}}
+        personality = {n: traits for n, traits in personality.items() if n in graph}
+        if graph is self.graph:
+            self.traits.update(personality)
+            if not self.trait_attributes:
+                return graph
         for node_id, traits in personality.items():
-            if node_id not in graph:
-                continue
             for trait, score in traits.items():
                 graph.nodes[node_id][f"trait_{trait}"] = float(score)
         return graph
+
+    def merge_trait_matrix(self, node_ids: List[str], scores):
+        """
+        Bulk-merge a (nodes, traits) score array, columns in ``traits.traits`` order.
+
+        Nodes not in the graph are skipped and NaN entries leave a trait unset.
+        ``trait_<name>`` attributes are written only when
+        :attr:`trait_attributes` is set.
+        """
+        keep = [i for i, n in enumerate(node_ids) if n in self.graph]
+        node_ids = [node_ids[i] for i in keep]
+        scores = scores[keep]
+        self.traits.assign(node_ids, scores)
+        if self.trait_attributes:
+            names = [f"trait_{trait}" for trait in self.traits.traits]
+            for node_id, row in zip(node_ids, scores.tolist()):
+                # NaN marks an unset trait
+                self.graph.nodes[node_id].update((k, v) for k, v in zip(names, row) if v == v)
+        return self.graph
+
+    def node_traits(self, node_id: str) -> Dict[str, float]:
+        """Trait scores of a node from the trait store (empty if it has none)."""
+        return self.traits.get(node_id) or {}
     
-    def add_relationships(self):
-        """Add relationship edges between entities based on sentence proximity"""
-        nodes = list(self.graph.nodes())
-        for i, node1 in enumerate(nodes):
-            for node2 in nodes[i+1:]:
-                if node1 == node2 or not (node1.startswith('doc_ent_') and node2.startswith('doc_ent_')):
-                    continue
-                    
-                n1_text = self.graph.nodes[node1].get('text', '')
-                n2_text = self.graph.nodes[node2].get('text', '')
-                n1_label = self.graph.nodes[node1].get('label', '')
-                n2_label = self.graph.nodes[node2].get('label', '')
-                
-                if n1_label == 'PERSON' and n2_label == 'ORG':
-                    self.add_relation(node1, node2, 'works_at')
-                elif n1_label == 'PERSON' and n2_label == 'SKILL':
-                    self.add_relation(node1, node2, 'has_skill')
-                elif n1_label == 'PERSON' and n2_label == 'TRAIT':
-                    self.add_relation(node1, node2, 'exhibits')
-
-    def export_to_html(self, output_path: str):
-        """Export graph visualization to HTML using pyvis"""
+    def add_relationships(self, engine: Optional[RelationEngine] = None,
+                          sources: Optional[Iterable[str]] = None):
+        """
+        Add relationship edges between entities that co-occur within a scope.
+
+        Candidates come from the mentions recorded at build time, one document
+        at a time, so the cost grows with the number of related pairs rather
+        than with the square of the graph size.
+
+        Args:
+            engine: Relation engine to use instead of :attr:`relation_engine`
+            sources: Only infer relations for these source ids (default: all)
+        """
+        engine = engine or self.relation_engine
+        source_ids = list(self.mentions) if sources is None else sources
+        with instrumentation.stage("kg.add_relationships"):
+            for source_id in source_ids:
+                self._set_relations(source_id, engine.infer(self.mentions.get(source_id, ())))
+        return self.graph
+
+    def _set_relations(self, source_id: str, inferred: Iterable[Tuple[str, str, str]]):
+        """
+        Replace the relationship edges attributed to ``source_id``.
+
+        Edges are reference counted across documents and leave the graph when
+        no document infers them any more.
+        """
+        contribution = self.contributions.get(source_id)
+        if contribution is None:
+            contribution = self.contributions[source_id] = Contribution({}, set())
+        new = {}
+        for src, dst, rel_type in inferred:
+            new[(src, dst)] = rel_type
+        for edge in contribution.relations - new.keys():
+            refs = self._relation_refs.pop(edge, 1) - 1
+            if refs > 0:
+                self._relation_refs[edge] = refs
+            elif self.graph.has_edge(*edge):
+                self.graph.remove_edge(*edge)
+        added = new.keys() - contribution.relations
+        for edge in added:
+            self._relation_refs[edge] = self._relation_refs.get(edge, 0) + 1
+        instrumentation.incr("edges", len(added))
+        contribution.relations.clear()
+        contribution.relations.update(new)
+        self.graph.add_edges_from((src, dst, {"type": rel_type})
+                                  for (src, dst), rel_type in new.items())
+
+    def upsert_document(self, source_id: str, text):
+        """
+        Add a document, or replace a previously added one with the same id.
+
+        Only the document's own mentions, ``mentions`` edges, relationship
+        edges (inferred with :attr:`relation_engine`), context spans and
+        keyword hits are touched, so the cost depends on the document rather
+        than the graph. Canonical nodes still mentioned by the new text keep
+        their trait scores.
+
+        Args:
+            source_id: Document id
+            text: Document text, or a :class:`~.analysis.DocAnalysis` whose
+                parsed Doc and keyword hits are reused
+
+        Returns:
+            The updated graph
+        """
+        hits = None
+        if isinstance(text, str):
+            with instrumentation.stage("kg.parse"):
+                doc = self.nlp(text, disable=self._disabled())
+        else:
+            doc, hits = text.doc, text.trait_hits
+        with instrumentation.stage("kg.upsert_document"):
+            stale = self._retract(source_id) if source_id in self.contributions else []
+            nodes: List = []
+            edges: List = []
+            self._collect_doc(doc, source_id, nodes, edges, hits)
+            self._flush(nodes, edges)
+            self._set_relations(source_id, self.relation_engine.infer(self.mentions[source_id]))
+            self._prune(stale)
+        return self.graph
+
+    def remove_document(self, source_id: str):
+        """
+        Remove everything a document contributed.
+
+        Per-document nodes are deleted; canonical nodes lose the document's
+        mention count and are deleted, with their trait scores, once no
+        document mentions them. Relationship edges still inferred from other
+        documents are kept.
+
+        Raises:
+            KeyError: If ``source_id`` was never added
+        """
+        if source_id not in self.contributions:
+            raise KeyError(source_id)
+        with instrumentation.stage("kg.remove_document"):
+            self._prune(self._retract(source_id))
+            if source_id in self.graph and self.graph.degree(source_id) == 0:
+                self.graph.remove_node(source_id)
+        return self.graph
+
+    def _retract(self, source_id: str) -> List[str]:
+        """Undo a document's contribution; returns canonical nodes that may now be unused."""
+        self._set_relations(source_id, ())
+        contribution = self.contributions.pop(source_id)
+        self.mentions.pop(source_id, None)
+        self.contexts.remove(source_id)
+        stale = []
+        for node_id, count in contribution.nodes.items():
+            if node_id not in self.graph:
+                continue
+            if self.resolver is None:
+                self.graph.remove_node(node_id)
+                self.traits.remove(node_id)
+                continue
+            if self.graph.has_edge(source_id, node_id):
+                self.graph.remove_edge(source_id, node_id)
+            attrs = self.graph.nodes[node_id]
+            attrs["count"] = attrs.get("count", 0) - count
+            if attrs["count"] <= 0:
+                stale.append(node_id)
+        return stale
+
+    def _prune(self, node_ids: Iterable[str]):
+        for node_id in node_ids:
+            if node_id in self.graph and self.graph.nodes[node_id].get("count", 0) <= 0:
+                self.graph.remove_node(node_id)
+                self.traits.remove(node_id)
+                self.resolver.discard(node_id)
+
+    def export_to_html(self, output_path: str, streaming: Optional[bool] = None, **options):
+        """
+        Export graph visualization to HTML.
+
+        Small graphs are rendered with pyvis. Graphs with more than
+        ``export.MAX_NODES`` nodes, or any graph when ``streaming`` is True,
+        are streamed to disk by :func:`.export.export_html` instead.
+
+        Args:
+            output_path: HTML file to write
+            streaming: Force (True) or disable (False) the streaming exporter
+            **options: Level-of-detail options for :func:`.export.export_html`
+                (``top_k``, ``collapse``, ``sample``, ``max_nodes``, ...)
+        """
+        from .export import MAX_NODES, export_html
+
+        if streaming is None:
+            streaming = bool(options) or self.graph.number_of_nodes() > MAX_NODES
+        if streaming:
+            with instrumentation.stage("kg.export"):
+                stats = export_html(self.graph, output_path, traits=self.traits, **options)
+            print(f"Graph visualization saved to {output_path} "
+                  f"({stats['nodes']} nodes, {stats['edges']} edges)")
+            return
+        with instrumentation.stage("kg.export"):
+            self._export_pyvis(output_path)
+
+    def _export_pyvis(self, output_path: str):
+        from .export import COLORS, DEFAULT_COLOR
+
         try:
             from pyvis.network import Network
-        except ImportError:
-            print("pyvis not installed. Installing with pip...")
-            import subprocess
-            subprocess.check_call(["pip", "install", "pyvis"])
-            from pyvis.network import Network
+        except ImportError as e:
+            raise ImportError("pyvis is required for the pyvis export; install it with "
+                              "`pip install pyvis` or pass streaming=True") from e
 
         # Create network
         net = Network(height="800px", width="100%", bgcolor="#ffffff", font_color="black")
@@ -92,20 +445,14 @@ class KGBuilder:
             
             # Create tooltip
             title = f"Type: {group}<br>"
-            traits = {k:v for k,v in attrs.items() if k.startswith('trait_')}
+            traits = self.node_traits(node)
             if traits:
                 title += "<br>Personality Traits:<br>"
                 for trait, score in traits.items():
-                    trait_name = trait.replace('trait_', '').capitalize()
-                    title += f"{trait_name}: {score:.2f}<br>"
+                    title += f"{trait.capitalize()}: {score:.2f}<br>"
             
             # Node styling
-            color = {
-                'PERSON': '#4CAF50',
-                'ORG': '#2196F3',
-                'SKILL': '#FFC107',
-                'TRAIT': '#9C27B0'
-            }.get(group, '#607D8B')
+            color = COLORS.get(group, DEFAULT_COLOR)
             
             net.add_node(node, label=label, title=title, color=color)
         
@@ -117,7 +464,285 @@ class KGBuilder:
         # Save
         net.save_graph(output_path)
         print(f"Graph visualization saved to {output_path}")
-        print(f"Graph visualization saved to {output_path}")
+
+    def to_partial(self) -> Dict[str, Any]:
+        """
+        Encode the graph built so far as compact arrays for :meth:`merge_partial`.
+
+        Used by :mod:`.parallel` to ship worker results between processes:
+        entity ids and texts as UTF-8 blobs, labels and relation types
+        interned, and ``mentions``/relationship edges as index arrays tagged
+        with their source document. Each document's recorded mentions,
+        context spans and keyword hits are included so the merged builder can
+        still infer relationships and score contexts.
+        """
+        from .snapshot import encode_strings, intern_values
+
+        graph = self.graph
+        sources = list(self.contributions)
+        source_index = {source_id: i for i, source_id in enumerate(sources)}
+        entity_index: Dict[str, int] = {}
+        for contribution in self.contributions.values():
+            for node_id in contribution.nodes:
+                entity_index.setdefault(node_id, len(entity_index))
+        entities = list(entity_index)
+        labels, label_codes = intern_values([graph.nodes[n].get("label") for n in entities])
+
+        m_doc: List[int] = []
+        m_node: List[int] = []
+        m_count: List[int] = []
+        r_doc: List[int] = []
+        r_src: List[int] = []
+        r_dst: List[int] = []
+        r_types: List[str] = []
+        for source_id, contribution in self.contributions.items():
+            doc = source_index[source_id]
+            for node_id, count in contribution.nodes.items():
+                m_doc.append(doc)
+                m_node.append(entity_index[node_id])
+                m_count.append(count)
+            for u, v in contribution.relations:
+                r_doc.append(doc)
+                r_src.append(entity_index[u])
+                r_dst.append(entity_index[v])
+                r_types.append(graph.edges[u, v].get("type"))
+        relation_types, r_type = intern_values(r_types)
+
+        # Mentions, context spans and keyword hits, grouped by document in source order
+        o_doc: List[int] = []
+        o_node: List[int] = []
+        o_labels: List[str] = []
+        o_tokens: List[Tuple[int, int, int]] = []
+        o_ancestors: List[int] = []
+        o_ancestor_offsets = [0]
+        c_doc: List[int] = []
+        c_node: List[int] = []
+        c_spans = []
+        h_doc: List[int] = []
+        h_hits = []
+        has_context = np.zeros(len(sources), dtype=bool)
+        contexts = self.contexts
+        for source_id in sources:
+            doc = source_index[source_id]
+            for m in self.mentions.get(source_id, ()):
+                o_doc.append(doc)
+                o_node.append(entity_index[m.node_id])
+                o_labels.append(m.label)
+                o_tokens.append((m.sent, m.start, m.end))
+                o_ancestors.extend(m.ancestors)
+                o_ancestor_offsets.append(len(o_ancestors))
+            if source_id not in contexts.spans:
+                continue
+            has_context[doc] = True
+            node_ids = contexts.node_ids[source_id]
+            c_doc.extend([doc] * len(node_ids))
+            c_node.extend(entity_index[n] for n in node_ids)
+            c_spans.append(contexts.spans[source_id])
+            hits = contexts.hits.get(source_id)
+            if hits is not None:
+                h_doc.extend([doc] * len(hits))
+                h_hits.append(hits)
+        occurrence_labels, o_label = intern_values(o_labels)
+
+        source_blob, source_offsets = encode_strings(sources)
+        node_blob, node_offsets = encode_strings(entities)
+        text_blob, text_offsets = encode_strings([str(graph.nodes[n].get("text", "")) for n in entities])
+        return {
+            "labels": labels, "relation_types": relation_types,
+            "source_blob": source_blob, "source_offsets": source_offsets,
+            "node_blob": node_blob, "node_offsets": node_offsets,
+            "text_blob": text_blob, "text_offsets": text_offsets, "node_label": label_codes,
+            "mention_doc": np.asarray(m_doc, dtype=np.int32),
+            "mention_node": np.asarray(m_node, dtype=np.int32),
+            "mention_count": np.asarray(m_count, dtype=np.int32),
+            "relation_doc": np.asarray(r_doc, dtype=np.int32),
+            "relation_src": np.asarray(r_src, dtype=np.int32),
+            "relation_dst": np.asarray(r_dst, dtype=np.int32),
+            "relation_type": r_type,
+            "occurrence_labels": occurrence_labels,
+            "occurrence_doc": np.asarray(o_doc, dtype=np.int32),
+            "occurrence_node": np.asarray(o_node, dtype=np.int32),
+            "occurrence_label": o_label,
+            "occurrence_tokens": np.asarray(o_tokens, dtype=np.int32).reshape(-1, 3),
+            "occurrence_ancestors": np.asarray(o_ancestors, dtype=np.int32),
+            "occurrence_ancestor_offsets": np.asarray(o_ancestor_offsets, dtype=np.int64),
+            "has_context": has_context,
+            "context_doc": np.asarray(c_doc, dtype=np.int32),
+            "context_node": np.asarray(c_node, dtype=np.int32),
+            "context_spans": np.concatenate(c_spans) if c_spans else np.zeros((0, 4), dtype=np.int32),
+            "hit_doc": np.asarray(h_doc, dtype=np.int32),
+            "hits": np.concatenate(h_hits) if h_hits else np.zeros((0, 2), dtype=np.int64),
+        }
+
+    def merge_partial(self, partial: Dict[str, Any]):
+        """
+        Merge a :meth:`to_partial` result into this builder.
+
+        Partials must be merged in document order to reproduce a sequential
+        build. Canonical nodes shared between partials are merged (counts are
+        summed, the first text is kept) and registered with :attr:`resolver`;
+        per-document contributions are rebuilt so :meth:`upsert_document` and
+        :meth:`remove_document` keep working, and :attr:`mentions` and
+        :attr:`contexts` are filled for :meth:`add_relationships` and context
+        scoring. A source id seen in an earlier partial is treated as the same
+        document; its mentions and contexts are replaced.
+        """
+        from .snapshot import decode_strings
+
+        sources = decode_strings(partial["source_blob"], partial["source_offsets"])
+        entities = decode_strings(partial["node_blob"], partial["node_offsets"])
+        texts = decode_strings(partial["text_blob"], partial["text_offsets"])
+        labels = partial["labels"]
+        canonical = self.resolver is not None
+
+        graph = self.graph
+        nodes = []
+        for node_id, text, code in zip(entities, texts, partial["node_label"].tolist()):
+            if node_id in graph:
+                continue
+            attrs = {"label": labels[code] if code >= 0 else None, "text": text}
+            if canonical:
+                attrs["count"] = 0
+                label, _, key = node_id.partition(":")
+                self.resolver.index.setdefault((label, key), node_id)
+            nodes.append((node_id, attrs))
+        graph.add_nodes_from(nodes)
+
+        for source_id in sources:
+            if source_id not in self.contributions:
+                self.contributions[source_id] = Contribution({}, set())
+        edges = []
+        for doc, node, count in zip(partial["mention_doc"].tolist(), partial["mention_node"].tolist(),
+                                    partial["mention_count"].tolist()):
+            source_id, node_id = sources[doc], entities[node]
+            contribution = self.contributions[source_id].nodes
+            contribution[node_id] = contribution.get(node_id, 0) + count
+            if canonical:
+                graph.nodes[node_id]["count"] += count
+                edges.append((source_id, node_id, {"type": "mentions", "count": contribution[node_id]}))
+            else:
+                edges.append((source_id, node_id, {"type": "mentions"}))
+        instrumentation.incr("edges", len(edges))
+        graph.add_edges_from(edges)
+
+        relations: Dict[str, List[Tuple[str, str, str]]] = {}
+        relation_types = partial["relation_types"]
+        for doc, u, v, code in zip(partial["relation_doc"].tolist(), partial["relation_src"].tolist(),
+                                   partial["relation_dst"].tolist(), partial["relation_type"].tolist()):
+            relations.setdefault(sources[doc], []).append(
+                (entities[u], entities[v], relation_types[code] if code >= 0 else None))
+        for source_id, inferred in relations.items():
+            existing = self.contributions[source_id].relations
+            kept = [(u, v, graph.edges[u, v].get("type")) for u, v in existing]
+            self._set_relations(source_id, kept + inferred)
+
+        n_sources = len(sources)
+        bounds = np.arange(n_sources + 1)
+        o_bounds = np.searchsorted(partial["occurrence_doc"], bounds).tolist()
+        c_bounds = np.searchsorted(partial["context_doc"], bounds).tolist()
+        h_bounds = np.searchsorted(partial["hit_doc"], bounds).tolist()
+        occurrence_labels = partial["occurrence_labels"]
+        ancestors = partial["occurrence_ancestors"].tolist()
+        ancestor_offsets = partial["occurrence_ancestor_offsets"].tolist()
+        occurrences = [
+            Mention(entities[node], occurrence_labels[code], sent, start, end,
+                    tuple(ancestors[ancestor_offsets[i]:ancestor_offsets[i + 1]]))
+            for i, (node, code, (sent, start, end)) in enumerate(zip(
+                partial["occurrence_node"].tolist(), partial["occurrence_label"].tolist(),
+                partial["occurrence_tokens"].tolist()))]
+        context_node = partial["context_node"].tolist()
+        context_spans, hits, has_context = partial["context_spans"], partial["hits"], partial["has_context"]
+        for doc, source_id in enumerate(sources):
+            self.mentions[source_id] = occurrences[o_bounds[doc]:o_bounds[doc + 1]]
+            if not has_context[doc]:
+                continue
+            lo, hi = c_bounds[doc], c_bounds[doc + 1]
+            self.contexts.add_spans(source_id, [entities[n] for n in context_node[lo:hi]], context_spans[lo:hi])
+            self.contexts.set_hits(source_id, hits[h_bounds[doc]:h_bounds[doc + 1]])
+        return self.graph
+
+    def save(self, path: str):
+        """
+        Write the graph and trait store to a binary snapshot (see :mod:`.snapshot`).
+
+        Node ``label``/``text``/``count``, edge ``type``/``count`` and trait
+        scores are persisted; mention and context indexes are not (per-document
+        contributions are recovered from the edges by :meth:`load`).
+        """
+        from .snapshot import write_snapshot
+
+        with instrumentation.stage("kg.save"):
+            write_snapshot(self.graph, path, self.traits)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True, **kwargs) -> "KGBuilder":
+        """
+        Rebuild a ``KGBuilder`` from a snapshot written by :meth:`save`.
+
+        This materializes the networkx graph. For read-only access that opens
+        in milliseconds and shares pages across worker processes, use
+        ``GraphSnapshot.open(path)`` directly. Per-document contributions are
+        rebuilt from the ``mentions`` edges so :meth:`upsert_document` and
+        :meth:`remove_document` work on the loaded graph; the mention and
+        context indexes are only filled again for documents upserted later.
+
+        Args:
+            path: Snapshot file
+            mmap: Memory-map the file instead of reading it into memory
+            **kwargs: Passed to the ``KGBuilder`` constructor
+        """
+        from .snapshot import GraphSnapshot
+
+        snapshot = GraphSnapshot.open(path, mmap_mode=mmap)
+        kg = cls(**kwargs)
+        kg.graph = snapshot.to_graph(create_using=IndexedDiGraph)
+        if kg.resolver is not None:
+            # Register canonical "label:key" nodes so later mentions resolve to them
+            for node_id, label in kg.graph.nodes(data="label"):
+                prefix, _, key = node_id.partition(":")
+                if label is not None and prefix == label:
+                    kg.resolver.index.setdefault((label, key), node_id)
+        kg._restore_contributions()
+        node_ids, scores = snapshot.trait_rows()
+        if node_ids:
+            kg.merge_trait_matrix(node_ids, scores)
+        return kg
+
+    def _restore_contributions(self):
+        """
+        Rebuild :attr:`contributions` and relationship reference counts from the graph.
+
+        A document's nodes are the targets of its ``mentions`` edges (with
+        their ``count``, 1 for per-mention nodes). Each relationship edge is
+        attributed to every document mentioning both of its ends, which is
+        exact for the document-scoped engine and a superset otherwise.
+        """
+        graph = self.graph
+        mentioned_by: Dict[str, List[str]] = {}
+        for source_id, node_id, attrs in graph.edges(data=True):
+            if attrs.get("type") != "mentions":
+                continue
+            contribution = self.contributions.get(source_id)
+            if contribution is None:
+                contribution = self.contributions[source_id] = Contribution({}, set())
+            contribution.nodes[node_id] = attrs.get("count", 1)
+            mentioned_by.setdefault(node_id, []).append(source_id)
+        for u, v, rel_type in graph.edges(data="type"):
+            if rel_type == "mentions" or u not in mentioned_by or v not in mentioned_by:
+                continue
+            sources = set(mentioned_by[u]).intersection(mentioned_by[v])
+            for source_id in sources:
+                self.contributions[source_id].relations.add((u, v))
+            if sources:
+                self._relation_refs[(u, v)] = len(sources)
 
     def to_edge_list(self) -> List[Tuple[str, str, Dict[str, Any]]]:
         return [(u, v, d) for u, v, d in self.graph.edges(data=True)]
+
+
+def _sentence_index(doc):
+    """Return a function mapping a token index to its sentence number."""
+    if not (doc.has_annotation("SENT_START") or doc.has_annotation("DEP")):
+        return lambda i: 0
+    starts = [sent.start for sent in doc.sents]
+    return lambda i: bisect_right(starts, i) - 1
@@ -0,0 +1,283 @@
+"""Lexicon-driven entity recognition with a compiled, serializable token trie
+"""
+import hashlib
+import json
+import os
+import warnings
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import spacy
+from spacy.language import Language
+from spacy.tokens import Span
+
+LEXICON_DIR = Path(__file__).resolve().parent / "lexicons"
+# label -> term list files shipped with the package
+DEFAULT_LEXICONS = {"SKILL": [LEXICON_DIR / "skill.txt"], "TRAIT": [LEXICON_DIR / "trait.txt"]}
+FORMAT_VERSION = 1
+# Transition keys are ``state << _SHIFT | token id``
+_SHIFT = 32
+
+Lexicons = Union[Dict[str, Union[str, Path, Sequence[Union[str, Path]]]], Sequence[Union[str, Path]], str, Path]
+
+
+def read_terms(path: Union[str, Path]) -> List[str]:
+    """Terms of a lexicon file: one per line, blank lines and ``#`` comments skipped."""
+    with open(path, encoding="utf-8") as f:
+        return [term for term in (line.strip() for line in f) if term and not term.startswith("#")]
+
+
+def lexicon_files(lexicons: Lexicons) -> Dict[str, List[Path]]:
+    """
+    Normalize a lexicon specification to ``{label: [files]}``.
+
+    Args:
+        lexicons: ``{label: file or files}``, or files / a directory whose
+            ``*.txt`` files are labelled by their upper-cased stem
+            (``skill.txt`` -> ``SKILL``)
+    """
+    if isinstance(lexicons, dict):
+        return {label: [Path(p) for p in ([paths] if isinstance(paths, (str, Path)) else paths)]
+                for label, paths in lexicons.items()}
+    paths = [Path(lexicons)] if isinstance(lexicons, (str, Path)) else [Path(p) for p in lexicons]
+    files: Dict[str, List[Path]] = {}
+    for path in paths:
+        for file in (sorted(path.glob("*.txt")) if path.is_dir() else [path]):
+            files.setdefault(file.stem.upper(), []).append(file)
+    return files
+
+
+def fingerprint(nlp, files: Dict[str, List[Path]], attr: str) -> str:
+    """Hash of everything a compiled matcher depends on: file contents, labels, attr, tokenizer."""
+    digest = hashlib.sha256(json.dumps([FORMAT_VERSION, attr, nlp.lang, spacy.__version__]).encode("utf-8"))
+    for label in sorted(files):
+        for path in files[label]:
+            digest.update(label.encode("utf-8") + b"\0")
+            digest.update(Path(path).read_bytes() + b"\0")
+    return digest.hexdigest()
+
+
+class LexiconMatcher:
+    def __init__(self, attr: str = "LOWER"):
+        """
+        Longest-match phrase matcher over token attribute hashes.
+
+        Terms are tokenized once and compiled into a trie whose transitions
+        live in one flat dict keyed by ``(state, token id)``. A match can
+        only start at a token that begins some term, so those positions are
+        found with one vectorized lookup and the trie is only walked from
+        there; matching cost does not grow with the number of terms.
+
+        Args:
+            attr: Token attribute compared (``"LOWER"`` for case-insensitive,
+                ``"ORTH"`` for exact)
+        """
+        self.attr = attr
+        self.labels: List[str] = []
+        # attribute hash -> token id (ids start at 1; 0 means "not in any term")
+        self.token_ids: Dict[int, int] = {}
+        # (state << _SHIFT | token id) -> next state; state 0 is the root
+        self.transitions: Dict[int, int] = {}
+        # Label index of the term ending in each state, -1 if none
+        self.state_labels: List[int] = [-1]
+        self.fingerprint = ""
+        self.n_terms = 0
+        self._finalize()
+
+    def __len__(self) -> int:
+        return self.n_terms
+
+    def add(self, label: str, terms: Iterable[str], nlp):
+        """Tokenize ``terms`` with ``nlp``'s tokenizer and add them under ``label``."""
+        if label not in self.labels:
+            self.labels.append(label)
+        label_index = self.labels.index(label)
+        token_ids, transitions, state_labels = self.token_ids, self.transitions, self.state_labels
+        for doc in nlp.tokenizer.pipe(terms, batch_size=1000):
+            if not len(doc):
+                continue
+            state = 0
+            for value in doc.to_array(self.attr).tolist():
+                token = token_ids.setdefault(value, len(token_ids) + 1)
+                key = state << _SHIFT | token
+                target = transitions.get(key)
+                if target is None:
+                    target = transitions[key] = len(state_labels)
+                    state_labels.append(-1)
+                state = target
+            # The first label added for a term wins
+            if state_labels[state] < 0:
+                state_labels[state] = label_index
+                self.n_terms += 1
+        self._finalize()
+
+    def _finalize(self):
+        """Rebuild the arrays used to map a doc's tokens to ids in one step."""
+        hashes = np.fromiter(self.token_ids.keys(), dtype=np.uint64, count=len(self.token_ids))
+        ids = np.fromiter(self.token_ids.values(), dtype=np.int64, count=len(self.token_ids))
+        order = np.argsort(hashes)
+        self._hashes, self._ids = hashes[order], ids[order]
+        # Token ids that have a transition out of the root
+        self._first = np.zeros(len(self.token_ids) + 1, dtype=bool)
+        mask = (1 << _SHIFT) - 1
+        self._first[[key & mask for key in self.transitions if key >> _SHIFT == 0]] = True
+
+    @classmethod
+    def compile(cls, nlp, lexicons: Lexicons = None, attr: str = "LOWER") -> "LexiconMatcher":
+        """
+        Build a matcher from lexicon files (see :func:`lexicon_files`).
+
+        Args:
+            nlp: Pipeline whose tokenizer splits the terms (must match the
+                pipeline the matcher runs in)
+            lexicons: Lexicon files; ``DEFAULT_LEXICONS`` if omitted
+            attr: Token attribute to match on
+        """
+        files = lexicon_files(DEFAULT_LEXICONS if lexicons is None else lexicons)
+        matcher = cls(attr)
+        for label, paths in files.items():
+            for path in paths:
+                matcher.add(label, read_terms(path), nlp)
+        matcher.fingerprint = fingerprint(nlp, files, attr)
+        return matcher
+
+    @classmethod
+    def load_or_compile(cls, nlp, lexicons: Lexicons = None, cache: Optional[Union[str, Path]] = None,
+                        attr: str = "LOWER") -> "LexiconMatcher":
+        """
+        Load a compiled matcher from ``cache`` if it was built from the same
+        lexicon contents, tokenizer and attribute; otherwise compile it and
+        write the cache.
+        """
+        files = lexicon_files(DEFAULT_LEXICONS if lexicons is None else lexicons)
+        if cache is not None and Path(cache).exists():
+            expected = fingerprint(nlp, files, attr)
+            try:
+                matcher = cls.load(cache)
+            except (OSError, ValueError, KeyError) as e:
+                warnings.warn(f"Ignoring unreadable lexicon cache {cache}: {e}")
+            else:
+                if matcher.fingerprint == expected:
+                    return matcher
+        matcher = cls.compile(nlp, files, attr)
+        if cache is not None:
+            matcher.save(cache)
+        return matcher
+
+    def save(self, path: Union[str, Path]):
+        """Write the compiled trie as plain arrays (``.npz``, no pickle)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {"version": FORMAT_VERSION, "attr": self.attr, "fingerprint": self.fingerprint,
+                "labels": self.labels, "terms": self.n_terms}
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, meta=np.array(json.dumps(meta)),
+                     hashes=np.fromiter(self.token_ids.keys(), dtype=np.uint64, count=len(self.token_ids)),
+                     ids=np.fromiter(self.token_ids.values(), dtype=np.int64, count=len(self.token_ids)),
+                     keys=np.fromiter(self.transitions.keys(), dtype=np.int64, count=len(self.transitions)),
+                     targets=np.fromiter(self.transitions.values(), dtype=np.int64, count=len(self.transitions)),
+                     state_labels=np.asarray(self.state_labels, dtype=np.int32))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "LexiconMatcher":
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta["version"] != FORMAT_VERSION:
+                raise ValueError(f"Unsupported lexicon format version {meta['version']}")
+            matcher = cls(meta["attr"])
+            matcher.labels = meta["labels"]
+            matcher.fingerprint = meta["fingerprint"]
+            matcher.n_terms = meta["terms"]
+            matcher.token_ids = dict(zip(data["hashes"].tolist(), data["ids"].tolist()))
+            matcher.transitions = dict(zip(data["keys"].tolist(), data["targets"].tolist()))
+            matcher.state_labels = data["state_labels"].tolist()
+        matcher._finalize()
+        return matcher
+
+    def find(self, doc) -> List[Tuple[int, int, str]]:
+        """
+        Leftmost-longest, non-overlapping matches in ``doc``.
+
+        Returns:
+            ``(start token, end token, label)`` triples in document order
+        """
+        n = len(doc)
+        if not n or not self.token_ids:
+            return []
+        values = doc.to_array(self.attr)
+        pos = np.minimum(np.searchsorted(self._hashes, values), len(self._hashes) - 1)
+        ids = np.where(self._hashes[pos] == values, self._ids[pos], 0)
+        starts = np.flatnonzero(self._first[ids])
+        if not len(starts):
+            return []
+        ids = ids.tolist()
+        transitions, state_labels, labels = self.transitions, self.state_labels, self.labels
+        matches = []
+        covered = 0
+        for i in starts.tolist():
+            if i < covered:
+                continue
+            state, j, best = 0, i, None
+            while j < n:
+                state = transitions.get(state << _SHIFT | ids[j])
+                if state is None:
+                    break
+                j += 1
+                if state_labels[state] >= 0:
+                    best = j
+                    label = state_labels[state]
+            if best is not None:
+                matches.append((i, best, labels[label]))
+                covered = best
+        return matches
+
+
+class LexiconRuler:
+    def __init__(self, nlp, name: str = "lexicon_ruler", attr: str = "LOWER", overwrite_ents: bool = False):
+        """
+        Pipeline component adding :class:`LexiconMatcher` matches to ``doc.ents``.
+
+        Use :func:`~.nlp_registry.add_lexicon_ruler` to add it with a
+        compiled (or cached) matcher.
+
+        Args:
+            overwrite_ents: Let lexicon matches replace overlapping entities
+                set by earlier components (otherwise they are dropped)
+        """
+        self.name = name
+        self.overwrite_ents = overwrite_ents
+        self.matcher = LexiconMatcher(attr)
+
+    def __len__(self) -> int:
+        return len(self.matcher)
+
+    def __call__(self, doc):
+        matches = self.matcher.find(doc)
+        if not matches:
+            return doc
+        spans = [Span(doc, start, end, label=label) for start, end, label in matches]
+        existing = list(doc.ents)
+        keep, other = (spans, existing) if self.overwrite_ents else (existing, spans)
+        taken = np.zeros(len(doc), dtype=bool)
+        for span in keep:
+            taken[span.start:span.end] = True
+        merged = keep + [span for span in other if not taken[span.start:span.end].any()]
+        doc.ents = sorted(merged, key=lambda span: span.start)
+        return doc
+
+    def to_disk(self, path, exclude=()):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        self.matcher.save(path / "matcher.npz")
+
+    def from_disk(self, path, exclude=()):
+        self.matcher = LexiconMatcher.load(Path(path) / "matcher.npz")
+        return self
+
+
+@Language.factory("lexicon_ruler", default_config={"attr": "LOWER", "overwrite_ents": False})
+def make_lexicon_ruler(nlp, name: str, attr: str, overwrite_ents: bool):
+    return LexiconRuler(nlp, name, attr, overwrite_ents)
@@ -0,0 +1,172 @@
+"""
+Persistent, content-addressed cache for LLM trait scores.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+_WS = re.compile(r"\s+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+)
+"""
+
+
+def cache_key(text: str, model: str, temperature: float, prompt_version: str) -> str:
+    """SHA-256 over the whitespace-normalized text and every input that changes the reply."""
+    normalized = _WS.sub(" ", text).strip()
+    payload = json.dumps([normalized, model, temperature, prompt_version], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TraitScoreCache:
+    def __init__(self, path: str = ".kg_llm_cache.sqlite", memory_items: int = 4096,
+                 max_entries: Optional[int] = 1_000_000, ttl: Optional[float] = None):
+        """
+        SQLite-backed trait score cache with an in-memory LRU in front.
+
+        Safe to share between threads and between worker processes using the
+        same file: the database runs in WAL mode and each process opens its
+        own connection.
+
+        Args:
+            path: SQLite database file
+            memory_items: Entries kept in the in-process LRU (0 disables it)
+            max_entries: Maximum rows on disk; least recently used rows are
+                evicted beyond this. ``None`` for unbounded.
+            ttl: Seconds an entry stays valid; ``None`` never expires
+        """
+        self.path = str(Path(path))
+        self.memory_items = memory_items
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._puts_since_evict = 0
+        self.counters = {"hits": 0, "memory_hits": 0, "misses": 0,
+                         "stores": 0, "evictions": 0, "expired": 0}
+
+    def __getstate__(self):
+        # Picklable for worker processes: drop the lock, connection and LRU
+        state = self.__dict__.copy()
+        state.update(_lock=None, _conn=None, _pid=None, _memory=OrderedDict())
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        # Connections must not cross fork(); reopen in child processes
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(_SCHEMA)
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl is not None and now - created > self.ttl
+
+    def _remember(self, key: str, scores: Dict[str, float], created: float):
+        if self.memory_items <= 0:
+            return
+        self._memory[key] = (scores, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Dict[str, float]]:
+        """Return cached scores for ``key`` or ``None`` on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if not self._expired(entry[1], now):
+                    self._memory.move_to_end(key)
+                    self.counters["hits"] += 1
+                    self.counters["memory_hits"] += 1
+                    return dict(entry[0])
+                del self._memory[key]
+
+            db = self._db()
+            row = db.execute("SELECT value, created FROM scores WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.counters["misses"] += 1
+                return None
+            value, created = row
+            if self._expired(created, now):
+                db.execute("DELETE FROM scores WHERE key = ?", (key,))
+                self.counters["expired"] += 1
+                self.counters["misses"] += 1
+                return None
+            db.execute("UPDATE scores SET accessed = ? WHERE key = ?", (now, key))
+            scores = json.loads(value)
+            self._remember(key, scores, created)
+            self.counters["hits"] += 1
+            return dict(scores)
+
+    def put(self, key: str, scores: Dict[str, float]):
+        """Store parsed scores under ``key``."""
+        now = time.time()
+        value = json.dumps(scores)
+        with self._lock:
+            self._db().execute(
+                "INSERT OR REPLACE INTO scores (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, value, now, now))
+            self._remember(key, dict(scores), now)
+            self.counters["stores"] += 1
+            self._puts_since_evict += 1
+            if self.max_entries is not None and self._puts_since_evict >= max(1, self.max_entries // 100):
+                self._evict()
+
+    def _evict(self):
+        """Drop expired rows, then least recently used rows above ``max_entries``."""
+        db = self._db()
+        self._puts_since_evict = 0
+        if self.ttl is not None:
+            cur = db.execute("DELETE FROM scores WHERE created < ?", (time.time() - self.ttl,))
+            self.counters["expired"] += cur.rowcount
+        excess = db.execute("SELECT COUNT(*) FROM scores").fetchone()[0] - self.max_entries
+        if excess > 0:
+            cur = db.execute("DELETE FROM scores WHERE key IN "
+                             "(SELECT key FROM scores ORDER BY accessed LIMIT ?)", (excess,))
+            self.counters["evictions"] += cur.rowcount
+            self._memory.clear()
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {**self.counters, "hit_rate": self.counters["hits"] / lookups if lookups else 0.0}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db().execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._db().execute("DELETE FROM scores")
+            self._memory.clear()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
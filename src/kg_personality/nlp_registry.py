@@ -0,0 +1,137 @@
+"""Process-wide registry of shared spaCy pipelines
+"""
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+DEFAULT_MODEL = "en_core_web_sm"
+
+# Custom entity patterns added to every pipeline loaded through the registry
+ENTITY_PATTERNS = [
+    {"label": "SKILL", "pattern": [{"LOWER": "python"}]},
+    {"label": "SKILL", "pattern": [{"LOWER": "java"}]},
+    {"label": "SKILL", "pattern": [{"LOWER": "machine"}, {"LOWER": "learning"}]},
+    {"label": "TRAIT", "pattern": [{"LOWER": "creative"}]},
+    {"label": "TRAIT", "pattern": [{"LOWER": "analytical"}]},
+]
+
+_lock = threading.Lock()
+_pipelines: Dict[str, Any] = {}
+
+
+def add_entity_ruler(nlp, patterns: Optional[List[Dict[str, Any]]] = None):
+    """Add the custom ``entity_ruler`` to a pipeline unless it already has one."""
+    if "entity_ruler" in nlp.pipe_names:
+        return nlp.get_pipe("entity_ruler")
+    if "ner" in nlp.pipe_names:
+        ruler = nlp.add_pipe("entity_ruler", before="ner")
+    else:
+        ruler = nlp.add_pipe("entity_ruler")
+    ruler.add_patterns(patterns or ENTITY_PATTERNS)
+    return ruler
+
+
+def add_lexicon_ruler(nlp, lexicons=None, cache: Optional[str] = None, attr: str = "LOWER"):
+    """
+    Add a ``lexicon_ruler`` matching SKILL/TRAIT (or other) term lists unless
+    the pipeline already has one.
+
+    Args:
+        nlp: Pipeline to extend
+        lexicons: Term list files (see :func:`~.lexicon.lexicon_files`);
+            the packaged SKILL/TRAIT lexicons if omitted
+        cache: Path of the compiled matcher; reused while the lexicon files
+            are unchanged, so large lexicons are only tokenized once
+        attr: Token attribute to match on
+
+    Returns:
+        The ``LexiconRuler`` component
+    """
+    if "lexicon_ruler" in nlp.pipe_names:
+        return nlp.get_pipe("lexicon_ruler")
+    from .lexicon import LexiconMatcher
+
+    matcher = LexiconMatcher.load_or_compile(nlp, lexicons, cache, attr)
+    if "ner" in nlp.pipe_names:
+        ruler = nlp.add_pipe("lexicon_ruler", before="ner", config={"attr": attr})
+    else:
+        ruler = nlp.add_pipe("lexicon_ruler", config={"attr": attr})
+    ruler.matcher = matcher
+    return ruler
+
+
+def _load(model: str):
+    import spacy
+
+    nlp = spacy.load(model)
+    add_entity_ruler(nlp)
+    add_lexicon_ruler(nlp)
+    return nlp
+
+
+def get_nlp(model: str = DEFAULT_MODEL):
+    """
+    Return the shared pipeline for ``model``, loading it on first use.
+
+    The pipeline is loaded once per process and the custom entity and
+    lexicon rulers are added at load time. Callers that only need some components should pass
+    ``disable`` to ``nlp(...)`` / ``nlp.pipe(...)`` (see :func:`disabled_for`)
+    rather than loading a reduced copy.
+
+    Args:
+        model: spaCy package name or path
+
+    Returns:
+        Shared ``spacy.language.Language`` object
+    """
+    nlp = _pipelines.get(model)
+    if nlp is None:
+        with _lock:
+            nlp = _pipelines.get(model)
+            if nlp is None:
+                nlp = _load(model)
+                _pipelines[model] = nlp
+    return nlp
+
+
+def register(nlp, model: str = DEFAULT_MODEL):
+    """Install an already built pipeline under ``model`` (custom or test pipelines)."""
+    with _lock:
+        _pipelines[model] = nlp
+    return nlp
+
+
+def is_loaded(model: str = DEFAULT_MODEL) -> bool:
+    return model in _pipelines
+
+
+def clear():
+    """Drop all cached pipelines so the next :func:`get_nlp` call reloads."""
+    with _lock:
+        _pipelines.clear()
+
+
+def disabled_for(nlp, enable: Optional[Iterable[str]] = None,
+                 disable: Iterable[str] = ()) -> List[str]:
+    """
+    Translate a component selection into a ``disable`` list for ``nlp``.
+
+    Args:
+        nlp: Pipeline the selection applies to
+        enable: Components to keep; all others are disabled. ``None`` keeps all.
+        disable: Components to disable in addition
+
+    Returns:
+        Names of pipeline components to pass as ``disable``
+    """
+    disable = set(disable)
+    if enable is not None:
+        enable = set(enable)
+        disable.update(name for name in nlp.pipe_names if name not in enable)
+    # Keep shared embedding layers (tok2vec) that an enabled component listens to
+    for name in list(disable):
+        if name not in nlp.pipe_names:
+            continue
+        listeners = getattr(nlp.get_pipe(name), "listening_components", ())
+        if any(listener not in disable for listener in listeners):
+            disable.discard(name)
+    return [name for name in nlp.pipe_names if name in disable]
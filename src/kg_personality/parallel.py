@@ -0,0 +1,186 @@
+"""Process-pool graph building: parse shards in workers, merge compact partials
+"""
+import collections
+import itertools
+import multiprocessing
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from . import instrumentation, nlp_registry
+from .analysis import DocumentAnalyzer
+from .kg_builder import KGBuilder
+from .personality import PersonalityEstimator
+from .relations import RelationEngine
+from .resolution import EntityResolver
+from .snapshot import decode_strings, encode_strings
+
+# Per-process state set up once by _init_worker
+_worker: Dict[str, Any] = {}
+
+
+def _shards(docs: Iterable[Tuple[str, str]], shard_size: int) -> Iterator[List[Tuple[str, str]]]:
+    iterator = iter(docs)
+    while True:
+        shard = list(itertools.islice(iterator, shard_size))
+        if not shard:
+            return
+        yield shard
+
+
+def _init_worker(settings: Dict[str, Any], nlp=None):
+    """Load the spaCy pipeline once per worker process (``nlp`` is used as is when given)."""
+    if nlp is None:
+        factory = settings["nlp_factory"]
+        nlp = factory() if factory is not None else nlp_registry.get_nlp(settings["model"])
+    _worker.update(settings)
+    _worker["nlp"] = nlp
+    _worker["estimator"] = PersonalityEstimator(nlp=nlp)
+
+
+def _build_shard(docs: List[Tuple[str, str]]) -> Dict[str, Any]:
+    """Build one shard and return it as arrays (see :meth:`KGBuilder.to_partial`)."""
+    nlp = _worker["nlp"]
+    resolver = None
+    if _worker["canonical"]:
+        resolver = EntityResolver()
+        resolver.aliases = dict(_worker["aliases"])
+    kg = KGBuilder(nlp=nlp, relation_engine=_worker["relation_engine"], resolver=resolver,
+                   trait_attributes=False)
+    batch_size = _worker["batch_size"]
+    if _worker["score_traits"]:
+        analyzer = DocumentAnalyzer(estimator=_worker["estimator"], nlp=nlp)
+        kg.build_from_analyses(analyzer.analyze_corpus(docs, batch_size=batch_size))
+    else:
+        kg.build_from_corpus(docs, batch_size=batch_size)
+    kg.add_relationships()
+
+    partial = kg.to_partial()
+    partial["documents"] = len(docs)
+    if _worker["score_traits"]:
+        node_ids, counts = _worker["estimator"].context_count_matrix(kg.contexts)
+        partial["trait_blob"], partial["trait_offsets"] = encode_strings(node_ids)
+        partial["trait_counts"] = counts
+    return partial
+
+
+def build_parallel(docs: Iterable[Tuple[str, str]], processes: Optional[int] = None,
+                   shard_size: int = 2000, model: str = nlp_registry.DEFAULT_MODEL,
+                   nlp_factory: Optional[Callable[[], Any]] = None,
+                   resolver: Optional[EntityResolver] = None,
+                   relation_engine: Optional[RelationEngine] = None,
+                   score_traits: bool = True, batch_size: int = 256,
+                   kg: Optional[KGBuilder] = None) -> KGBuilder:
+    """
+    Build a knowledge graph from ``(source_id, text)`` pairs on a process pool.
+
+    Documents are cut into shards of ``shard_size``; each worker parses its
+    shard with its own spaCy pipeline, builds a local graph with relationship
+    edges and (with ``score_traits``) raw context keyword counts, and returns
+    them as numpy arrays. The parent merges partials in document order, so
+    node ids, edges and trait scores match a sequential
+    ``build_from_analyses`` + ``add_relationships`` +
+    ``context_score_matrix`` run. At most ``2 * processes`` shards are in
+    flight, so ``docs`` may be a lazy stream of any length.
+
+    The partials carry each document's mentions, context spans and keyword
+    hits, so :meth:`KGBuilder.add_relationships`, context scoring,
+    :meth:`KGBuilder.upsert_document` and :meth:`KGBuilder.remove_document`
+    work on the result as after a sequential build.
+
+    Args:
+        docs: Iterable of ``(source_id, text)`` pairs
+        processes: Worker processes (default: CPU count); ``1`` builds
+            in-process with ``kg``'s pipeline unless ``nlp_factory`` is given
+        shard_size: Documents per worker task
+        model: Registry model loaded by each worker when ``nlp_factory`` is not given
+        nlp_factory: Picklable zero-argument callable returning the pipeline
+            to use in each worker
+        resolver: Entity resolver enabling canonical nodes; its aliases are
+            shipped to the workers and its index is filled by the merge
+        relation_engine: Engine for relationship edges (default: ``kg``'s
+            engine, or document scope for a new builder)
+        score_traits: Score entities from their mention contexts
+        batch_size: Number of texts spaCy buffers per batch
+        kg: Builder to merge into (default: a new ``KGBuilder``)
+
+    Returns:
+        The builder; throughput is stored in :attr:`KGBuilder.ingest_stats`
+    """
+    processes = processes or os.cpu_count() or 1
+    if relation_engine is None:
+        relation_engine = kg.relation_engine if kg is not None else RelationEngine()
+    if kg is None:
+        kg = KGBuilder(model=model, relation_engine=relation_engine, resolver=resolver,
+                       trait_attributes=False)
+    settings = {
+        "model": model,
+        "nlp_factory": nlp_factory,
+        "canonical": kg.resolver is not None,
+        "aliases": dict(kg.resolver.aliases) if kg.resolver is not None else {},
+        "relation_engine": relation_engine,
+        "score_traits": score_traits,
+        "batch_size": batch_size,
+    }
+
+    start = time.perf_counter()
+    n_docs = n_shards = n_bytes = 0
+    trait_rows: Dict[str, int] = {}
+    trait_chunks = []
+    with instrumentation.stage("kg.build_parallel"):
+        nlp = kg.nlp if processes <= 1 and nlp_factory is None else None
+        for partial in _map_shards(_shards(docs, shard_size), settings, processes, nlp):
+            n_docs += partial["documents"]
+            n_shards += 1
+            n_bytes += sum(v.nbytes for v in partial.values() if isinstance(v, np.ndarray))
+            with instrumentation.stage("kg.merge_partial"):
+                kg.merge_partial(partial)
+            if score_traits:
+                node_ids = decode_strings(partial["trait_blob"], partial["trait_offsets"])
+                rows = [trait_rows.setdefault(n, len(trait_rows)) for n in node_ids]
+                trait_chunks.append((np.asarray(rows, dtype=np.int64), partial["trait_counts"]))
+
+        if trait_rows:
+            counts = np.zeros((len(trait_rows), trait_chunks[0][1].shape[1]), dtype=np.int64)
+            for rows, chunk in trait_chunks:
+                np.add.at(counts, rows, chunk)
+            kg.merge_trait_matrix(list(trait_rows), PersonalityEstimator.normalize_counts(counts))
+
+    elapsed = time.perf_counter() - start
+    kg.ingest_stats = {
+        "documents": n_docs,
+        "shards": n_shards,
+        "processes": processes,
+        "partial_bytes": n_bytes,
+        "seconds": elapsed,
+        "docs_per_sec": n_docs / elapsed if elapsed > 0 else 0.0,
+    }
+    return kg
+
+
+def _map_shards(shards: Iterator[List[Tuple[str, str]]], settings: Dict[str, Any],
+                processes: int, nlp=None) -> Iterator[Dict[str, Any]]:
+    """
+    Yield shard partials in input order, keeping at most ``2 * processes`` in flight.
+
+    With one process the shards are built in-process, with ``nlp`` if given.
+    """
+    if processes <= 1:
+        _init_worker(settings, nlp)
+        try:
+            for shard in shards:
+                yield _build_shard(shard)
+        finally:
+            _worker.clear()
+        return
+
+    with multiprocessing.Pool(processes, initializer=_init_worker, initargs=(settings,)) as pool:
+        pending = collections.deque()
+        for shard in shards:
+            pending.append(pool.apply_async(_build_shard, (shard,)))
+            if len(pending) >= 2 * processes:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
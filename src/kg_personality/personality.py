@@ -1,15 +1,28 @@
 """Personality extraction utilities
 """
-from typing import Dict, List
-import spacy
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from . import instrumentation, nlp_registry
 
 TRAITS = ["openness", "conscientiousness", "extraversion", "agreeableness", "neuroticism"]
 
 class PersonalityEstimator:
-    def __init__(self):
-        """Initialize the personality estimator."""
-        self.nlp = spacy.load("en_core_web_sm")
-        
+    def __init__(self, nlp=None, model: str = nlp_registry.DEFAULT_MODEL,
+                 disable: Tuple[str, ...] = ("parser", "ner", "entity_ruler", "lexicon_ruler")):
+        """
+        Initialize the personality estimator.
+
+        Args:
+            nlp: Optional spaCy pipeline; defaults to the shared registry pipeline
+            model: Registry model name used when ``nlp`` is not given
+            disable: Pipeline components skipped while scoring; only lemmas are needed
+        """
+        self._nlp = nlp
+        self.model = model
+        self.disable = tuple(disable)
+
         # Define trait keywords
         self.trait_keywords = {
             "openness": ["creative", "innovative", "curious", "artistic", "imaginative"],
@@ -18,7 +31,15 @@ class PersonalityEstimator:
             "agreeableness": ["cooperative", "compassionate", "helpful", "sympathetic", "kind"],
             "neuroticism": ["anxious", "tense", "worried", "nervous", "stressed"]
         }
-    
+        self._lemma_index = None
+        self._compiled_from = None
+
+    @property
+    def nlp(self):
+        if self._nlp is None:
+            self._nlp = nlp_registry.get_nlp(self.model)
+        return self._nlp
+
     def estimate_traits(self, text: str) -> Dict[str, float]:
         """
         Estimate personality traits from text using keyword analysis.
@@ -29,7 +50,10 @@ class PersonalityEstimator:
         Returns:
             Dictionary of trait scores (0-1)
         """
-        doc = self.nlp(text.lower())
+        disable = nlp_registry.disabled_for(self.nlp, disable=self.disable)
+        with instrumentation.stage("traits.parse"):
+            doc = self.nlp(text.lower(), disable=disable)
+        instrumentation.incr("trait_texts")
         
         # Count trait-related words
         trait_counts = {trait: 0 for trait in self.trait_keywords}
@@ -51,23 +75,224 @@ class PersonalityEstimator:
         
         return scores
     
-    def estimate_for_entities(self, entities: List[str], texts: Dict[str, str] = None) -> Dict[str, Dict[str, float]]:
+    @property
+    def traits(self) -> List[str]:
+        return list(self.trait_keywords)
+
+    @property
+    def lemma_index(self) -> Dict[str, Tuple[int, ...]]:
+        """Lemma -> indices of the traits (in :attr:`traits` order) it counts towards."""
+        snapshot = {trait: tuple(words) for trait, words in self.trait_keywords.items()}
+        if self._lemma_index is None or snapshot != self._compiled_from:
+            index: Dict[str, Tuple[int, ...]] = {}
+            for i, words in enumerate(snapshot.values()):
+                for word in set(words):
+                    index[word] = index.get(word, ()) + (i,)
+            self._lemma_index = index
+            self._compiled_from = snapshot
+        return self._lemma_index
+
+    def trait_hits(self, doc) -> np.ndarray:
+        """
+        Locate trait keyword lemmas in an already parsed ``Doc``.
+
+        Lemmas are lowercased so a Doc parsed from the original-case text can
+        be reused; scores may differ slightly from :meth:`estimate_traits`,
+        which tags the lowercased text.
+
+        Returns:
+            ``int64`` array of ``(token start_char, trait index)`` rows
+        """
+        index = self.lemma_index
+        hits = []
+        for token in doc:
+            for trait_idx in index.get(token.lemma_.lower(), ()):
+                hits.append((token.idx, trait_idx))
+        return np.asarray(hits, dtype=np.int64).reshape(-1, 2)
+
+    def estimate_from_analyses(self, analyses: Iterable) -> List[Dict[str, float]]:
+        """Score documents from their :class:`~.analysis.DocAnalysis` without re-parsing."""
+        counts = [a.trait_counts for a in analyses]
+        if not counts:
+            return []
+        traits = self.traits
+        scores = self.normalize_counts(np.vstack(counts))
+        return [dict(zip(traits, row)) for row in scores.tolist()]
+
+    def context_score_matrix(self, contexts, docs: Optional[Dict[str, object]] = None,
+                             window: Optional[int] = None) -> Tuple[List[str], np.ndarray]:
+        """
+        Array form of :meth:`estimate_from_contexts`.
+
+        Returns:
+            ``(node_ids, scores)`` with one (traits,) row per entity that has
+            context in a scored document, columns in :attr:`traits` order
+        """
+        node_ids, counts = self.context_count_matrix(contexts, docs, window)
+        return node_ids, self.normalize_counts(counts)
+
+    def context_count_matrix(self, contexts, docs: Optional[Dict[str, object]] = None,
+                             window: Optional[int] = None) -> Tuple[List[str], np.ndarray]:
+        """
+        Raw keyword counts behind :meth:`context_score_matrix`.
+
+        Counts can be summed across partial builds before normalizing.
+
+        Returns:
+            ``(node_ids, counts)`` with an ``int64`` (entities, traits) array
+        """
+        with instrumentation.stage("traits.context_scores"):
+            return self._context_count_matrix(contexts, docs, window)
+
+    def _context_count_matrix(self, contexts, docs, window) -> Tuple[List[str], np.ndarray]:
+        n_traits = len(self.trait_keywords)
+        rows: Dict[str, int] = {}
+        chunks = []
+        for source_id, node_ids in contexts.node_ids.items():
+            hits = contexts.hits.get(source_id)
+            if hits is None:
+                if not docs or source_id not in docs:
+                    continue
+                hits = self.trait_hits(docs[source_id])
+            if not len(hits) or not node_ids:
+                continue
+            # Prefix sums of one-hot hits: counts in [lo, hi) are C[hi] - C[lo]
+            onehot = np.zeros((len(hits) + 1, n_traits), dtype=np.int64)
+            np.add.at(onehot, (np.arange(1, len(hits) + 1), hits[:, 1]), 1)
+            cumulative = np.cumsum(onehot, axis=0)
+            bounds = contexts.windows(source_id, window)
+            lo = np.searchsorted(hits[:, 0], bounds[:, 0], side="left")
+            hi = np.searchsorted(hits[:, 0], bounds[:, 1], side="left")
+            idx = np.fromiter((rows.setdefault(n, len(rows)) for n in node_ids),
+                              dtype=np.int64, count=len(node_ids))
+            chunks.append((idx, cumulative[hi] - cumulative[lo]))
+
+        counts = np.zeros((len(rows), n_traits), dtype=np.int64)
+        for idx, doc_counts in chunks:
+            np.add.at(counts, idx, doc_counts)
+        return list(rows), counts
+
+    def estimate_from_contexts(self, contexts, entities: Optional[Iterable[str]] = None,
+                               docs: Optional[Dict[str, object]] = None,
+                               window: Optional[int] = None) -> Dict[str, Dict[str, float]]:
+        """
+        Score every entity from the text around its mentions.
+
+        Uses the keyword hits ``KGBuilder`` stores in ``contexts`` for every
+        document it parses; for documents without stored hits ``docs`` maps
+        source ids to their parsed ``Doc`` and each Doc is scanned once.
+        Counts from all mentions of an entity (e.g. canonical nodes seen in
+        many documents) are summed before normalization.
+
+        Args:
+            contexts: :class:`~.context.ContextIndex` recorded by ``KGBuilder``
+            entities: Only return these node ids (default: every indexed entity)
+            docs: Optional ``{source_id: Doc}`` for documents without stored hits
+            window: ``None`` scores the mention's sentence, otherwise the
+                mention widened by this many characters on each side
+
+        Returns:
+            Dictionary mapping entity IDs to their trait scores; entities
+            without any context hits get neutral 0.5 scores
+        """
+        node_ids, matrix = self.context_score_matrix(contexts, docs, window)
+        scores = dict(zip(node_ids, matrix.tolist()))
+
+        traits = self.traits
+        if entities is None:
+            entities = [n for ids in contexts.node_ids.values() for n in ids]
+        neutral = [0.5] * len(traits)
+        return {ent: dict(zip(traits, scores.get(ent, neutral))) for ent in entities}
+
+    def count_matrix(self, texts: Iterable[str], batch_size: int = 256,
+                     n_process: int = 1) -> np.ndarray:
+        """
+        Count trait keyword lemmas for many texts in one ``nlp.pipe`` pass.
+
+        Args:
+            texts: Input texts
+            batch_size: Number of texts spaCy buffers per batch
+            n_process: Number of spaCy worker processes
+
+        Returns:
+            ``int64`` array of shape (documents, traits)
+        """
+        index = self.lemma_index
+        n_traits = len(self.trait_keywords)
+        disable = nlp_registry.disabled_for(self.nlp, disable=self.disable)
+        rows: List[int] = []
+        cols: List[int] = []
+        n_docs = 0
+        lowered = (text.lower() for text in texts)
+        parsed = self.nlp.pipe(lowered, batch_size=batch_size, n_process=n_process, disable=disable)
+        for row, doc in enumerate(instrumentation.timed_iter("traits.parse", parsed)):
+            n_docs += 1
+            for token in doc:
+                hits = index.get(token.lemma_)
+                if hits:
+                    rows.extend([row] * len(hits))
+                    cols.extend(hits)
+        instrumentation.incr("trait_texts", n_docs)
+        flat = np.asarray(rows, dtype=np.int64) * n_traits + np.asarray(cols, dtype=np.int64)
+        return np.bincount(flat, minlength=n_docs * n_traits).reshape(n_docs, n_traits)
+
+    @staticmethod
+    def normalize_counts(counts: np.ndarray) -> np.ndarray:
+        """Vectorized form of the per-text normalization in :meth:`estimate_traits`."""
+        counts = np.asarray(counts, dtype=np.float64)
+        total = counts.sum(axis=1, keepdims=True)
+        scores = np.minimum(counts / (total + 1), 1.0)
+        return np.where(total > 0, scores, 0.5)
+
+    def score_matrix(self, texts: Iterable[str], batch_size: int = 256,
+                     n_process: int = 1) -> np.ndarray:
+        """Trait scores as a (documents, traits) array, columns in :attr:`traits` order."""
+        return self.normalize_counts(self.count_matrix(texts, batch_size, n_process))
+
+    def estimate_traits_batch(self, texts: Iterable[str], batch_size: int = 256,
+                              n_process: int = 1) -> List[Dict[str, float]]:
+        """
+        Estimate personality traits for many texts at once.
+
+        Gives the same scores as calling :meth:`estimate_traits` per text,
+        but streams the texts through ``nlp.pipe`` and scores them as a matrix.
+
+        Args:
+            texts: Input texts to analyze
+            batch_size: Number of texts spaCy buffers per batch
+            n_process: Number of spaCy worker processes
+
+        Returns:
+            List of trait score dictionaries, one per text
+        """
+        traits = self.traits
+        scores = self.score_matrix(texts, batch_size, n_process)
+        return [dict(zip(traits, row)) for row in scores.tolist()]
+
+    def estimate_for_entities(self, entities: List[str], texts: Dict[str, str] = None,
+                              contexts=None, docs: Optional[Dict[str, object]] = None
+                              ) -> Dict[str, Dict[str, float]]:
         """
         Estimate personality traits for multiple entities.
         
         Args:
             entities: List of entity IDs
             texts: Optional dictionary mapping entity IDs to their associated text
+            contexts: Optional ``KGBuilder.contexts``; entities without an
+                entry in ``texts`` are scored from their mention contexts
+            docs: Optional ``{source_id: Doc}`` for context documents without
+                stored keyword hits (see :meth:`estimate_from_contexts`)
             
         Returns:
             Dictionary mapping entity IDs to their trait scores
         """
+        with_text = [ent for ent in entities if texts and ent in texts]
+        scored = dict(zip(with_text, self.estimate_traits_batch(texts[ent] for ent in with_text)))
+        if contexts is not None:
+            rest = [ent for ent in entities if ent not in scored]
+            scored.update(self.estimate_from_contexts(contexts, entities=rest, docs=docs))
         out = {}
         for ent in entities:
-            if texts and ent in texts:
-                scores = self.estimate_traits(texts[ent])
-            else:
-                # Fallback to default neutral scores
-                scores = {trait: 0.5 for trait in TRAITS}
-            out[ent] = scores
+            # Fallback to default neutral scores
+            out[ent] = scored.get(ent) or {trait: 0.5 for trait in TRAITS}
         return out
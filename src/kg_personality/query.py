@@ -0,0 +1,476 @@
+"""Indexed queries over entity labels, relation types and trait scores
+"""
+import heapq
+from typing import (Any, Callable, Dict, Hashable, Iterable, Iterator, List, NamedTuple, Optional,
+                    Sequence, Set, Tuple)
+
+import networkx as nx
+import numpy as np
+
+from .trait_store import TraitStore
+
+# Stale trait rows tolerated before the sorted index is rebuilt
+REBUILD_MIN = 1024
+REBUILD_FRACTION = 0.05
+# top_k scores a candidate set directly when it has at most max(CANDIDATE_LIMIT, 16 * k) nodes
+CANDIDATE_LIMIT = 4096
+
+_MISSING = object()
+
+
+def _bound(value: Optional[float]) -> Optional[np.float32]:
+    # Compare in the store's precision so 0.7 matches a stored 0.7
+    return None if value is None else np.float32(value)
+
+
+class IndexedDiGraph(nx.DiGraph):
+    """
+    ``DiGraph`` that keeps an attached :class:`GraphIndex` in sync.
+
+    Every structural change made through the networkx API (adding, updating
+    or removing nodes and edges) is forwarded to :attr:`index`. With no index
+    attached it behaves exactly like ``nx.DiGraph``. Attribute writes through
+    ``graph.nodes[n][...]`` are not observed; call
+    :meth:`GraphIndex.reindex_node` after changing a ``label`` that way.
+    """
+
+    index: Optional["GraphIndex"] = None
+
+    def _label(self, n) -> Any:
+        attrs = self._node.get(n)
+        return _MISSING if attrs is None else attrs.get("label")
+
+    def _type(self, u, v) -> Any:
+        attrs = self._succ.get(u, {}).get(v)
+        return _MISSING if attrs is None else attrs.get("type")
+
+    def add_node(self, node_for_adding, **attr):
+        if self.index is None:
+            return super().add_node(node_for_adding, **attr)
+        old = self._label(node_for_adding)
+        super().add_node(node_for_adding, **attr)
+        self.index.move_node(node_for_adding, old, self._label(node_for_adding))
+
+    def add_nodes_from(self, nodes_for_adding, **attr):
+        if self.index is None:
+            return super().add_nodes_from(nodes_for_adding, **attr)
+        nodes = list(nodes_for_adding)
+        ids = [_node_id(n) for n in nodes]
+        old = [self._label(n) for n in ids]
+        super().add_nodes_from(nodes, **attr)
+        for n, label in zip(ids, old):
+            self.index.move_node(n, label, self._label(n))
+
+    def add_edge(self, u_of_edge, v_of_edge, **attr):
+        self.add_edges_from([(u_of_edge, v_of_edge)], **attr)
+
+    def add_edges_from(self, ebunch_to_add, **attr):
+        if self.index is None:
+            return super().add_edges_from(ebunch_to_add, **attr)
+        edges = list(ebunch_to_add)
+        new_nodes = {n for e in edges for n in e[:2] if n not in self._node}
+        old = [self._type(e[0], e[1]) for e in edges]
+        super().add_edges_from(edges, **attr)
+        for n in new_nodes:
+            self.index.move_node(n, _MISSING, self._label(n))
+        for e, rel_type in zip(edges, old):
+            self.index.move_edge(e[0], e[1], rel_type, self._type(e[0], e[1]))
+
+    def remove_node(self, n):
+        if self.index is None:
+            return super().remove_node(n)
+        label = self._label(n)
+        incident = [(n, v, d.get("type")) for v, d in self._succ.get(n, {}).items()]
+        incident += [(u, n, d.get("type")) for u, d in self._pred.get(n, {}).items() if u != n]
+        super().remove_node(n)
+        for u, v, rel_type in incident:
+            self.index.move_edge(u, v, rel_type, _MISSING)
+        self.index.move_node(n, label, _MISSING)
+
+    def remove_nodes_from(self, nodes):
+        if self.index is None:
+            return super().remove_nodes_from(nodes)
+        for n in list(nodes):
+            if n in self._node:
+                self.remove_node(n)
+
+    def remove_edge(self, u, v):
+        if self.index is None:
+            return super().remove_edge(u, v)
+        rel_type = self._type(u, v)
+        super().remove_edge(u, v)
+        self.index.move_edge(u, v, rel_type, _MISSING)
+
+    def remove_edges_from(self, ebunch):
+        if self.index is None:
+            return super().remove_edges_from(ebunch)
+        for e in list(ebunch):
+            if self.has_edge(e[0], e[1]):
+                self.remove_edge(e[0], e[1])
+
+    def clear(self):
+        super().clear()
+        if self.index is not None:
+            self.index.rebuild()
+
+    def clear_edges(self):
+        super().clear_edges()
+        if self.index is not None:
+            self.index.rebuild()
+
+
+def _node_id(n):
+    # Same rule as networkx: unhashable items are (node, attrs) pairs
+    try:
+        hash(n)
+        return n
+    except TypeError:
+        return n[0]
+
+
+def _move(table: Dict[Any, Set], item, old, new):
+    if old is new or old == new:
+        return
+    if old is not _MISSING:
+        members = table.get(old)
+        if members is not None:
+            members.discard(item)
+            if not members:
+                del table[old]
+    if new is not _MISSING:
+        table.setdefault(new, set()).add(item)
+
+
+class GraphIndex:
+    def __init__(self, graph: IndexedDiGraph):
+        """
+        Label -> nodes and relation type -> edges hash indexes of ``graph``.
+
+        Built once in linear time, then kept up to date by the graph.
+        Nodes without a ``label`` are indexed under ``None``, edges without a
+        ``type`` likewise.
+        """
+        self.graph = graph
+        self.by_label: Dict[Optional[str], Set[Hashable]] = {}
+        self.by_type: Dict[Optional[str], Set[Tuple[Hashable, Hashable]]] = {}
+        self.rebuild()
+        graph.index = self
+
+    def rebuild(self):
+        self.by_label.clear()
+        self.by_type.clear()
+        for n, attrs in self.graph.nodes(data=True):
+            self.by_label.setdefault(attrs.get("label"), set()).add(n)
+        for u, v, attrs in self.graph.edges(data=True):
+            self.by_type.setdefault(attrs.get("type"), set()).add((u, v))
+
+    def detach(self):
+        if self.graph.index is self:
+            self.graph.index = None
+
+    def move_node(self, n, old, new):
+        _move(self.by_label, n, old, new)
+
+    def move_edge(self, u, v, old, new):
+        _move(self.by_type, (u, v), old, new)
+
+    def reindex_node(self, n):
+        """Re-read the ``label`` of ``n`` after it was changed in place."""
+        for label, members in list(self.by_label.items()):
+            if n in members:
+                _move(self.by_label, n, label, _MISSING)
+        if n in self.graph:
+            _move(self.by_label, n, _MISSING, self.graph.nodes[n].get("label"))
+
+
+class TraitIndex:
+    def __init__(self, store: TraitStore):
+        """
+        Per-trait sorted views of a :class:`~.trait_store.TraitStore`.
+
+        Each trait column is argsorted on first use. Rows written afterwards
+        are tracked through :meth:`TraitStore.watch` and answered from the
+        matrix directly, so range and top-k queries cost
+        ``O(log n + results + stale rows)``; once more than
+        ``max(REBUILD_MIN, REBUILD_FRACTION * n)`` rows are stale the sorted
+        views are dropped and rebuilt lazily.
+        """
+        self.store = store
+        self.changed = store.watch()
+        # trait -> (scores ascending, rows)
+        self._sorted: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def detach(self):
+        self.store.unwatch(self.changed)
+
+    def _view(self, trait: str) -> Tuple[np.ndarray, np.ndarray]:
+        if len(self.changed) > max(REBUILD_MIN, REBUILD_FRACTION * len(self.store)):
+            self._sorted.clear()
+            self.changed.clear()
+        view = self._sorted.get(trait)
+        if view is None:
+            column = self.store.column(trait)
+            rows = np.flatnonzero(~np.isnan(column))
+            rows = rows[np.argsort(column[rows], kind="stable")]
+            view = self._sorted[trait] = (column[rows].copy(), rows)
+        return view
+
+    def _stale(self, view_rows: np.ndarray) -> Tuple[Optional[np.ndarray], np.ndarray]:
+        """Mask of still-valid sorted entries, plus the stale rows."""
+        if not self.changed:
+            return None, np.zeros(0, dtype=np.int64)
+        stale = np.fromiter(self.changed, dtype=np.int64, count=len(self.changed))
+        return ~np.isin(view_rows, stale), stale
+
+    def estimate(self, trait: str, min_score: Optional[float] = None,
+                 max_score: Optional[float] = None) -> int:
+        """Upper bound on the rows in range, without materializing them."""
+        min_score, max_score = _bound(min_score), _bound(max_score)
+        scores, _ = self._view(trait)
+        lo = 0 if min_score is None else np.searchsorted(scores, min_score, side="left")
+        hi = len(scores) if max_score is None else np.searchsorted(scores, max_score, side="right")
+        return int(hi - lo) + len(self.changed)
+
+    def range_rows(self, trait: str, min_score: Optional[float] = None,
+                   max_score: Optional[float] = None) -> np.ndarray:
+        """Rows whose ``trait`` score lies in ``[min_score, max_score]``."""
+        min_score, max_score = _bound(min_score), _bound(max_score)
+        scores, rows = self._view(trait)
+        lo = 0 if min_score is None else np.searchsorted(scores, min_score, side="left")
+        hi = len(scores) if max_score is None else np.searchsorted(scores, max_score, side="right")
+        found = rows[lo:hi]
+        valid, stale = self._stale(found)
+        if valid is None:
+            return found
+        column = self.store.column(trait)
+        stale = stale[stale < len(column)]
+        values = column[stale]
+        keep = ~np.isnan(values)
+        if min_score is not None:
+            keep &= values >= min_score
+        if max_score is not None:
+            keep &= values <= max_score
+        return np.concatenate([found[valid], stale[keep]])
+
+    def iter_sorted(self, trait: str, descending: bool = True,
+                    chunk: int = 256) -> Iterator[Tuple[float, int]]:
+        """Lazily yield ``(score, row)`` pairs in score order."""
+        scores, rows = self._view(trait)
+        stale = set(self.changed)
+        column = self.store.column(trait)
+        fresh = sorted(((float(column[r]), r) for r in stale
+                        if r < len(column) and not np.isnan(column[r])), reverse=descending)
+
+        def indexed():
+            n = len(rows)
+            for start in range(0, n, chunk):
+                if descending:
+                    part = slice(max(n - start - chunk, 0), n - start)
+                    values, part_rows = scores[part][::-1], rows[part][::-1]
+                else:
+                    values, part_rows = scores[start:start + chunk], rows[start:start + chunk]
+                for value, row in zip(values.tolist(), part_rows.tolist()):
+                    if row not in stale:
+                        yield value, row
+
+        return heapq.merge(indexed(), fresh, key=lambda item: item[0], reverse=descending)
+
+
+class Link(NamedTuple):
+    """Constraint "has a ``rel_type`` edge to (``out``) or from (``in``) ``node``"."""
+    rel_type: Optional[str]
+    node: Hashable
+    direction: str = "out"
+
+
+class GraphQuery:
+    def __init__(self, graph: IndexedDiGraph, traits: TraitStore):
+        """
+        Query layer over a graph and its trait scores.
+
+        Maintains a :class:`GraphIndex` and a :class:`TraitIndex`. Queries
+        combine a ``label``, relationship constraints (:class:`Link` or plain
+        ``(rel_type, node[, direction])`` tuples) and inclusive trait ranges
+        ``{trait: (min, max)}`` with ``None`` for an open end. The most
+        selective constraint, judged from index sizes, produces the
+        candidates and the rest are checked per candidate, so a query touches
+        ``O(smallest candidate set)`` nodes rather than the whole graph.
+        """
+        self.graph = graph
+        self.traits = traits
+        self.index = GraphIndex(graph)
+        self.trait_index = TraitIndex(traits)
+
+    def detach(self):
+        """Stop maintaining the indexes."""
+        self.index.detach()
+        self.trait_index.detach()
+
+    def nodes(self, label: Optional[str]) -> Set[Hashable]:
+        """Nodes with ``label`` (the live index set; do not modify)."""
+        return self.index.by_label.get(label, set())
+
+    def edges(self, rel_type: Optional[str]) -> Set[Tuple[Hashable, Hashable]]:
+        """Edges of ``rel_type`` (the live index set; do not modify)."""
+        return self.index.by_type.get(rel_type, set())
+
+    def labels(self) -> Dict[Optional[str], int]:
+        return {label: len(members) for label, members in self.index.by_label.items()}
+
+    def relation_types(self) -> Dict[Optional[str], int]:
+        return {rel_type: len(members) for rel_type, members in self.index.by_type.items()}
+
+    def neighbors(self, node: Hashable, rel_type: Optional[str] = None, label: Optional[str] = None,
+                  direction: str = "out") -> List[Hashable]:
+        """
+        Adjacent nodes of ``node`` in ``O(degree)``.
+
+        Args:
+            rel_type: Only follow edges of this type
+            label: Only return nodes with this label
+            direction: ``"out"`` (successors), ``"in"`` (predecessors) or ``"both"``
+        """
+        if direction not in ("out", "in", "both"):
+            raise ValueError(f"Unknown direction {direction!r}; expected 'out', 'in' or 'both'")
+        graph = self.graph
+        if node not in graph:
+            return []
+        adjacency = []
+        if direction in ("out", "both"):
+            adjacency.append(graph.succ[node])
+        if direction in ("in", "both"):
+            adjacency.append(graph.pred[node])
+        found = []
+        seen = set()
+        for adj in adjacency:
+            for other, attrs in adj.items():
+                if other in seen or (rel_type is not None and attrs.get("type") != rel_type):
+                    continue
+                if label is not None and graph.nodes[other].get("label") != label:
+                    continue
+                seen.add(other)
+                found.append(other)
+        return found
+
+    def trait_range(self, trait: str, min_score: Optional[float] = None,
+                    max_score: Optional[float] = None) -> List[Hashable]:
+        """Nodes whose ``trait`` score is in ``[min_score, max_score]``."""
+        node_ids = self.traits.node_ids
+        return [node_ids[r] for r in self.trait_index.range_rows(trait, min_score, max_score).tolist()]
+
+    def find(self, label: Optional[str] = None, related: Sequence = (),
+             traits: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+             limit: Optional[int] = None) -> List[Hashable]:
+        """
+        Nodes matching every given constraint.
+
+        Example: people at Acme with conscientiousness of at least 0.7::
+
+            kg.query.find(label="PERSON", related=[("works_at", "ORG:acme")],
+                          traits={"conscientiousness": (0.7, None)})
+
+        Args:
+            label: Node label
+            related: Relationship constraints
+            traits: Inclusive score ranges per trait
+            limit: Return at most this many nodes
+
+        Returns:
+            Matching node ids (in no particular order)
+        """
+        related = [Link(*link) for link in related]
+        traits = traits or {}
+        candidates = self._candidates(label, related, traits)
+        matched = self._filter(candidates, label, related, traits)
+        return matched if limit is None else matched[:limit]
+
+    def top_k(self, trait: str, k: int, label: Optional[str] = None, related: Sequence = (),
+              traits: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+              largest: bool = True) -> List[Tuple[Hashable, float]]:
+        """
+        The ``k`` nodes with the highest (or lowest) ``trait`` score that match
+        the other constraints, e.g. the top extraverts with a Python skill::
+
+            kg.query.top_k("extraversion", 10, label="PERSON",
+                           related=[("has_skill", "SKILL:python")])
+
+        Small candidate sets (a neighbourhood) are scored directly; otherwise
+        the sorted trait index is walked until ``k`` matches are found.
+
+        Returns:
+            ``(node_id, score)`` pairs, best first
+        """
+        related = [Link(*link) for link in related]
+        traits = traits or {}
+        if k <= 0:
+            return []
+        size, _ = self._plan(label, related, traits)
+        if size <= max(CANDIDATE_LIMIT, 16 * k) and (related or traits or label is not None):
+            nodes = self._filter(self._candidates(label, related, traits), label, related, traits)
+            scores = self.traits.read(nodes)[:, self.traits.trait_index[trait]]
+            keep = np.flatnonzero(~np.isnan(scores))
+            order = keep[np.argsort(-scores[keep] if largest else scores[keep], kind="stable")][:k]
+            return [(nodes[i], float(scores[i])) for i in order.tolist()]
+
+        node_ids = self.traits.node_ids
+        checks = self._checks(label, related, traits)
+        found = []
+        for score, row in self.trait_index.iter_sorted(trait, descending=largest):
+            node = node_ids[row]
+            if node is None or node not in self.graph or not all(check(node) for check in checks):
+                continue
+            found.append((node, score))
+            if len(found) == k:
+                break
+        return found
+
+    def _plan(self, label, related: List[Link], traits) -> Tuple[int, Callable[[], Iterable]]:
+        """Size estimate and generator of the smallest candidate source."""
+        graph = self.graph
+        options = []
+        if label is not None:
+            members = self.nodes(label)
+            options.append((len(members), lambda: members))
+        for link in related:
+            if link.node not in graph:
+                return 0, lambda: ()
+            adj = graph.pred[link.node] if link.direction == "out" else graph.succ[link.node]
+            options.append((len(adj), lambda link=link: self.neighbors(
+                link.node, link.rel_type, direction="in" if link.direction == "out" else "out")))
+        for trait, (lo, hi) in traits.items():
+            options.append((self.trait_index.estimate(trait, lo, hi),
+                            lambda trait=trait, lo=lo, hi=hi: self.trait_range(trait, lo, hi)))
+        if not options:
+            return graph.number_of_nodes(), lambda: graph.nodes
+        return min(options, key=lambda option: option[0])
+
+    def _candidates(self, label, related, traits) -> Iterable:
+        return self._plan(label, related, traits)[1]()
+
+    def _checks(self, label, related: List[Link], traits) -> List[Callable[[Hashable], bool]]:
+        graph = self.graph
+        checks = []
+        if label is not None:
+            checks.append(lambda n: graph.nodes[n].get("label") == label)
+        for link in related:
+            def linked(n, link=link):
+                attrs = (graph.succ[n].get(link.node) if link.direction == "out"
+                         else graph.pred[n].get(link.node))
+                return attrs is not None and (link.rel_type is None or attrs.get("type") == link.rel_type)
+            checks.append(linked)
+        for trait, (lo, hi) in traits.items():
+            col = self.traits.trait_index[trait]
+
+            def in_range(n, col=col, lo=_bound(lo), hi=_bound(hi)):
+                row = self.traits.index.get(n)
+                if row is None:
+                    return False
+                value = self.traits.matrix[row, col]
+                return not np.isnan(value) and (lo is None or value >= lo) and (hi is None or value <= hi)
+            checks.append(in_range)
+        return checks
+
+    def _filter(self, candidates: Iterable, label, related, traits) -> List[Hashable]:
+        graph = self.graph
+        checks = self._checks(label, related, traits)
+        return [n for n in candidates if n in graph and all(check(n) for check in checks)]
@@ -0,0 +1,128 @@
+"""Scoped relationship inference between entity mentions
+"""
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from itertools import product
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Tuple
+
+# (source label, target label, relation type)
+DEFAULT_RULES = [
+    ("PERSON", "ORG", "works_at"),
+    ("PERSON", "SKILL", "has_skill"),
+    ("PERSON", "TRAIT", "exhibits"),
+]
+
+SCOPES = ("document", "sentence", "window", "dependency")
+
+
+class Mention(NamedTuple):
+    """Position of one entity mention inside its source document."""
+    node_id: str
+    label: str
+    sent: int
+    start: int
+    end: int
+    # Token indices from the entity root up to its sentence root (empty without a parse)
+    ancestors: Tuple[int, ...] = ()
+
+
+def mention_from_span(node_id: str, span, sent: int) -> Mention:
+    """Build a :class:`Mention` from a spaCy entity span."""
+    doc = span.doc
+    if doc.has_annotation("DEP"):
+        root = span.root
+        ancestors = (root.i,) + tuple(t.i for t in root.ancestors)
+    else:
+        ancestors = ()
+    return Mention(node_id, span.label_, sent, span.start, span.end, ancestors)
+
+
+def dependency_distance(a: Mention, b: Mention) -> float:
+    """Number of arcs between the roots of two mentions in the dependency tree."""
+    if not a.ancestors or not b.ancestors or a.sent != b.sent:
+        return float("inf")
+    depth_b = {tok: i for i, tok in enumerate(b.ancestors)}
+    for i, tok in enumerate(a.ancestors):
+        if tok in depth_b:
+            return i + depth_b[tok]
+    return float("inf")
+
+
+class RelationEngine:
+    def __init__(self, rules: List[Tuple[str, str, str]] = None, scope: str = "document",
+                 window: int = 10, max_hops: int = 4):
+        """
+        Infer typed relations between mentions that co-occur within a scope.
+
+        Args:
+            rules: ``(source label, target label, relation type)`` triples
+            scope: One of ``document``, ``sentence``, ``window`` (token distance)
+                or ``dependency`` (arcs between entity roots, same sentence)
+            window: Maximum token gap between mentions for the ``window`` scope
+            max_hops: Maximum dependency arcs for the ``dependency`` scope
+        """
+        if scope not in SCOPES:
+            raise ValueError(f"Unknown scope {scope!r}; expected one of {SCOPES}")
+        self.rules = list(rules or DEFAULT_RULES)
+        self.scope = scope
+        self.window = window
+        self.max_hops = max_hops
+        self._labels = {label for rule in self.rules for label in rule[:2]}
+
+    def infer(self, mentions: Iterable[Mention]) -> Iterator[Tuple[str, str, str]]:
+        """
+        Yield ``(src, dst, rel_type)`` candidates for the mentions of one document.
+
+        Mentions are bucketed by label (and sentence where the scope allows),
+        so the cost grows with the number of emitted pairs rather than with
+        the square of the number of mentions.
+        """
+        if self.scope == "window":
+            yield from self._infer_window(mentions)
+            return
+
+        buckets: Dict[Tuple[int, str], List[Mention]] = defaultdict(list)
+        for m in mentions:
+            if m.label in self._labels:
+                key = 0 if self.scope == "document" else m.sent
+                buckets[(key, m.label)].append(m)
+
+        keys = {key for key, _ in buckets}
+        for key in keys:
+            for src_label, dst_label, rel_type in self.rules:
+                sources = buckets.get((key, src_label))
+                targets = buckets.get((key, dst_label))
+                if not sources or not targets:
+                    continue
+                for a, b in product(sources, targets):
+                    if a.node_id == b.node_id:
+                        continue
+                    if self.scope == "dependency" and dependency_distance(a, b) > self.max_hops:
+                        continue
+                    yield a.node_id, b.node_id, rel_type
+
+    def _infer_window(self, mentions: Iterable[Mention]) -> Iterator[Tuple[str, str, str]]:
+        by_label: Dict[str, List[Mention]] = defaultdict(list)
+        for m in mentions:
+            if m.label in self._labels:
+                by_label[m.label].append(m)
+        starts = {}
+        longest = {}
+        for label, items in by_label.items():
+            items.sort(key=lambda m: m.start)
+            starts[label] = [m.start for m in items]
+            longest[label] = max(m.end - m.start for m in items)
+
+        for src_label, dst_label, rel_type in self.rules:
+            targets = by_label.get(dst_label)
+            if not targets or src_label not in by_label:
+                continue
+            target_starts = starts[dst_label]
+            for a in by_label[src_label]:
+                lo = bisect_left(target_starts, a.start - self.window - longest[dst_label])
+                hi = bisect_right(target_starts, a.end + self.window)
+                for b in targets[lo:hi]:
+                    # Gap between the spans, whichever comes first
+                    gap = b.start - a.end if b.start >= a.end else a.start - b.end
+                    if b.node_id != a.node_id and gap <= self.window:
+                        yield a.node_id, b.node_id, rel_type
@@ -0,0 +1,84 @@
+"""Entity resolution: map mentions onto canonical entity nodes
+"""
+import csv
+import re
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+_WS = re.compile(r"\s+")
+_EDGE_PUNCT = ".,;:!?\"'()[]"
+
+
+def normalize(text: str) -> str:
+    """Case-fold, collapse whitespace and strip surrounding punctuation."""
+    text = _WS.sub(" ", text.casefold()).strip(_EDGE_PUNCT + " ")
+    if text.endswith("'s") or text.endswith("’s"):
+        text = text[:-2]
+    return text
+
+
+class EntityResolver:
+    def __init__(self, aliases: Optional[Dict[str, str]] = None):
+        """
+        Hash index from ``(label, normalized text)`` to canonical node ids.
+
+        Args:
+            aliases: Optional mapping of alias -> canonical surface form,
+                applied to every label
+        """
+        self.index: Dict[Tuple[str, str], str] = {}
+        # (label or None, normalized alias) -> normalized canonical text
+        self.aliases: Dict[Tuple[Optional[str], str], str] = {}
+        for alias, canonical in (aliases or {}).items():
+            self.add_alias(alias, canonical)
+
+    def add_alias(self, alias: str, canonical: str, label: Optional[str] = None):
+        """Resolve ``alias`` to the same entity as ``canonical`` (for ``label`` only, if given)."""
+        self.aliases[(label, normalize(alias))] = normalize(canonical)
+
+    def load_aliases(self, path: str):
+        """
+        Load an alias table from a TSV file.
+
+        Each line is ``alias<TAB>canonical`` with an optional third ``label``
+        column; lines starting with ``#`` are ignored.
+        """
+        with open(Path(path), newline="", encoding="utf-8") as f:
+            for row in csv.reader(f, delimiter="\t"):
+                if not row or row[0].startswith("#"):
+                    continue
+                label = row[2] if len(row) > 2 and row[2] else None
+                self.add_alias(row[0], row[1], label)
+        return self
+
+    def key(self, text: str, label: str) -> Tuple[str, str]:
+        norm = normalize(text)
+        canonical = self.aliases.get((label, norm))
+        if canonical is None:
+            canonical = self.aliases.get((None, norm), norm)
+        return label, canonical
+
+    def resolve(self, text: str, label: str) -> Tuple[str, bool]:
+        """
+        Return the canonical node id for a mention.
+
+        Returns:
+            ``(node_id, is_new)`` where ``is_new`` is True the first time the
+            entity is seen
+        """
+        key = self.key(text, label)
+        node_id = self.index.get(key)
+        if node_id is not None:
+            return node_id, False
+        node_id = f"{label}:{key[1]}"
+        self.index[key] = node_id
+        return node_id, True
+
+    def discard(self, node_id: str):
+        """Forget a canonical node so the next mention of it is new again."""
+        label, _, canonical = node_id.partition(":")
+        if self.index.get((label, canonical)) == node_id:
+            del self.index[(label, canonical)]
+
+    def __len__(self) -> int:
+        return len(self.index)
@@ -0,0 +1,371 @@
+"""Resident worker that answers KG + personality requests with micro-batched parsing
+
+    python -m src.kg_personality.service --jsonl < requests.jsonl > responses.jsonl
+    python -m src.kg_personality.service --http 8080
+
+Each request is ``{"id": ..., "text": ...}``; the reply carries the entities,
+relations and trait scores of that text (see :meth:`WorkerService.process`).
+"""
+import argparse
+import itertools
+import json
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+
+from . import instrumentation, nlp_registry
+from .analysis import DocumentAnalyzer
+from .instrumentation import Histogram
+from .kg_builder import KGBuilder
+from .personality import PersonalityEstimator
+from .relations import RelationEngine
+
+# Requests per nlp.pipe batch, and how long the first request may wait for company
+MAX_BATCH = 64
+MAX_WAIT_MS = 5.0
+QUEUE_SIZE = 1024
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+_STOP = object()
+
+
+class Overloaded(Exception):
+    """The request queue is full; retry later."""
+
+
+class NotRunning(RuntimeError):
+    """The batching thread is not running (before :meth:`WorkerService.start` or after ``close``)."""
+
+
+class WorkerService:
+    def __init__(self, nlp=None, model: str = nlp_registry.DEFAULT_MODEL,
+                 relation_engine: Optional[RelationEngine] = None, max_batch: int = MAX_BATCH,
+                 max_wait_ms: float = MAX_WAIT_MS, queue_size: int = QUEUE_SIZE):
+        """
+        Keep the spaCy pipeline, estimator and relation engine loaded and
+        serve requests from a bounded queue.
+
+        A single batching thread takes the first waiting request, gathers
+        whatever else arrives within ``max_wait_ms`` (up to ``max_batch``
+        requests) and parses them in one ``nlp.pipe`` call. Graph building and
+        scoring reuse the batch ``KGBuilder`` path, so answers match the
+        offline pipeline.
+
+        Args:
+            nlp: Optional spaCy pipeline; defaults to the shared registry pipeline
+            model: Registry model name used when ``nlp`` is not given
+            relation_engine: Engine for relations (document scope by default)
+            max_batch: Maximum requests per ``nlp.pipe`` batch
+            max_wait_ms: Longest a request waits for a batch to fill
+            queue_size: Pending requests accepted before :meth:`submit` refuses
+        """
+        self.nlp = nlp if nlp is not None else nlp_registry.get_nlp(model)
+        self.estimator = PersonalityEstimator(nlp=self.nlp)
+        self.analyzer = DocumentAnalyzer(estimator=self.estimator, nlp=self.nlp)
+        self.relation_engine = relation_engine or RelationEngine()
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self.latency = Histogram()
+        self.queue_wait = Histogram()
+        self.batch_sizes = Histogram(BATCH_BUCKETS)
+        self.completed = 0
+        self.rejected = 0
+        self.failed = 0
+        self.started = time.perf_counter()
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "WorkerService":
+        """Warm the pipeline with one request and start the batching thread."""
+        self.process([("warmup", "Ana is creative.")])
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="kg-worker", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self, timeout: Optional[float] = None):
+        """Finish the queued requests and stop the batching thread."""
+        # Later submits are refused before the stop marker is queued
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self.queue.put(_STOP)
+            thread.join(timeout)
+
+    def __enter__(self) -> "WorkerService":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def submit(self, text: str, request_id: Any = None, block: bool = False,
+               timeout: Optional[float] = None) -> Future:
+        """
+        Queue one text; the returned future resolves to its reply.
+
+        Raises:
+            Overloaded: If the queue is full (after ``timeout`` when ``block``)
+            NotRunning: If the service is not started or already closed, as
+                the future would never resolve
+        """
+        if self._thread is None:
+            raise NotRunning("WorkerService is not running; call start() first")
+        if request_id is None:
+            request_id = next(self._ids)
+        future: Future = Future()
+        try:
+            self.queue.put((str(request_id), text, time.perf_counter(), future), block=block, timeout=timeout)
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            instrumentation.incr("service_rejected")
+            raise Overloaded(f"{self.queue.maxsize} requests pending") from None
+        return future
+
+    def _next_batch(self) -> Tuple[List[Tuple[str, str, float, Future]], bool]:
+        first = self.queue.get()
+        if first is _STOP:
+            return [], True
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        stop = False
+        while not stop:
+            batch, stop = self._next_batch()
+            if not batch:
+                continue
+            started = time.perf_counter()
+            for _, _, enqueued, _ in batch:
+                self.queue_wait.observe(started - enqueued)
+            self.batch_sizes.observe(len(batch))
+            try:
+                with instrumentation.stage("service.batch"):
+                    replies = self.process([(request_id, text) for request_id, text, _, _ in batch])
+            except Exception as e:  # answer every caller, keep serving
+                with self._lock:
+                    self.failed += len(batch)
+                for _, _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            done = time.perf_counter()
+            with self._lock:
+                self.completed += len(batch)
+            for (_, _, enqueued, future), reply in zip(batch, replies):
+                self.latency.observe(done - enqueued)
+                instrumentation.observe("service_latency_seconds", done - enqueued)
+                future.set_result(reply)
+            instrumentation.incr("service_requests", len(batch))
+
+    def process(self, docs: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """
+        Analyze ``(request_id, text)`` pairs synchronously in one ``nlp.pipe`` pass.
+
+        Returns:
+            One reply per document: ``id``, ``entities`` (``text``, ``label``,
+            character ``start``/``end`` and per-entity ``traits``),
+            ``relations`` (``source``/``target`` entity indexes and ``type``)
+            and document-level ``traits``
+        """
+        # Request ids may repeat across callers; source ids must not within a batch
+        sources = [(f"r{i}", text) for i, (_, text) in enumerate(docs)]
+        analyses = list(self.analyzer.analyze_corpus(sources, batch_size=max(1, len(sources))))
+        kg = KGBuilder(nlp=self.nlp, relation_engine=self.relation_engine, trait_attributes=False)
+        kg.build_from_analyses(analyses)
+        kg.add_relationships()
+        node_ids, scores = self.estimator.context_score_matrix(kg.contexts)
+        entity_scores = dict(zip(node_ids, scores.tolist()))
+        doc_scores = self.estimator.estimate_from_analyses(analyses)
+        traits = self.estimator.traits
+
+        replies = []
+        for (request_id, _), analysis, doc_traits in zip(docs, analyses, doc_scores):
+            source_id = analysis.source_id
+            position = {f"{source_id}_ent_{i}": i for i in range(len(analysis.entities))}
+            entities = []
+            for i, (text, label, start, end) in enumerate(analysis.entities):
+                entity = {"text": text, "label": label, "start": start, "end": end}
+                row = entity_scores.get(f"{source_id}_ent_{i}")
+                if row is not None:
+                    entity["traits"] = dict(zip(traits, row))
+                entities.append(entity)
+            relations = [{"source": position[u], "target": position[v], "type": kg.graph.edges[u, v].get("type")}
+                         for u, v in sorted(kg.contributions[source_id].relations)]
+            replies.append({"id": request_id, "entities": entities, "relations": relations,
+                            "traits": {t: float(s) for t, s in doc_traits.items()}})
+        return replies
+
+    def stats(self) -> Dict[str, Any]:
+        """Latency percentiles (ms), throughput and queue state since :meth:`start`."""
+        elapsed = time.perf_counter() - self.started
+        latency = self.latency.to_dict()
+        wait = self.queue_wait.to_dict()
+        return {
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "queued": self.queue.qsize(),
+            "seconds": elapsed,
+            "throughput": self.completed / elapsed if elapsed > 0 else 0.0,
+            "latency_ms": {q: latency[q] * 1000 for q in ("p50", "p90", "p99", "max")},
+            "queue_wait_ms": {q: wait[q] * 1000 for q in ("p50", "p99")},
+            "mean_batch": self.batch_sizes.sum / self.batch_sizes.count if self.batch_sizes.count else 0.0,
+        }
+
+
+def serve_jsonl(service: WorkerService, source: TextIO = sys.stdin, sink: TextIO = sys.stdout):
+    """
+    Answer JSONL requests from ``source`` on ``sink`` until end of input.
+
+    Replies are written as they complete, so they may come out of order;
+    match them by ``id``. A full queue blocks the reader, which pushes back
+    on the writer of ``source``. Malformed lines are answered with
+    ``{"id": ..., "error": ...}``.
+    """
+    lock = threading.Lock()
+
+    def write(reply: Dict[str, Any]):
+        with lock:
+            sink.write(json.dumps(reply))
+            sink.write("\n")
+            sink.flush()
+
+    def reply_when_done(request_id):
+        def done(future: Future):
+            error = future.exception()
+            write({"id": request_id, "error": str(error)} if error else future.result())
+        return done
+
+    pending = []
+    for line_no, line in enumerate(source):
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+            request_id = request.get("id", line_no)
+            text = request["text"]
+        except (ValueError, KeyError, AttributeError) as e:
+            write({"id": line_no, "error": f"bad request: {e}"})
+            continue
+        future = service.submit(text, request_id, block=True)
+        future.add_done_callback(reply_when_done(request_id))
+        pending.append(future)
+        # Keep the list of futures bounded on endless input
+        if len(pending) > 2 * service.queue.maxsize:
+            pending = [f for f in pending if not f.done()]
+    for future in pending:
+        future.exception()
+
+
+def make_http_server(service: WorkerService, host: str = "127.0.0.1", port: int = 8080,
+                     timeout: float = 30.0) -> ThreadingHTTPServer:
+    """
+    HTTP front end: ``POST /analyze`` with a request object or a list of them,
+    ``GET /stats`` and ``GET /health``. A full queue answers ``503`` with
+    ``Retry-After``.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, body: Any, headers: Optional[Dict[str, str]] = None):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/stats":
+                self._send(200, service.stats())
+            elif self.path == "/health":
+                self._send(200, {"status": "ok"})
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/analyze":
+                self._send(404, {"error": "not found"})
+                return
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                requests = body if isinstance(body, list) else [body]
+                texts = [(r.get("id"), r["text"]) for r in requests]
+            except (ValueError, KeyError, AttributeError) as e:
+                self._send(400, {"error": f"bad request: {e}"})
+                return
+            try:
+                futures = [service.submit(text, request_id) for request_id, text in texts]
+            except Overloaded as e:
+                self._send(503, {"error": str(e)}, {"Retry-After": "1"})
+                return
+            except NotRunning as e:
+                self._send(503, {"error": str(e)})
+                return
+            try:
+                replies = [future.result(timeout) for future in futures]
+            except Exception as e:
+                self._send(500, {"error": str(e)})
+                return
+            self._send(200, replies if isinstance(body, list) else replies[0])
+
+        def log_message(self, format, *args):
+            pass
+
+    return _HTTPServer((host, port), Handler)
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    # The default listen backlog of 5 drops connections under concurrent load
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resident KG + personality worker")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--jsonl", action="store_true", help="Serve JSONL on stdin/stdout")
+    mode.add_argument("--http", type=int, metavar="PORT", help="Serve HTTP on this port")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--model", default=nlp_registry.DEFAULT_MODEL)
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH)
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS)
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE)
+    args = parser.parse_args(argv)
+
+    service = WorkerService(model=args.model, max_batch=args.max_batch,
+                            max_wait_ms=args.max_wait_ms, queue_size=args.queue_size)
+    with service:
+        if args.jsonl:
+            serve_jsonl(service)
+            print(json.dumps(service.stats()), file=sys.stderr)
+            return
+        server = make_http_server(service, args.host, args.http)
+        print(f"Serving on http://{args.host}:{args.http}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            print(json.dumps(service.stats()), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""Nearest-neighbour search over per-node trait score vectors
+"""
+from typing import Callable, Hashable, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+# Brute force below this many indexed nodes, KD-tree (scipy) above
+TREE_THRESHOLD = 10000
+# Changed rows answered by brute force before the index is rebuilt
+REBUILD_MIN = 1024
+REBUILD_FRACTION = 0.05
+# Score used for traits a node has no value for
+NEUTRAL = 0.5
+# Distance-matrix entries computed per brute-force block
+BLOCK = 1 << 22
+
+Neighbors = List[Tuple[Hashable, float]]
+
+
+class SimilarityIndex:
+    def __init__(self, kg, label: Optional[str] = "PERSON", backend: str = "auto",
+                 leafsize: int = 16):
+        """
+        Euclidean k-NN and radius search over the trait vectors of a ``KGBuilder``.
+
+        Vectors are the rows of ``kg.traits`` (columns in ``traits.traits``
+        order, unset traits read as 0.5). Rows written after the index was
+        built, e.g. by ``merge_personality`` or ``merge_trait_matrix``, are
+        tracked through ``TraitStore.watch`` and searched by brute force next
+        to the index until there are more than
+        ``max(REBUILD_MIN, REBUILD_FRACTION * n)`` of them, when the index
+        is rebuilt.
+
+        Args:
+            kg: Builder whose ``traits`` (and ``graph`` for filters) are searched
+            label: Only index nodes with this label; ``None`` for every scored node
+            backend: ``"brute"`` (vectorized NumPy), ``"kdtree"`` (``scipy.spatial.cKDTree``)
+                or ``"auto"`` (KD-tree above ``TREE_THRESHOLD`` nodes when scipy
+                is installed)
+            leafsize: KD-tree leaf size
+        """
+        if backend not in ("auto", "brute", "kdtree"):
+            raise ValueError(f"Unknown backend {backend!r}; expected 'auto', 'brute' or 'kdtree'")
+        self.kg = kg
+        self.store = kg.traits
+        self.label = label
+        self.backend = backend
+        self.leafsize = leafsize
+        self.changed: Set[int] = self.store.watch()
+        self.tree = None
+        self.build()
+
+    def close(self):
+        """Stop tracking trait writes."""
+        self.store.unwatch(self.changed)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def build(self):
+        """(Re)build the index from the current trait scores."""
+        rows = np.fromiter(self.store.index.values(), dtype=np.int64, count=len(self.store))
+        rows.sort()
+        self.rows = rows[self._members(rows)]
+        self.points = self._vectors(self.rows)
+        self.tree = None
+        if self.backend == "kdtree" or (self.backend == "auto" and len(self.rows) > TREE_THRESHOLD):
+            try:
+                from scipy.spatial import cKDTree
+            except ImportError:
+                if self.backend == "kdtree":
+                    raise
+            else:
+                self.tree = cKDTree(self.points, leafsize=self.leafsize)
+        self.changed.clear()
+
+    def _members(self, rows: np.ndarray) -> np.ndarray:
+        """Mask of rows holding a node that belongs in the index."""
+        node_ids = self.store.node_ids
+        if self.label is None:
+            return np.fromiter((node_ids[r] is not None for r in rows.tolist()), dtype=bool, count=len(rows))
+        nodes = self.kg.graph.nodes
+        return np.fromiter((node_ids[r] is not None and node_ids[r] in nodes
+                            and nodes[node_ids[r]].get("label") == self.label for r in rows.tolist()),
+                           dtype=bool, count=len(rows))
+
+    def _vectors(self, rows: np.ndarray) -> np.ndarray:
+        values = self.store.matrix[rows]
+        return np.where(np.isnan(values), np.float32(NEUTRAL), values)
+
+    def _refresh(self) -> np.ndarray:
+        """Rebuild if too many rows changed; returns the rows changed since the last build."""
+        if len(self.changed) > max(REBUILD_MIN, REBUILD_FRACTION * len(self.rows)):
+            self.build()
+        stale = np.fromiter(self.changed, dtype=np.int64, count=len(self.changed))
+        stale.sort()
+        return stale
+
+    def _queries(self, queries) -> Tuple[np.ndarray, List[Optional[int]]]:
+        """Query vectors plus the row of each query node (excluded from its own results)."""
+        if isinstance(queries, np.ndarray):
+            return np.atleast_2d(queries).astype(np.float32), [None] * len(np.atleast_2d(queries))
+        if isinstance(queries, str) or not isinstance(queries, Iterable):
+            queries = [queries]
+        queries = list(queries)
+        rows = []
+        for node in queries:
+            row = self.store.index.get(node)
+            if row is None:
+                raise KeyError(node)
+            rows.append(row)
+        return self._vectors(np.asarray(rows, dtype=np.int64)), rows
+
+    def knn(self, queries, k: int = 10, related: Sequence = (), share: Optional[str] = None,
+            candidates: Optional[Iterable[Hashable]] = None) -> List[Neighbors]:
+        """
+        The ``k`` nearest nodes to each query.
+
+        Args:
+            queries: A node id, a list of node ids, or a (queries, traits) array
+            k: Neighbours per query
+            related: Only consider nodes matching these ``kg.query`` relationship
+                constraints, e.g. ``[("works_at", "ORG:acme")]``
+            share: Only consider nodes sharing a ``share``-typed edge target
+                with the query node (``"works_at"``: colleagues)
+            candidates: Only consider these node ids
+
+        Returns:
+            Per query, ``(node_id, distance)`` pairs nearest first; a query
+            node never appears in its own results
+        """
+        points, self_rows = self._queries(queries)
+        if related or share is not None or candidates is not None:
+            return [self._search_candidates(point, row, k, None, related, share, candidates)
+                    for point, row in zip(points, self_rows)]
+        return self._blocks(points, self_rows, lambda p, rows, stale: self._knn_block(p, rows, k, stale))
+
+    def radius(self, queries, r: float, related: Sequence = (), share: Optional[str] = None,
+               candidates: Optional[Iterable[Hashable]] = None) -> List[Neighbors]:
+        """Every node within distance ``r`` of each query, nearest first (same filters as :meth:`knn`)."""
+        points, self_rows = self._queries(queries)
+        if related or share is not None or candidates is not None:
+            return [self._search_candidates(point, row, None, r, related, share, candidates)
+                    for point, row in zip(points, self_rows)]
+        return self._blocks(points, self_rows, lambda p, rows, stale: self._radius_block(p, rows, r, stale))
+
+    def _blocks(self, points: np.ndarray, self_rows: List[Optional[int]],
+                search: Callable) -> List[Neighbors]:
+        """Run ``search`` over query blocks sized to bound the distance matrix."""
+        stale = self._refresh()
+        step = max(1, BLOCK // max(1, len(self.rows)))
+        results: List[Neighbors] = []
+        for start in range(0, len(points), step):
+            results += search(points[start:start + step], self_rows[start:start + step], stale)
+        return results
+
+    def _fresh(self, stale: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Changed rows that (still) belong in the index, with their current vectors."""
+        rows = stale[self._members(stale)] if len(stale) else stale
+        return rows, self._vectors(rows)
+
+    def _knn_block(self, points: np.ndarray, self_rows: List[Optional[int]], k: int,
+                   stale: np.ndarray) -> List[Neighbors]:
+        node_ids = self.store.node_ids
+        fresh_rows, fresh = self._fresh(stale)
+        n = len(self.rows)
+        # Indexed hits may be stale or the query itself: fetch a margin and
+        # widen it for the whole block until every query keeps k valid hits
+        dropped = np.isin(self.rows, stale) if len(stale) else np.zeros(n, dtype=bool)
+        self_pos = np.full(len(self_rows), -1, dtype=np.int64)
+        for i, row in enumerate(self_rows):
+            pos = np.searchsorted(self.rows, row) if row is not None else n
+            if pos < n and self.rows[pos] == row:
+                self_pos[i] = pos
+        kk = min(n, 2 * (k + 1))
+        while True:
+            dist, idx = self._nearest(points, kk)
+            usable = (idx < n) & ~dropped[np.minimum(idx, n - 1)] & (idx != self_pos[:, None])
+            if kk == n or (usable.sum(axis=1) >= k).all():
+                break
+            kk = min(n, 4 * kk)
+        extra = _distances(points, fresh)
+
+        results = []
+        for i, self_row in enumerate(self_rows):
+            rows = np.concatenate([self.rows[idx[i][usable[i]]], fresh_rows])
+            d = np.concatenate([dist[i][usable[i]], extra[i]])
+            if self_row is not None:
+                mask = rows != self_row
+                rows, d = rows[mask], d[mask]
+            order = np.argsort(d, kind="stable")[:k]
+            results.append([(node_ids[row], float(x)) for row, x in zip(rows[order].tolist(), d[order].tolist())])
+        return results
+
+    def _nearest(self, points: np.ndarray, kk: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(queries, kk) distances and positions in :attr:`rows` of the nearest indexed points."""
+        n = len(self.rows)
+        if kk == 0:
+            return np.zeros((len(points), 0)), np.zeros((len(points), 0), dtype=np.int64)
+        if self.tree is not None:
+            dist, idx = self.tree.query(points, k=kk)
+            return dist.reshape(len(points), kk), idx.reshape(len(points), kk)
+        all_dist = _distances(points, self.points)
+        if kk < n:
+            idx = np.argpartition(all_dist, kk - 1, axis=1)[:, :kk]
+        else:
+            idx = np.broadcast_to(np.arange(n), (len(points), n))
+        return np.take_along_axis(all_dist, idx, axis=1), idx
+
+    def _radius_block(self, points: np.ndarray, self_rows: List[Optional[int]], r: float,
+                      stale: np.ndarray) -> List[Neighbors]:
+        node_ids = self.store.node_ids
+        fresh_rows, fresh = self._fresh(stale)
+        if self.tree is not None:
+            found = self.tree.query_ball_point(points, r)
+        else:
+            found = [np.flatnonzero(row <= r) for row in _distances(points, self.points)]
+        extra = _distances(points, fresh)
+
+        results = []
+        for i, self_row in enumerate(self_rows):
+            idx = np.asarray(found[i], dtype=np.int64)
+            rows = self.rows[idx]
+            d = np.sqrt(((self.points[idx].astype(np.float64) - points[i]) ** 2).sum(axis=1))
+            keep = ~np.isin(rows, stale)
+            close = extra[i] <= r
+            rows = np.concatenate([rows[keep], fresh_rows[close]])
+            d = np.concatenate([d[keep], extra[i][close]])
+            if self_row is not None:
+                mask = rows != self_row
+                rows, d = rows[mask], d[mask]
+            order = np.argsort(d, kind="stable")
+            results.append([(node_ids[row], float(x)) for row, x in zip(rows[order].tolist(), d[order].tolist())])
+        return results
+
+    def _search_candidates(self, point: np.ndarray, self_row: Optional[int], k: Optional[int],
+                           r: Optional[float], related: Sequence, share: Optional[str],
+                           candidates: Optional[Iterable[Hashable]]) -> Neighbors:
+        """Brute force over a filtered candidate set (usually a small neighbourhood)."""
+        query = self.kg.query
+        allowed = None if candidates is None else set(candidates)
+        if related:
+            found = set(query.find(label=self.label, related=related))
+            allowed = found if allowed is None else allowed & found
+        if share is not None:
+            if self_row is None:
+                raise ValueError("share needs node-id queries")
+            node = self.store.node_ids[self_row]
+            peers = {peer for target in query.neighbors(node, share)
+                     for peer in query.neighbors(target, share, label=self.label, direction="in")}
+            allowed = peers if allowed is None else allowed & peers
+        nodes = [n for n in allowed if n in self.store.index and self.store.index[n] != self_row]
+        if self.label is not None:
+            graph_nodes = self.kg.graph.nodes
+            nodes = [n for n in nodes if n in graph_nodes and graph_nodes[n].get("label") == self.label]
+        rows = np.fromiter((self.store.index[n] for n in nodes), dtype=np.int64, count=len(nodes))
+        dist = np.sqrt(((self._vectors(rows) - point) ** 2).sum(axis=1))
+        order = np.argsort(dist, kind="stable")
+        if r is not None:
+            order = order[dist[order] <= r]
+        if k is not None:
+            order = order[:k]
+        return [(nodes[i], float(dist[i])) for i in order.tolist()]
+
+    def most_similar(self, node: Hashable, k: int = 10, **filters) -> Neighbors:
+        """Single-node form of :meth:`knn`."""
+        return self.knn([node], k, **filters)[0]
+
+
+def _distances(queries: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """(queries, points) Euclidean distance matrix."""
+    if not len(points):
+        return np.zeros((len(queries), 0), dtype=np.float64)
+    q = queries.astype(np.float64)
+    p = points.astype(np.float64)
+    squared = (q * q).sum(axis=1)[:, None] + (p * p).sum(axis=1)[None, :] - 2.0 * q @ p.T
+    return np.sqrt(np.maximum(squared, 0.0))
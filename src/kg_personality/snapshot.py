@@ -0,0 +1,264 @@
+"""Compact binary graph snapshots with memory-mapped loading
+"""
+import json
+import mmap
+import struct
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import networkx as nx
+import numpy as np
+
+MAGIC = b"KGSNAP01"
+# Header "version" written by write_snapshot; other versions are rejected on open
+VERSION = 1
+ALIGN = 64
+
+# Layout: MAGIC | uint64 header length | JSON header | padding | aligned arrays.
+# The header maps each array name to its dtype, shape and absolute offset.
+
+
+def encode_strings(values: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Concatenated UTF-8 blob plus (n + 1) int64 offsets."""
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    if encoded:
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def decode_strings(blob: np.ndarray, offsets: np.ndarray) -> List[str]:
+    """Inverse of :func:`encode_strings`."""
+    data = blob.tobytes()
+    bounds = offsets.tolist()
+    return [data[bounds[i]:bounds[i + 1]].decode("utf-8") for i in range(len(bounds) - 1)]
+
+
+def intern_values(values: Sequence[Optional[str]]) -> Tuple[List[str], np.ndarray]:
+    """Table of distinct values plus int32 codes (-1 for ``None``)."""
+    table: Dict[str, int] = {}
+    codes = np.fromiter((-1 if v is None else table.setdefault(v, len(table)) for v in values),
+                        dtype=np.int32, count=len(values))
+    return list(table), codes
+
+
+def write_snapshot(graph: nx.DiGraph, path, traits=None):
+    """
+    Write ``graph`` (and optionally a :class:`~.trait_store.TraitStore`) to ``path``.
+
+    Stored per node: id, ``label``, ``text`` and ``count``; per edge: ``type``
+    and ``count``. Other attributes are not persisted. Node ids are stored as
+    strings.
+    """
+    nodes = list(graph.nodes)
+    index = {n: i for i, n in enumerate(nodes)}
+    node_data = graph.nodes
+
+    labels, label_codes = intern_values([node_data[n].get("label") for n in nodes])
+    node_blob, node_offsets = encode_strings([str(n) for n in nodes])
+    text_blob, text_offsets = encode_strings([str(node_data[n].get("text", "")) for n in nodes])
+    node_count = np.fromiter((node_data[n].get("count", 0) for n in nodes),
+                             dtype=np.int64, count=len(nodes))
+    # Lexicographic order of the encoded ids, for binary-search lookups
+    node_order = np.array(sorted(range(len(nodes)), key=lambda i: str(nodes[i]).encode("utf-8")),
+                          dtype=np.int64)
+
+    indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+    targets: List[int] = []
+    types: List[Optional[str]] = []
+    counts: List[int] = []
+    for i, n in enumerate(nodes):
+        for v, d in graph.adj[n].items():
+            targets.append(index[v])
+            types.append(d.get("type"))
+            counts.append(d.get("count", 0))
+        indptr[i + 1] = len(targets)
+    relation_types, edge_type = intern_values(types)
+
+    trait_names: List[str] = []
+    trait_matrix = np.zeros((len(nodes), 0), dtype=np.float32)
+    if traits is not None:
+        trait_names = list(traits.traits)
+        trait_matrix = traits.read(nodes)
+
+    arrays = {
+        "node_blob": node_blob, "node_offsets": node_offsets, "node_order": node_order,
+        "node_label": label_codes, "node_count": node_count,
+        "text_blob": text_blob, "text_offsets": text_offsets,
+        "indptr": indptr, "indices": np.asarray(targets, dtype=np.int64),
+        "edge_type": edge_type, "edge_count": np.asarray(counts, dtype=np.int64),
+        "traits": trait_matrix,
+    }
+    header = {"version": VERSION, "labels": labels, "relation_types": relation_types,
+              "traits": trait_names, "arrays": {}}
+
+    # Offsets depend on the header length, which depends on the offsets:
+    # reserve room for the header and retry with more if it does not fit
+    header_len = 0
+    while True:
+        offset = _align(len(MAGIC) + 8 + header_len)
+        for name, arr in arrays.items():
+            header["arrays"][name] = {"dtype": arr.dtype.str, "shape": list(arr.shape),
+                                      "offset": offset}
+            offset = _align(offset + arr.nbytes)
+        encoded = json.dumps(header).encode("utf-8")
+        if len(encoded) <= header_len:
+            break
+        header_len = len(encoded) + 256
+
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", header_len))
+        f.write(encoded.ljust(header_len, b" "))
+        for name, arr in arrays.items():
+            f.write(b"\0" * (header["arrays"][name]["offset"] - f.tell()))
+            f.write(np.ascontiguousarray(arr).tobytes())
+        f.write(b"\0" * (offset - f.tell()))
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+class GraphSnapshot:
+    def __init__(self, header: dict, arrays: Dict[str, np.ndarray], buffer=None):
+        self.header = header
+        self.arrays = arrays
+        self.labels: List[str] = header["labels"]
+        self.relation_types: List[str] = header["relation_types"]
+        self.traits: List[str] = header["traits"]
+        self._buffer = buffer
+
+    @classmethod
+    def open(cls, path, mmap_mode: bool = True) -> "GraphSnapshot":
+        """
+        Open a snapshot; with ``mmap_mode`` arrays are read-only views of the file.
+
+        Opening only parses the header, so it takes milliseconds regardless
+        of graph size, and the pages are shared between processes mapping the
+        same file.
+        """
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a KG snapshot")
+            (header_len,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(header_len))
+            if header.get("version") != VERSION:
+                raise ValueError(f"{path} has unsupported snapshot version {header.get('version')!r} "
+                                 f"(expected {VERSION})")
+            if mmap_mode:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                f.seek(0)
+                buffer = f.read()
+        arrays = {}
+        for name, spec in header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"])) if spec["shape"] else 1
+            arrays[name] = np.frombuffer(buffer, dtype=dtype, count=count,
+                                         offset=spec["offset"]).reshape(spec["shape"])
+        return cls(header, arrays, buffer)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.arrays["node_offsets"]) - 1
+
+    @property
+    def n_edges(self) -> int:
+        return len(self.arrays["indices"])
+
+    def _string(self, blob: str, offsets: str, i: int) -> str:
+        start, end = self.arrays[offsets][i], self.arrays[offsets][i + 1]
+        return self.arrays[blob][start:end].tobytes().decode("utf-8")
+
+    def node_id(self, i: int) -> str:
+        return self._string("node_blob", "node_offsets", i)
+
+    def node_index(self, node_id: str) -> int:
+        """Row of ``node_id`` by binary search over the sorted id order (O(log n))."""
+        order = self.arrays["node_order"]
+        key = node_id.encode("utf-8")
+        keys = _SortedIds(self, order)
+        pos = bisect_left(keys, key)
+        if pos < len(order) and keys[pos] == key:
+            return int(order[pos])
+        raise KeyError(node_id)
+
+    def label(self, i: int) -> Optional[str]:
+        code = self.arrays["node_label"][i]
+        return None if code < 0 else self.labels[code]
+
+    def text(self, i: int) -> str:
+        return self._string("text_blob", "text_offsets", i)
+
+    def neighbors(self, i: int) -> List[Tuple[int, Optional[str]]]:
+        """Outgoing ``(target row, relation type)`` pairs of node ``i``."""
+        start, end = self.arrays["indptr"][i], self.arrays["indptr"][i + 1]
+        types = self.arrays["edge_type"][start:end]
+        return [(int(t), None if c < 0 else self.relation_types[c])
+                for t, c in zip(self.arrays["indices"][start:end], types)]
+
+    def node_traits(self, i: int) -> Dict[str, float]:
+        row = self.arrays["traits"][i]
+        return {t: float(v) for t, v in zip(self.traits, row) if not np.isnan(v)}
+
+    def to_graph(self, create_using=None) -> nx.DiGraph:
+        """
+        Materialize the snapshot as a networkx graph (linear in its size).
+
+        Args:
+            create_using: Graph class or empty instance to fill (default ``nx.DiGraph``)
+        """
+        a = self.arrays
+        ids = decode_strings(a["node_blob"], a["node_offsets"])
+        texts = decode_strings(a["text_blob"], a["text_offsets"])
+        graph = nx.empty_graph(0, create_using or nx.DiGraph)
+        nodes = []
+        for i, (code, count) in enumerate(zip(a["node_label"].tolist(), a["node_count"].tolist())):
+            attrs = {}
+            if code >= 0:
+                attrs["label"] = self.labels[code]
+            text = texts[i]
+            if text:
+                attrs["text"] = text
+            if count:
+                attrs["count"] = count
+            nodes.append((ids[i], attrs))
+        graph.add_nodes_from(nodes)
+
+        sources = np.repeat(np.arange(self.n_nodes), np.diff(a["indptr"])).tolist()
+        edges = []
+        for u, v, code, count in zip(sources, a["indices"].tolist(),
+                                     a["edge_type"].tolist(), a["edge_count"].tolist()):
+            attrs = {}
+            if code >= 0:
+                attrs["type"] = self.relation_types[code]
+            if count:
+                attrs["count"] = count
+            edges.append((ids[u], ids[v], attrs))
+        graph.add_edges_from(edges)
+        return graph
+
+    def trait_rows(self) -> Tuple[List[str], np.ndarray]:
+        """``(node_ids, scores)`` for every node that has trait scores."""
+        matrix = self.arrays["traits"]
+        if not self.traits:
+            return [], matrix
+        rows = np.flatnonzero(~np.isnan(matrix).all(axis=1))
+        return [self.node_id(i) for i in rows.tolist()], np.array(matrix[rows])
+
+
+class _SortedIds:
+    """Sequence view of node ids in sorted order, decoded on access for bisect."""
+
+    def __init__(self, snapshot: GraphSnapshot, order: np.ndarray):
+        self.snapshot = snapshot
+        self.order = order
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def __getitem__(self, pos: int) -> bytes:
+        i = int(self.order[pos])
+        a = self.snapshot.arrays
+        return a["node_blob"][a["node_offsets"][i]:a["node_offsets"][i + 1]].tobytes()
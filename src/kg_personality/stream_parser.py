@@ -0,0 +1,167 @@
+"""
+Incremental parser for streamed LLM trait-score replies.
+"""
+from typing import Dict, List, Optional, Sequence
+
+from .personality import TRAITS
+
+# Parser states
+SEEK, KEY_OR_END, KEY, COLON, VALUE, NUMBER, STRING_VALUE, SKIP, AFTER_VALUE, DONE = range(10)
+
+_NUMBER_CHARS = set("0123456789+-.eE")
+
+
+def normalize_trait(key: str, traits: Sequence[str] = TRAITS) -> Optional[str]:
+    """Map a reply key such as ``"Openness"`` or ``"openness_score"`` to a trait name."""
+    key = key.strip().lower()
+    for trait in traits:
+        if key == trait or key.startswith(trait):
+            return trait
+    return None
+
+
+class TraitStreamParser:
+    def __init__(self, traits: Sequence[str] = TRAITS):
+        """
+        Parse the first JSON object of a reply chunk by chunk.
+
+        Only the token being read (one key or number) is buffered, so total
+        work is linear in the reply length. :meth:`feed` returns True as soon
+        as every trait has a valid score, letting the caller stop the stream.
+        Values are clamped to [0, 1]; non-trait keys and nested values are
+        skipped.
+        """
+        self.traits = list(traits)
+        self.scores: Dict[str, float] = {}
+        self.state = SEEK
+        self.closed = False
+        self.chars = 0
+        self.chunks = 0
+        self._buf: List[str] = []
+        self._key: Optional[str] = None
+        self._escape = False
+        self._depth = 0
+        self._in_string = False
+
+    @property
+    def complete(self) -> bool:
+        return self.state == DONE or len(self.scores) == len(self.traits)
+
+    def _set_value(self, raw: str):
+        trait = normalize_trait(self._key or "", self.traits)
+        if trait is None:
+            return
+        try:
+            value = float(raw)
+        except ValueError:
+            return
+        if value != value:  # NaN
+            return
+        self.scores[trait] = min(max(value, 0.0), 1.0)
+
+    def feed(self, chunk: str) -> bool:
+        """Consume the next piece of the reply; returns :attr:`complete`."""
+        if not chunk or self.complete:
+            return self.complete
+        self.chunks += 1
+        self.chars += len(chunk)
+        for ch in chunk:
+            state = self.state
+            if state == SEEK:
+                if ch == "{":
+                    self.state = KEY_OR_END
+            elif state == KEY_OR_END:
+                if ch == '"':
+                    self._buf = []
+                    self.state = KEY
+                elif ch == "}":
+                    self._finish()
+            elif state == KEY:
+                if self._escape:
+                    self._buf.append(ch)
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._key = "".join(self._buf)
+                    self.state = COLON
+                else:
+                    self._buf.append(ch)
+            elif state == COLON:
+                if ch == ":":
+                    self.state = VALUE
+            elif state == VALUE:
+                if ch in _NUMBER_CHARS:
+                    self._buf = [ch]
+                    self.state = NUMBER
+                elif ch == '"':
+                    self._buf = []
+                    self.state = STRING_VALUE
+                elif ch in "{[":
+                    self._depth = 1
+                    self._in_string = False
+                    self.state = SKIP
+                elif not ch.isspace():
+                    # true / false / null: not a score
+                    self.state = AFTER_VALUE
+            elif state == NUMBER:
+                if ch in _NUMBER_CHARS:
+                    self._buf.append(ch)
+                else:
+                    self._set_value("".join(self._buf))
+                    self.state = AFTER_VALUE
+                    self._after_value(ch)
+            elif state == STRING_VALUE:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._set_value("".join(self._buf))
+                    self.state = AFTER_VALUE
+                else:
+                    self._buf.append(ch)
+            elif state == SKIP:
+                if self._in_string:
+                    if self._escape:
+                        self._escape = False
+                    elif ch == "\\":
+                        self._escape = True
+                    elif ch == '"':
+                        self._in_string = False
+                elif ch == '"':
+                    self._in_string = True
+                elif ch in "{[":
+                    self._depth += 1
+                elif ch in "}]":
+                    self._depth -= 1
+                    if self._depth == 0:
+                        self.state = AFTER_VALUE
+            elif state == AFTER_VALUE:
+                self._after_value(ch)
+            if self.complete:
+                break
+        return self.complete
+
+    def _after_value(self, ch: str):
+        if ch == ",":
+            self.state = KEY_OR_END
+        elif ch == "}":
+            self._finish()
+
+    def _finish(self):
+        self.closed = True
+        self.state = DONE
+
+    def result(self) -> Dict[str, float]:
+        """
+        Scores parsed so far, with missing traits defaulted to 0.5.
+
+        Raises:
+            ValueError: If no trait score was found in the reply
+        """
+        if self.state == NUMBER:
+            self._set_value("".join(self._buf))
+        if not self.scores:
+            raise ValueError("No trait scores found in LLM response")
+        return {trait: self.scores.get(trait, 0.5) for trait in self.traits}
@@ -0,0 +1,145 @@
+"""Array-backed storage of per-node trait scores
+"""
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Set
+
+import numpy as np
+
+from .personality import TRAITS
+
+
+class TraitStore:
+    def __init__(self, traits: Sequence[str] = TRAITS, capacity: int = 1024):
+        """
+        Trait scores as one ``float32`` matrix of nodes x traits.
+
+        Rows are addressed through a node-id -> row index; unset scores are
+        NaN. Rows of removed nodes are reused.
+
+        Args:
+            traits: Column names, in order
+            capacity: Initial number of rows (grows geometrically)
+        """
+        self.traits = list(traits)
+        self.trait_index = {trait: i for i, trait in enumerate(self.traits)}
+        self.matrix = np.full((max(1, capacity), len(self.traits)), np.nan, dtype=np.float32)
+        self.index: Dict[Hashable, int] = {}
+        # row -> node id (None for free rows)
+        self.node_ids: List[Optional[Hashable]] = []
+        self._free: List[int] = []
+        # Sets collecting rows written since they were handed out by watch()
+        self._watchers: List[Set[int]] = []
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, node_id: Hashable) -> bool:
+        return node_id in self.index
+
+    @property
+    def n_rows(self) -> int:
+        """Rows in use or freed; ``matrix[:n_rows]`` covers every stored node."""
+        return len(self.node_ids)
+
+    def _grow(self, rows: int):
+        if rows <= len(self.matrix):
+            return
+        size = max(rows, 2 * len(self.matrix))
+        grown = np.full((size, len(self.traits)), np.nan, dtype=np.float32)
+        grown[:len(self.matrix)] = self.matrix
+        self.matrix = grown
+
+    def row(self, node_id: Hashable) -> int:
+        """Row of ``node_id``, allocating one if the node is new."""
+        row = self.index.get(node_id)
+        if row is not None:
+            return row
+        if self._free:
+            row = self._free.pop()
+            self.node_ids[row] = node_id
+        else:
+            row = len(self.node_ids)
+            self._grow(row + 1)
+            self.node_ids.append(node_id)
+        self.index[node_id] = row
+        return row
+
+    def rows(self, node_ids: Iterable[Hashable]) -> np.ndarray:
+        return np.fromiter((self.row(n) for n in node_ids), dtype=np.int64)
+
+    def watch(self) -> Set[int]:
+        """
+        Return a set that collects every row written from now on.
+
+        Used by derived indexes (e.g. :class:`~.query.TraitIndex`) to find
+        stale entries; the caller may clear it. Writes made directly to
+        :attr:`matrix` are not seen.
+        """
+        changed: Set[int] = set()
+        self._watchers.append(changed)
+        return changed
+
+    def unwatch(self, changed: Set[int]):
+        self._watchers = [w for w in self._watchers if w is not changed]
+
+    def _touch(self, rows: Iterable[int]):
+        for changed in self._watchers:
+            changed.update(rows)
+
+    def assign(self, node_ids: Sequence[Hashable], values: np.ndarray):
+        """Bulk-assign a (len(node_ids), traits) array, columns in :attr:`traits` order."""
+        rows = self.rows(node_ids)
+        self.matrix[rows] = np.asarray(values, dtype=np.float32)
+        if self._watchers:
+            self._touch(rows.tolist())
+
+    def update(self, personality: Dict[Hashable, Dict[str, float]]):
+        """Assign ``{node_id: {trait: score}}`` as returned by ``PersonalityEstimator``."""
+        if not personality:
+            return
+        node_ids = list(personality)
+        values = np.full((len(node_ids), len(self.traits)), np.nan, dtype=np.float32)
+        for i, node_id in enumerate(node_ids):
+            for trait, score in personality[node_id].items():
+                col = self.trait_index.get(trait)
+                if col is not None:
+                    values[i, col] = score
+        rows = self.rows(node_ids)
+        current = self.matrix[rows]
+        # Traits not given for a node keep their previous value
+        self.matrix[rows] = np.where(np.isnan(values), current, values)
+        if self._watchers:
+            self._touch(rows.tolist())
+
+    def get(self, node_id: Hashable) -> Optional[Dict[str, float]]:
+        """Scores of one node, or ``None`` if it has none."""
+        row = self.index.get(node_id)
+        if row is None:
+            return None
+        values = self.matrix[row]
+        return {trait: float(v) for trait, v in zip(self.traits, values) if not np.isnan(v)}
+
+    def read(self, node_ids: Sequence[Hashable]) -> np.ndarray:
+        """Scores of many nodes as an array; unknown nodes get NaN rows."""
+        out = np.full((len(node_ids), len(self.traits)), np.nan, dtype=np.float32)
+        found = [(i, self.index[n]) for i, n in enumerate(node_ids) if n in self.index]
+        if found:
+            positions, rows = zip(*found)
+            out[list(positions)] = self.matrix[list(rows)]
+        return out
+
+    def column(self, trait: str) -> np.ndarray:
+        """View of one trait over all rows (``n_rows`` long)."""
+        return self.matrix[:self.n_rows, self.trait_index[trait]]
+
+    def remove(self, node_id: Hashable):
+        row = self.index.pop(node_id, None)
+        if row is None:
+            return
+        self.matrix[row] = np.nan
+        self.node_ids[row] = None
+        self._free.append(row)
+        self._touch((row,))
+
+    def attributes(self, node_id: Hashable) -> Dict[str, float]:
+        """Compatibility view in the old ``trait_<name>`` attribute format."""
+        return {f"trait_{trait}": score for trait, score in (self.get(node_id) or {}).items()}
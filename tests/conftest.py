@@ -0,0 +1,34 @@
+import pytest
+import spacy
+from spacy.language import Language
+from src.kg_personality import nlp_registry
+
+# Extra patterns so a blank pipeline finds people and orgs without a trained NER
+OFFLINE_PATTERNS = nlp_registry.ENTITY_PATTERNS + [
+    {"label": "PERSON", "pattern": "Ana"},
+    {"label": "PERSON", "pattern": "Bo"},
+    {"label": "ORG", "pattern": "Acme"},
+    {"label": "ORG", "pattern": "Google"},
+    {"label": "ORG", "pattern": "Alphabet"},
+]
+
+
+@Language.component("test_suffix_lemmas")
+def suffix_lemmas(doc):
+    # Tiny stand-in lemmatizer so tests run without a trained model
+    for token in doc:
+        token.lemma_ = token.lower_[:-1] if token.lower_.endswith("s") else token.lower_
+    return doc
+
+
+def make_offline_nlp():
+    nlp = spacy.blank("en")
+    nlp.add_pipe("sentencizer")
+    nlp.add_pipe("test_suffix_lemmas")
+    nlp_registry.add_entity_ruler(nlp, OFFLINE_PATTERNS)
+    return nlp
+
+
+@pytest.fixture
+def offline_nlp():
+    return make_offline_nlp()
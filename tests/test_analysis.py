@@ -0,0 +1,31 @@
+from src.kg_personality.analysis import DocumentAnalyzer
+from src.kg_personality.kg_builder import KGBuilder
+from src.kg_personality.personality import PersonalityEstimator
+
+TEXT = "Ana works at Acme. She is creative and organized."
+
+
+def test_single_parse_feeds_graph_and_scores(offline_nlp):
+    pe = PersonalityEstimator(nlp=offline_nlp)
+    analysis = DocumentAnalyzer(estimator=pe, nlp=offline_nlp).analyze(TEXT, source_id="a1")
+
+    assert [(e[0], e[1]) for e in analysis.entities] == [("Ana", "PERSON"), ("Acme", "ORG"),
+                                                          ("creative", "TRAIT")]
+    assert analysis.sentences == [(0, 18), (19, len(TEXT))]
+    assert analysis.trait_counts.tolist() == [1, 1, 0, 0, 0]
+    assert analysis.trait_hits[:, 0].tolist() == [TEXT.index("creative"), TEXT.index("organized")]
+
+    kg = KGBuilder(nlp=offline_nlp)
+    G = kg.add_analysis(analysis)
+    reference = KGBuilder(nlp=offline_nlp).build_from_text(TEXT, source_id="a1")
+    assert dict(G.nodes(data=True)) == dict(reference.nodes(data=True))
+
+    assert pe.estimate_from_analyses([analysis]) == [pe.estimate_traits(TEXT)]
+
+
+def test_analyze_corpus_is_lazy(offline_nlp):
+    analyzer = DocumentAnalyzer(nlp=offline_nlp)
+    docs = ((f"d{i}", TEXT) for i in range(3))
+    stream = analyzer.analyze_corpus(docs, batch_size=2)
+    assert next(stream).source_id == "d0"
+    assert [a.source_id for a in stream] == ["d1", "d2"]
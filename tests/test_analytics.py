@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from src.kg_personality.analytics import GraphMatrices, aggregate_traits, propagate_traits
+from src.kg_personality.kg_builder import KGBuilder
+
+
+def company_graph(seed=0):
+    kg = KGBuilder(nlp=object(), trait_attributes=False)
+    rng = np.random.default_rng(seed)
+    people = [f"PERSON:p{i}" for i in range(30)]
+    orgs = [f"ORG:o{i}" for i in range(4)]
+    kg.graph.add_nodes_from((n, {"label": "PERSON"}) for n in people)
+    kg.graph.add_nodes_from((n, {"label": "ORG"}) for n in orgs)
+    kg.graph.add_node("ORG:empty", label="ORG")
+    for i, person in enumerate(people):
+        kg.add_relation(person, orgs[i % 4], "works_at", {"count": int(rng.integers(1, 4))})
+        if i:
+            kg.add_relation(person, people[i - 1], "knows")
+    # p29 is unscored, p0 has one trait missing
+    scores = rng.random((29, 5))
+    scores[0, 2] = np.nan
+    kg.merge_trait_matrix(people[:29], scores)
+    return kg, people, orgs
+
+
+def loop_mean(kg, node, rel_type, weight=None):
+    """Reference networkx-loop implementation."""
+    totals, mass = np.zeros(5), np.zeros(5)
+    for src, _, attrs in kg.graph.in_edges(node, data=True):
+        if attrs.get("type") != rel_type:
+            continue
+        scores = kg.traits.read([src])[0].astype(np.float64)
+        w = attrs.get(weight, 1) if weight else 1
+        known = ~np.isnan(scores)
+        totals[known] += w * scores[known]
+        mass[known] += w
+    return np.where(mass > 0, totals / np.where(mass > 0, mass, 1), np.nan)
+
+
+@pytest.mark.parametrize("weighted", [False, True])
+def test_aggregate_matches_networkx_loop(weighted):
+    kg, people, orgs = company_graph()
+    matrices = GraphMatrices.from_builder(kg, edge_weight="count")
+    assert set(matrices.adjacency) == {"works_at", "knows"}
+    assert matrices.relation("works_at").nnz == 30 and matrices.traits.shape == (35, 5)
+
+    values = matrices.aggregate("works_at", weighted=weighted)
+    for org in orgs:
+        np.testing.assert_allclose(values[matrices.index[org]],
+                                   loop_mean(kg, org, "works_at", "count" if weighted else None))
+    assert np.isnan(values[matrices.index["ORG:empty"]]).all()
+
+    # Outgoing: each person gets the (unscored) org's mean -> NaN
+    assert np.isnan(matrices.aggregate("works_at", direction="out")).all()
+    with pytest.raises(ValueError):
+        matrices.aggregate("works_at", direction="both")
+
+
+def test_propagate_matches_dense_reference():
+    kg, people, orgs = company_graph()
+    matrices = GraphMatrices.from_builder(kg)
+    smoothed = matrices.propagate(hops=3, alpha=0.4)
+
+    adjacency = np.zeros((35, 35))
+    for u, v in kg.graph.edges:
+        adjacency[matrices.index[u], matrices.index[v]] += 1
+    adjacency += adjacency.T
+    transition = adjacency / np.maximum(adjacency.sum(axis=1, keepdims=True), 1)
+    known = ~np.isnan(matrices.traits)
+    values = np.where(known, matrices.traits, 0)
+    totals, mass = np.zeros_like(values), np.zeros_like(values)
+    for h in range(4):
+        step = np.linalg.matrix_power(transition, h) * 0.4 ** h
+        totals += step @ values
+        mass += step @ known
+    with np.errstate(invalid="ignore"):
+        np.testing.assert_allclose(smoothed, totals / mass)
+
+    # Scored nodes keep most of their own profile, unscored ones get their neighbours'
+    p5 = matrices.index["PERSON:p5"]
+    assert np.abs(smoothed[p5] - matrices.traits[p5]).max() < 0.5
+    assert not np.isnan(smoothed[matrices.index["PERSON:p29"]]).any()
+    assert np.isnan(smoothed[matrices.index["ORG:empty"]]).all()
+
+
+def test_results_are_written_back_as_attributes():
+    kg, people, orgs = company_graph()
+    means = aggregate_traits(kg, "works_at", label="ORG")
+    assert set(means) == set(orgs)
+    assert kg.graph.nodes[orgs[0]]["works_at_mean_openness"] == pytest.approx(means[orgs[0]]["openness"])
+    assert "works_at_mean_openness" not in kg.graph.nodes["ORG:empty"]
+
+    smoothed = propagate_traits(kg, ["knows"], hops=1, prefix="peer_")
+    assert "ORG:o0" not in smoothed and "PERSON:p29" in smoothed
+    assert set(kg.graph.nodes["PERSON:p29"]) >= {"peer_openness", "peer_neuroticism"}
@@ -0,0 +1,117 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from src.kg_personality.async_integration import AsyncGroqAPIIntegrator, TokenBucket, percentile
+
+SCORES = {"openness": 0.9, "conscientiousness": 0.8, "extraversion": 0.1,
+          "agreeableness": 0.6, "neuroticism": 0.2}
+
+
+class FakeGroqHandler(BaseHTTPRequestHandler):
+    """Minimal stand-in for the Groq chat completions endpoint."""
+    fail_first = 0
+    calls = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with self.lock:
+            type(self).calls += 1
+            fail = type(self).calls <= self.fail_first
+        if fail:
+            payload, status = {"error": {"message": "rate limited", "type": "rate_limit"}}, 429
+        else:
+            payload, status = {
+                "id": "fake", "object": "chat.completion", "created": 0, "model": body["model"],
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": json.dumps(SCORES)}}],
+            }, 200
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_endpoint():
+    FakeGroqHandler.calls = 0
+    FakeGroqHandler.fail_first = 2
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeGroqHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def test_bulk_analysis_against_fake_endpoint(fake_endpoint):
+    async def run():
+        api = AsyncGroqAPIIntegrator(api_key="test", base_url=fake_endpoint, max_in_flight=4,
+                                     requests_per_minute=6000, backoff_base=0.01, latency_window=4)
+        try:
+            results = await api.analyze_texts_async([f"text {i}" for i in range(10)])
+        finally:
+            await api.aclose()
+        return api, results
+
+    api, results = asyncio.run(run())
+    assert results == [SCORES] * 10
+    stats = api.stats
+    assert stats["retries"] == 2
+    assert stats["completed"] == 10 and len(api.latencies) == 4
+    assert stats["failures"] == 0
+    assert stats["p99_s"] >= stats["p50_s"] > 0
+
+
+def test_enhance_many_with_base_scores():
+    class Completions:
+        async def create(self, **kwargs):
+            message = type("M", (), {"content": json.dumps(SCORES)})
+            return type("R", (), {"choices": [type("C", (), {"message": message})]})
+
+    client = type("Client", (), {"chat": type("Chat", (), {"completions": Completions()})})
+    api = AsyncGroqAPIIntegrator(client=client)
+    base = [{trait: 0.5 for trait in SCORES}]
+    enhanced = asyncio.run(api.enhance_many(["text"], base_scores=base))
+    assert enhanced[0]["openness"] == pytest.approx(0.7)
+
+
+def test_integrator_is_reusable_across_event_loops():
+    class Completions:
+        async def create(self, **kwargs):
+            await asyncio.sleep(0.001)
+            message = type("M", (), {"content": json.dumps(SCORES)})
+            return type("R", (), {"choices": [type("C", (), {"message": message})]})
+
+    client = type("Client", (), {"chat": type("Chat", (), {"completions": Completions()})})
+    # One request in flight and a one-request burst, so both the semaphore and the limiter lock are contended
+    api = AsyncGroqAPIIntegrator(client=client, max_in_flight=1, requests_per_minute=60000)
+    api.request_limiter.capacity = 1
+    for _ in range(2):
+        assert asyncio.run(api.analyze_texts_async(["a", "b", "c"])) == [SCORES] * 3
+    assert api.stats["completed"] == 6
+
+
+def test_token_bucket_limits_rate():
+    async def run():
+        bucket = TokenBucket(per_minute=600, capacity=1)  # 10 per second
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for _ in range(4):
+            await bucket.acquire()
+        return loop.time() - start
+
+    assert asyncio.run(run()) >= 0.25
+
+
+def test_percentile():
+    assert percentile([3, 1, 2, 4], 50) == 2
+    assert percentile(list(range(1, 101)), 99) == 99
+    assert percentile([], 99) == 0.0
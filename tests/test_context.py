@@ -0,0 +1,55 @@
+from src.kg_personality.analysis import DocumentAnalyzer
+from src.kg_personality.kg_builder import KGBuilder
+from src.kg_personality.personality import PersonalityEstimator
+from src.kg_personality.resolution import EntityResolver
+
+TEXT = "Ana is creative and organized. Bo is worried at Acme."
+
+
+def test_context_index_spans(offline_nlp):
+    kg = KGBuilder(nlp=offline_nlp)
+    kg.build_from_text(TEXT, source_id="c1")
+    spans = kg.contexts.spans["c1"].tolist()
+    assert kg.contexts.node_ids["c1"] == ["c1_ent_0", "c1_ent_1", "c1_ent_2", "c1_ent_3"]
+    # Ana, creative (TRAIT), Bo, Acme
+    assert spans[0] == [0, 3, 0, 30]
+    assert spans[2] == [31, 33, 31, len(TEXT)]
+    assert kg.contexts.windows("c1", window=4).tolist()[0] == [0, 7]
+
+
+def test_entities_scored_from_their_own_sentence(offline_nlp):
+    pe = PersonalityEstimator(nlp=offline_nlp)
+    kg = KGBuilder(nlp=offline_nlp)
+    kg.add_analysis(DocumentAnalyzer(estimator=pe, nlp=offline_nlp).analyze(TEXT, "c1"))
+
+    scores = pe.estimate_for_entities(["c1_ent_0", "c1_ent_2", "missing"], contexts=kg.contexts)
+    assert scores["c1_ent_0"] == pe.estimate_traits("Ana is creative and organized.")
+    assert scores["c1_ent_2"] == pe.estimate_traits("Bo is worried at Acme.")
+    assert scores["missing"] == {trait: 0.5 for trait in pe.traits}
+
+
+def test_graph_built_from_text_is_scored(offline_nlp):
+    pe = PersonalityEstimator(nlp=offline_nlp)
+    kg = KGBuilder(nlp=offline_nlp)
+    kg.build_from_text(TEXT, source_id="c1")
+    kg.build_from_corpus([("c2", "Ana is creative and innovative.")])
+
+    scores = pe.estimate_from_contexts(kg.contexts)
+    assert scores["c1_ent_0"] == pe.estimate_traits("Ana is creative and organized.")
+    assert scores["c1_ent_2"] == pe.estimate_traits("Bo is worried at Acme.")
+    assert scores["c2_ent_0"]["openness"] == 2 / 3
+
+
+def test_docs_without_stored_hits_and_canonical_sum(offline_nlp):
+    pe = PersonalityEstimator(nlp=offline_nlp)
+    kg = KGBuilder(nlp=offline_nlp, resolver=EntityResolver())
+    texts = {"c1": "Ana is creative.", "c2": "Ana is worried."}
+    docs = {source_id: offline_nlp(text) for source_id, text in texts.items()}
+    for source_id, text in texts.items():
+        kg.build_from_text(text, source_id)
+    assert pe.estimate_from_contexts(kg.contexts)["PERSON:ana"]["openness"] == 1 / 3
+
+    kg.contexts.hits.clear()  # e.g. contexts recorded elsewhere; Docs are passed instead
+    assert pe.estimate_from_contexts(kg.contexts)["PERSON:ana"]["openness"] == 0.5
+    scores = pe.estimate_for_entities(["PERSON:ana"], contexts=kg.contexts, docs=docs)
+    assert scores["PERSON:ana"]["openness"] == scores["PERSON:ana"]["neuroticism"] == 1 / 3
@@ -0,0 +1,47 @@
+import json
+
+import pytest
+from src.kg_personality.data_generator import (CorpusGenerator, read_jsonl_corpus,
+                                               synthesize_vocabulary, write_sharded_corpus)
+
+
+def test_vocabulary_is_sized_and_reproducible():
+    vocab = synthesize_vocabulary(500, seed=3)
+    assert len(vocab.names) == len(set(vocab.names)) == 500
+    assert len(vocab.organizations) == 50
+    assert vocab == synthesize_vocabulary(500, seed=3)
+    assert vocab.names != synthesize_vocabulary(500, seed=4).names
+    assert ("creative", "openness") in vocab.traits
+
+
+@pytest.mark.parametrize("distribution", ["fixed", "uniform", "poisson", "pareto"])
+def test_documents_and_ground_truth(distribution):
+    gen = CorpusGenerator(vocab_size=200, seed=1, distribution=distribution, mean_people=12,
+                          max_people=30)
+    docs = list(gen.documents(20))
+    counts = [len(truth["people"]) for _, _, truth in docs]
+    assert all(1 <= c <= 30 for c in counts)
+    if distribution == "fixed":
+        assert set(counts) == {12}
+    for _, text, truth in docs:
+        for person in truth["people"]:
+            assert person["name"] in text and person["org"] in text
+            assert f"{person['trait_word']}" in text
+            assert [person["name"], "exhibits", person["trait_word"]] in truth["relations"]
+
+
+def test_documents_do_not_depend_on_how_the_corpus_is_split():
+    gen = CorpusGenerator(vocab_size=100, seed=7, zipf_exponent=1.2)
+    whole = list(gen.corpus(10))
+    assert whole[5:] == list(CorpusGenerator(vocab_size=100, seed=7, zipf_exponent=1.2).corpus(5, start=5))
+
+
+def test_sharded_corpus(tmp_path):
+    manifest = write_sharded_corpus(tmp_path, 25, n_shards=3, processes=2, vocab_size=50, seed=2)
+    shards = manifest["shards"]
+    assert [s["count"] for s in shards] == [8, 8, 9]
+    docs = list(read_jsonl_corpus([tmp_path / s["docs"] for s in shards]))
+    assert docs == list(CorpusGenerator(vocab_size=50, seed=2).corpus(25))
+    truth = [json.loads(line) for s in shards for line in (tmp_path / s["truth"]).open()]
+    assert [t["id"] for t in truth] == [d[0] for d in docs]
+    assert json.loads((tmp_path / "manifest.json").read_text())["people"] == manifest["people"]
@@ -0,0 +1,81 @@
+import json
+import sys
+
+import networkx as nx
+import pytest
+
+from src.kg_personality import export
+from src.kg_personality.export import collapse_graph, export_html, export_ndjson, select_nodes
+from src.kg_personality.kg_builder import KGBuilder
+
+
+def star_graph():
+    G = nx.DiGraph()
+    G.add_node("hub", label="PERSON", text="Ana")
+    for i in range(20):
+        G.add_node(f"s{i}", label="SKILL" if i % 2 else "ORG", text=f"s{i}")
+        G.add_edge("hub", f"s{i}", type="has_skill")
+    G.add_edge("s1", "s3", type="related")
+    return G
+
+
+def test_select_nodes_top_k_sample_and_cap():
+    G = star_graph()
+    assert select_nodes(G, top_k=3)[:3] == ["hub", "s1", "s3"]
+    assert len(select_nodes(G, sample=5, seed=1)) == 5
+    assert select_nodes(G, sample=5, seed=1) == select_nodes(G, sample=5, seed=1)
+    assert select_nodes(G, max_nodes=2) == ["hub", "s1"]
+
+
+def test_collapse_by_label():
+    collapsed = collapse_graph(star_graph(), by="label")
+    assert collapsed.nodes["group:SKILL"]["size"] == 10
+    assert collapsed.edges["group:PERSON", "group:ORG"]["count"] == 10
+    assert not collapsed.has_edge("group:SKILL", "group:SKILL")
+    assert collapse_graph(star_graph(), by="community").number_of_nodes() >= 1
+
+
+def test_ndjson_stream(tmp_path):
+    path = tmp_path / "graph.ndjson"
+    stats = export_ndjson(star_graph(), path, top_k=4)
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    nodes = [line["node"] for line in lines if "node" in line]
+    edges = [line["edge"] for line in lines if "edge" in line]
+    assert stats["nodes"] == len(nodes) == 4 and stats["edges"] == len(edges) == 4
+    assert {e["to"] for e in edges} <= {n["id"] for n in nodes}
+
+
+def test_streaming_html_with_traits(tmp_path):
+    kg = KGBuilder(nlp=object())
+    kg.graph = star_graph()
+    kg.merge_personality(kg.graph, {"hub": {"openness": 0.5}})
+    out = tmp_path / "graph.html"
+    kg.export_to_html(str(out), streaming=True, chunk_size=8)
+
+    html = out.read_text()
+    assert (tmp_path / "lib" / "vis-9.1.2" / "vis-network.min.js").exists()
+    assert html.count("<script>nodes.add(") == 3
+    assert 'src="lib/vis-9.1.2/vis-network.min.js"' in html
+    assert "Openness: 0.50" in html
+    stats = export_html(star_graph(), out, max_edges=5)
+    assert stats["edges"] == 5
+
+
+def test_streaming_html_without_vendored_assets_uses_cdn(tmp_path, monkeypatch):
+    monkeypatch.setattr(export, "VIS_ASSETS", tmp_path / "missing" / "vis-9.1.2")
+    out = tmp_path / "graph.html"
+    export_html(star_graph(), out)
+    html = out.read_text()
+    assert f'src="{export.VIS_CDN["vis-network.min.js"]}"' in html
+    assert f'href="{export.VIS_CDN["vis-network.css"]}"' in html
+    assert not (tmp_path / "lib").exists()
+
+
+def test_pyvis_export_without_pyvis_raises(tmp_path, monkeypatch):
+    kg = KGBuilder(nlp=object())
+    kg.graph = star_graph()
+    monkeypatch.setitem(sys.modules, "pyvis", None)
+    monkeypatch.setitem(sys.modules, "pyvis.network", None)
+    with pytest.raises(ImportError, match="pip install pyvis"):
+        kg.export_to_html(str(tmp_path / "graph.html"), streaming=False)
+    assert not (tmp_path / "graph.html").exists()
@@ -0,0 +1,78 @@
+from src.kg_personality.analysis import DocumentAnalyzer
+from src.kg_personality.kg_builder import KGBuilder
+from src.kg_personality.personality import PersonalityEstimator
+from src.kg_personality.resolution import EntityResolver
+
+
+def snapshot(graph):
+    return sorted(graph.nodes(data=True)), sorted(graph.edges(data=True))
+
+
+def rebuilt(offline_nlp, docs, **kwargs):
+    kg = KGBuilder(nlp=offline_nlp, **kwargs)
+    for source_id, text in docs.items():
+        kg.build_from_text(text, source_id)
+    kg.add_relationships()
+    return kg
+
+
+def test_upsert_matches_full_rebuild(offline_nlp):
+    kg = KGBuilder(nlp=offline_nlp)
+    kg.upsert_document("d1", "Ana knows python at Acme.")
+    kg.upsert_document("d2", "Bo is creative.")
+    kg.upsert_document("d1", "Ana joined Google.")
+    assert snapshot(kg.graph) == snapshot(rebuilt(offline_nlp, {
+        "d1": "Ana joined Google.", "d2": "Bo is creative."}).graph)
+
+    kg.merge_personality(kg.graph, {"d2_ent_0": {"openness": 0.9}})
+    kg.remove_document("d2")
+    assert "d2" not in kg.graph and "d2_ent_0" not in kg.graph
+    assert "d2_ent_0" not in kg.traits and "d2" not in kg.contexts
+    assert snapshot(kg.graph) == snapshot(rebuilt(offline_nlp, {"d1": "Ana joined Google."}).graph)
+
+
+def test_canonical_counts_and_shared_relations(offline_nlp):
+    resolver = EntityResolver()
+    kg = KGBuilder(nlp=offline_nlp, resolver=resolver, trait_attributes=False)
+    kg.upsert_document("d1", "Ana works at Acme.")
+    kg.upsert_document("d2", "Ana joined Acme and knows python.")
+    kg.merge_personality(kg.graph, {"PERSON:ana": {"openness": 0.5}})
+
+    kg.remove_document("d1")
+    G = kg.graph
+    assert G.nodes["PERSON:ana"]["count"] == 1
+    # Still inferred from d2
+    assert G.edges["PERSON:ana", "ORG:acme"]["type"] == "works_at"
+    assert kg.node_traits("PERSON:ana")["openness"] == 0.5
+
+    # Edit d2 so Acme is no longer mentioned
+    kg.upsert_document("d2", "Ana knows python.")
+    assert "ORG:acme" not in G and not G.has_edge("PERSON:ana", "ORG:acme")
+    assert kg.node_traits("PERSON:ana")["openness"] == 0.5
+    assert snapshot(G) == snapshot(rebuilt(offline_nlp, {"d2": "Ana knows python."},
+                                           resolver=EntityResolver()).graph)
+
+    kg.remove_document("d2")
+    assert G.number_of_nodes() == 0 and len(resolver) == 0 and len(kg.traits) == 0
+
+
+def test_upsert_keeps_context_scores(offline_nlp):
+    pe = PersonalityEstimator(nlp=offline_nlp)
+    analyzer = DocumentAnalyzer(estimator=pe, nlp=offline_nlp)
+    docs = {"d1": "Ana is creative and imaginative at Acme.", "d2": "Bo is worried."}
+    kg = KGBuilder(nlp=offline_nlp, resolver=EntityResolver())
+    kg.build_from_analyses(analyzer.analyze(text, source_id) for source_id, text in docs.items())
+    before = pe.estimate_from_contexts(kg.contexts)
+    assert before["PERSON:ana"]["openness"] > 0.5
+
+    # Re-adding the same text, as text or as an analysis, changes nothing
+    kg.upsert_document("d1", docs["d1"])
+    assert pe.estimate_from_contexts(kg.contexts) == before
+    kg.upsert_document("d2", analyzer.analyze(docs["d2"], "d2"))
+    assert pe.estimate_from_contexts(kg.contexts) == before
+
+    docs["d1"] = "Ana is organized and creative."
+    kg.upsert_document("d1", docs["d1"])
+    expected = pe.estimate_from_contexts(rebuilt(offline_nlp, docs, resolver=EntityResolver()).contexts)
+    assert pe.estimate_from_contexts(kg.contexts) == expected
+    assert expected["PERSON:ana"]["conscientiousness"] == expected["PERSON:ana"]["openness"] == 1 / 3
@@ -0,0 +1,101 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from src.kg_personality import instrumentation
+from src.kg_personality.api_integration import GroqAPIIntegrator, config
+from src.kg_personality.instrumentation import DictSink, Histogram, JSONLogSink, PrometheusTextSink
+from src.kg_personality.kg_builder import KGBuilder
+from src.kg_personality.llm_cache import TraitScoreCache
+
+DOCS = [("d1", "Ana is creative. Ana joined Acme."), ("d2", "Bo knows python at Google.")]
+
+
+@pytest.fixture
+def metrics():
+    m = instrumentation.enable()
+    yield m
+    instrumentation.disable()
+    m.reset()
+    m.sinks.clear()
+    m.profiled.clear()
+
+
+class ReplyClient:
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, **kwargs):
+        content = self.replies.pop(0)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def test_disabled_by_default_records_nothing(offline_nlp):
+    assert not instrumentation.is_enabled()
+    assert instrumentation.stage("kg.parse") is instrumentation.stage("other")
+    KGBuilder(nlp=offline_nlp).build_from_corpus(DOCS)
+    assert instrumentation.snapshot()["counters"] == {}
+
+
+def test_pipeline_counters_and_stages(offline_nlp, metrics):
+    kg = KGBuilder(nlp=offline_nlp)
+    kg.build_from_corpus(DOCS)
+    kg.add_relationships()
+    snap = instrumentation.snapshot()
+
+    assert snap["counters"]["documents"] == 2
+    assert snap["counters"]["entities"] == 7
+    assert snap["counters"]["tokens"] == sum(len(offline_nlp(t)) for _, t in DOCS)
+    # 7 mentions edges + 6 document-scoped relations (both Ana mentions relate to Acme and creative)
+    assert snap["counters"]["edges"] == 13
+    assert snap["stages"]["kg.parse"]["count"] == 1
+    assert snap["stages"]["kg.build_from_corpus"]["sum"] >= snap["stages"]["kg.parse"]["sum"]
+    assert "kg.add_relationships" in snap["stages"]
+
+
+def test_llm_counters(tmp_path, monkeypatch, metrics):
+    monkeypatch.setattr(config, "STREAM", False)
+    api = GroqAPIIntegrator(client=ReplyClient(['{"openness": 0.4}', "no scores"]),
+                            cache=TraitScoreCache(tmp_path / "c.sqlite"), personality_estimator=object())
+    api.analyze_text_with_llm("Ana is creative.")
+    api.analyze_text_with_llm("Ana is creative.")
+    api.analyze_text_with_llm("Bo is worried.")
+    snap = instrumentation.snapshot()
+    assert snap["counters"]["llm_calls"] == 2
+    assert snap["counters"]["llm_cache_hits"] == 1
+    assert snap["counters"]["llm_parse_failures"] == 1
+    assert snap["histograms"]["llm_latency_seconds"]["count"] == 2
+
+
+def test_histogram_quantiles():
+    hist = Histogram(buckets=(1, 2, 4))
+    for value in (0.5, 1.5, 1.5, 3, 10):
+        hist.observe(value)
+    data = hist.to_dict()
+    assert data["buckets"] == {"1": 1, "2": 2, "4": 1, "+Inf": 1}
+    assert data["min"] == 0.5 and data["max"] == 10
+    assert 1 <= hist.quantile(0.5) <= 2
+    assert hist.quantile(1.0) == 10
+
+
+def test_sinks_and_profiling(tmp_path, offline_nlp, metrics):
+    sink = DictSink()
+    instrumentation.enable(sinks=[sink, JSONLogSink(tmp_path / "m.jsonl"),
+                                  PrometheusTextSink(tmp_path / "m.prom")],
+                           profile={"kg.add_relationships": "both"})
+    kg = KGBuilder(nlp=offline_nlp)
+    kg.build_from_corpus(DOCS)
+    kg.add_relationships()
+    instrumentation.incr("llm_calls", 3)
+    instrumentation.flush()
+
+    assert sink.last["counters"]["llm_calls"] == 3
+    logged = json.loads((tmp_path / "m.jsonl").read_text().splitlines()[-1])
+    assert logged["counters"] == sink.last["counters"]
+    prom = (tmp_path / "m.prom").read_text()
+    assert "kg_llm_calls_total 3" in prom
+    assert 'kg_stage_seconds_count{stage="kg.parse"} 1' in prom
+    assert 'kg_stage_seconds_bucket{stage="kg.parse",le="+Inf"} 1' in prom
+    assert "infer" in metrics.profile_report("kg.add_relationships")
+    assert "kg.add_relationships" in metrics.memory_peaks
@@ -0,0 +1,84 @@
+import pytest
+import spacy
+
+from src.kg_personality import data_generator, nlp_registry
+from src.kg_personality.lexicon import LexiconMatcher, LexiconRuler, lexicon_files
+from src.kg_personality.personality import PersonalityEstimator
+
+
+def write_lexicons(tmp_path):
+    (tmp_path / "skill.txt").write_text("# skills\nMachine Learning\nmachine learning systems\nC++\n\nGo\n")
+    (tmp_path / "title.txt").write_text("Staff Engineer\nEngineer\n")
+    return tmp_path
+
+
+def test_generator_vocabulary_is_recognized(offline_nlp):
+    nlp_registry.add_lexicon_ruler(offline_nlp)
+    nlp_registry.add_lexicon_ruler(offline_nlp)
+    assert offline_nlp.pipe_names.count("lexicon_ruler") == 1
+    for skill in data_generator.SKILLS:
+        doc = offline_nlp(f"Ana works on {skill} at Acme.")
+        assert (skill, "SKILL") in [(e.text, e.label_) for e in doc.ents]
+    for trait in data_generator.TRAITS:
+        doc = offline_nlp(f"Bo is {trait.upper()}.")
+        assert (trait.upper(), "TRAIT") in [(e.text, e.label_) for e in doc.ents]
+    # Entities found by the earlier entity_ruler are kept
+    assert [(e.text, e.label_) for e in offline_nlp("Ana knows python.").ents] == [
+        ("Ana", "PERSON"), ("python", "SKILL")]
+
+
+def test_estimator_skips_the_ruler(offline_nlp, monkeypatch):
+    nlp_registry.add_lexicon_ruler(offline_nlp)
+    calls = []
+    monkeypatch.setattr(LexiconRuler, "__call__", lambda self, doc: calls.append(doc) or doc)
+    pe = PersonalityEstimator(nlp=offline_nlp)
+    pe.estimate_traits("Ana is creative and knows python.")
+    pe.estimate_traits_batch(["Bo is organized."])
+    assert not calls
+
+
+def test_longest_match_and_labels_from_file_names(tmp_path):
+    nlp = spacy.blank("en")
+    matcher = LexiconMatcher.compile(nlp, write_lexicons(tmp_path))
+    assert len(matcher) == 6 and sorted(matcher.labels) == ["SKILL", "TITLE"]
+    doc = nlp("A staff engineer building machine learning systems in C++ and machine code, go.")
+    found = [(doc[s:e].text, label) for s, e, label in matcher.find(doc)]
+    assert found == [("staff engineer", "TITLE"), ("machine learning systems", "SKILL"),
+                     ("C++", "SKILL"), ("go", "SKILL")]
+    assert matcher.find(nlp("Nothing here.")) == [] and matcher.find(nlp("")) == []
+
+    exact = LexiconMatcher.compile(nlp, {"SKILL": tmp_path / "skill.txt"}, attr="ORTH")
+    assert [(s, e) for s, e, _ in exact.find(nlp("Go and go"))] == [(0, 1)]
+
+
+def test_cache_is_reused_until_lexicons_change(tmp_path, monkeypatch):
+    nlp = spacy.blank("en")
+    (tmp_path / "lex").mkdir()
+    lexicons = write_lexicons(tmp_path / "lex")
+    cache = tmp_path / "cache" / "lexicon.npz"
+    compiled = LexiconMatcher.load_or_compile(nlp, lexicons, cache)
+    assert cache.exists()
+
+    calls = []
+    monkeypatch.setattr(LexiconMatcher, "compile", classmethod(lambda *a, **k: calls.append(a)))
+    loaded = LexiconMatcher.load_or_compile(nlp, lexicons, cache)
+    assert not calls
+    doc = nlp("Machine learning systems for the staff engineer")
+    assert loaded.find(doc) == compiled.find(doc) and loaded.labels == compiled.labels
+    monkeypatch.undo()
+
+    (lexicons / "title.txt").write_text("Staff Engineer\nSystems\n")
+    changed = LexiconMatcher.load_or_compile(nlp, lexicons, cache)
+    assert changed.fingerprint != compiled.fingerprint
+    assert LexiconMatcher.load(cache).find(nlp("Systems")) == [(0, 1, "TITLE")]
+    assert set(lexicon_files(lexicons)) == {"SKILL", "TITLE"}
+
+
+def test_unreadable_cache_warns_and_is_rebuilt(tmp_path, capsys):
+    nlp = spacy.blank("en")
+    cache = tmp_path / "lexicon.npz"
+    cache.write_bytes(b"not an npz file")
+    with pytest.warns(UserWarning, match="unreadable lexicon cache"):
+        matcher = LexiconMatcher.load_or_compile(nlp, write_lexicons(tmp_path), cache)
+    assert capsys.readouterr().out == ""
+    assert LexiconMatcher.load(cache).fingerprint == matcher.fingerprint
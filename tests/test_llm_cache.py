@@ -0,0 +1,86 @@
+import json
+import multiprocessing
+import time
+from types import SimpleNamespace
+
+from src.kg_personality.api_integration import GroqAPIIntegrator, llm_cache_key
+from src.kg_personality.llm_cache import TraitScoreCache, cache_key
+
+SCORES = {"openness": 0.9, "conscientiousness": 0.8, "extraversion": 0.1,
+          "agreeableness": 0.6, "neuroticism": 0.2}
+
+
+class FakeClient:
+    """Streams a fixed JSON reply and counts requests."""
+
+    def __init__(self):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, **kwargs):
+        self.calls += 1
+        reply = json.dumps(SCORES)
+        return [SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=part))])
+                for part in (reply[:10], reply[10:])]
+
+
+def test_key_normalizes_whitespace_and_depends_on_settings():
+    assert cache_key("a  b\n", "m", 0.3, "1") == cache_key("a b", "m", 0.3, "1")
+    assert cache_key("a b", "m", 0.3, "1") != cache_key("a b", "m", 0.3, "2")
+    assert cache_key("a b", "m", 0.3, "1") != cache_key("a b", "other", 0.3, "1")
+
+
+def test_hits_misses_and_persistence(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    cache = TraitScoreCache(path)
+    assert cache.get("k") is None
+    cache.put("k", SCORES)
+    assert cache.get("k") == SCORES
+    assert cache.counters["memory_hits"] == 1
+    cache.close()
+
+    reopened = TraitScoreCache(path)
+    assert reopened.get("k") == SCORES
+    assert reopened.stats["hit_rate"] == 1.0
+
+
+def test_ttl_and_size_eviction(tmp_path):
+    cache = TraitScoreCache(tmp_path / "ttl.sqlite", ttl=0.05)
+    cache.put("k", SCORES)
+    time.sleep(0.1)
+    assert cache.get("k") is None
+    assert cache.counters["expired"] == 1
+
+    cache = TraitScoreCache(tmp_path / "size.sqlite", max_entries=5, memory_items=0)
+    for i in range(12):
+        cache.put(f"k{i}", SCORES)
+    assert len(cache) <= 5
+    assert cache.get("k11") == SCORES
+    assert cache.get("k0") is None
+
+
+def _writer(cache, start):
+    for i in range(start, start + 50):
+        cache.put(f"k{i}", SCORES)
+
+
+def test_concurrent_worker_processes(tmp_path):
+    cache = TraitScoreCache(tmp_path / "shared.sqlite")
+    cache.put("warm", SCORES)
+    workers = [multiprocessing.Process(target=_writer, args=(cache, n * 50)) for n in range(3)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    assert all(w.exitcode == 0 for w in workers)
+    assert len(cache) == 151
+
+
+def test_integrator_answers_cached_text_without_request(tmp_path):
+    client = FakeClient()
+    api = GroqAPIIntegrator(client=client, cache=TraitScoreCache(tmp_path / "api.sqlite"),
+                            personality_estimator=object())
+    assert api.analyze_text_with_llm("Ana is creative.") == SCORES
+    assert api.analyze_text_with_llm("Ana   is creative.") == SCORES
+    assert client.calls == 1
+    assert api.cache.get(llm_cache_key("Ana is creative.")) == SCORES
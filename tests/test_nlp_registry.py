@@ -0,0 +1,34 @@
+import spacy
+import pytest
+from src.kg_personality import nlp_registry
+from src.kg_personality.kg_builder import KGBuilder
+from src.kg_personality.personality import PersonalityEstimator
+
+
+@pytest.fixture
+def blank_nlp():
+    nlp = spacy.blank("en")
+    nlp_registry.add_entity_ruler(nlp)
+    nlp_registry.register(nlp)
+    yield nlp
+    nlp_registry.clear()
+
+
+def test_pipeline_shared_between_components(blank_nlp):
+    kg = KGBuilder()
+    pe = PersonalityEstimator()
+    assert kg.nlp is pe.nlp is nlp_registry.get_nlp() is blank_nlp
+
+
+def test_entity_ruler_added_once(blank_nlp):
+    nlp_registry.add_entity_ruler(blank_nlp)
+    assert blank_nlp.pipe_names.count("entity_ruler") == 1
+    ents = KGBuilder().extract_entities("She knows python and machine learning.")
+    assert ("python", "SKILL") in ents
+    assert ("machine learning", "SKILL") in ents
+
+
+def test_disabled_for_component_selection(blank_nlp):
+    blank_nlp.add_pipe("sentencizer")
+    assert nlp_registry.disabled_for(blank_nlp, enable=["sentencizer"]) == ["entity_ruler"]
+    assert nlp_registry.disabled_for(blank_nlp, disable=["entity_ruler", "parser"]) == ["entity_ruler"]
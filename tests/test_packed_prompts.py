@@ -0,0 +1,63 @@
+import json
+import re
+from types import SimpleNamespace
+
+from src.kg_personality.api_integration import (GroqAPIIntegrator, pack_texts,
+                                                parse_packed_scores)
+from src.kg_personality.personality import TRAITS
+
+
+class PackedFakeClient:
+    """Answers packed prompts; items whose text contains 'flaky' fail on first sight."""
+
+    def __init__(self):
+        self.requests = []
+        self.seen = set()
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, messages, **kwargs):
+        prompt = messages[0]["content"]
+        self.requests.append(prompt)
+        items = []
+        for i, text in re.findall(r"^\[(\d+)\] (.*)$", prompt, flags=re.M):
+            if "flaky" in text and text not in self.seen:
+                self.seen.add(text)
+                continue
+            value = int(re.search(r"\d+", text).group()) / 100
+            items.append({"id": int(i), **{t.capitalize(): value for t in TRAITS}})
+        reply = json.dumps(items)
+        if kwargs.get("stream"):
+            return [SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=reply))])]
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=reply))])
+
+
+def test_pack_texts_respects_budgets():
+    texts = ["x" * 40] * 10
+    packs = pack_texts(texts, max_prompt_tokens=10_000, max_completion_tokens=48 * 4)
+    assert [len(p) for p in packs] == [4, 4, 2]
+    packs = pack_texts(texts + ["y" * 100_000], max_prompt_tokens=400, max_completion_tokens=10_000)
+    assert packs[-1] == [10]
+    assert sum(len(p) for p in packs) == 11
+
+
+def test_parse_packed_scores_validates_items():
+    reply = 'Sure: [{"id": 0, "openness": 1.4, "conscientiousness": 0.2, "extraversion": 0,' \
+            ' "agreeableness": 0.5, "neuroticism": -1}, {"id": 1, "openness": "high"},' \
+            ' {"id": 7, "openness": 0.1}]'
+    parsed = parse_packed_scores(reply, 2)
+    assert list(parsed) == [0]
+    assert parsed[0]["openness"] == 1.0 and parsed[0]["neuroticism"] == 0.0
+    assert parse_packed_scores("not json", 2) == {}
+
+
+def test_only_failed_items_are_retried():
+    client = PackedFakeClient()
+    api = GroqAPIIntegrator(client=client, personality_estimator=object())
+    texts = [f"text {i}" for i in range(20)] + ["flaky 42"]
+    results = api.analyze_texts_packed(texts, max_completion_tokens=2048)
+
+    assert [r["openness"] for r in results] == [i / 100 for i in range(20)] + [0.42]
+    assert len(client.requests) == 2
+    assert "flaky 42" in client.requests[1] and "text 3" not in client.requests[1]
+    assert api.packing_stats["retried_items"] == 1
+    assert api.packing_stats["failed_items"] == 0
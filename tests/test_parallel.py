@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+from conftest import make_offline_nlp
+
+from src.kg_personality.analysis import DocumentAnalyzer
+from src.kg_personality.kg_builder import KGBuilder
+from src.kg_personality.parallel import build_parallel
+from src.kg_personality.personality import PersonalityEstimator
+from src.kg_personality.relations import RelationEngine
+from src.kg_personality.resolution import EntityResolver
+
+DOCS = [
+    ("d1", "Ana works at Acme. Ana is creative and kind."),
+    ("d2", "Bo knows python and joined Google."),
+    ("d3", "Ana's manager Bo is anxious at Acme."),
+    ("d4", "Nothing to see here."),
+    ("d5", "Bo is outgoing and organized at Alphabet."),
+]
+
+
+def snapshot(graph):
+    return sorted(graph.nodes(data=True)), sorted(graph.edges(data=True))
+
+
+def sequential(nlp, resolver=None):
+    kg = KGBuilder(nlp=nlp, resolver=resolver, trait_attributes=False)
+    estimator = PersonalityEstimator(nlp=nlp)
+    kg.build_from_analyses(DocumentAnalyzer(estimator=estimator, nlp=nlp).analyze_corpus(DOCS))
+    kg.add_relationships()
+    kg.merge_trait_matrix(*estimator.context_score_matrix(kg.contexts))
+    return kg
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+@pytest.mark.parametrize("canonical", [False, True])
+def test_parallel_matches_sequential(offline_nlp, processes, canonical):
+    expected = sequential(offline_nlp, EntityResolver() if canonical else None)
+    kg = build_parallel(DOCS, processes=processes, shard_size=2, nlp_factory=make_offline_nlp,
+                        resolver=EntityResolver() if canonical else None)
+
+    assert snapshot(kg.graph) == snapshot(expected.graph)
+    assert kg.ingest_stats["documents"] == len(DOCS) and kg.ingest_stats["shards"] == 3
+    ids = sorted(expected.traits.index)
+    assert ids
+    assert sorted(kg.traits.index) == ids
+    np.testing.assert_allclose(kg.traits.read(ids), expected.traits.read(ids))
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_parallel_keeps_mentions_and_contexts(offline_nlp, processes):
+    expected = sequential(offline_nlp, EntityResolver())
+    kg = build_parallel(DOCS, processes=processes, shard_size=2, nlp_factory=make_offline_nlp,
+                        resolver=EntityResolver())
+
+    assert kg.mentions == expected.mentions
+    assert kg.contexts.node_ids == expected.contexts.node_ids
+    for source_id, _ in DOCS:
+        np.testing.assert_array_equal(kg.contexts.spans[source_id], expected.contexts.spans[source_id])
+        np.testing.assert_array_equal(kg.contexts.hits[source_id], expected.contexts.hits[source_id])
+    estimator = PersonalityEstimator(nlp=offline_nlp)
+    node_ids, scores = estimator.context_score_matrix(kg.contexts)
+    np.testing.assert_allclose(scores, kg.traits.read(node_ids))
+
+    kg.add_relationships(sources=["d1", "d3"])
+    assert snapshot(kg.graph) == snapshot(expected.graph)
+
+
+def test_single_process_uses_the_builder_pipeline(offline_nlp, monkeypatch):
+    monkeypatch.setattr("src.kg_personality.nlp_registry.get_nlp",
+                        lambda *a, **k: pytest.fail("registry pipeline loaded"))
+    kg = build_parallel(DOCS, processes=1, score_traits=False, kg=KGBuilder(nlp=offline_nlp))
+    assert snapshot(kg.graph) == snapshot(sequential(offline_nlp).graph)
+
+
+def test_parallel_result_supports_incremental_updates(offline_nlp):
+    kg = KGBuilder(nlp=offline_nlp, resolver=EntityResolver())
+    build_parallel(DOCS, processes=1, shard_size=2, nlp_factory=make_offline_nlp,
+                   score_traits=False, kg=kg)
+    assert kg.graph.nodes["PERSON:ana"]["count"] == 3
+    kg.remove_document("d1")
+    assert kg.graph.nodes["PERSON:ana"]["count"] == 1
+    # Still inferred from d3
+    assert kg.graph.has_edge("PERSON:ana", "ORG:acme")
+    kg.remove_document("d3")
+    assert "PERSON:ana" not in kg.graph and "PERSON:ana" not in kg.resolver.index.values()
+
+
+def test_builder_relation_engine_is_used(offline_nlp):
+    docs = [("s1", "Ana is kind. Bo joined Acme.")]
+    kg = build_parallel(docs, processes=1, nlp_factory=make_offline_nlp, score_traits=False,
+                        kg=KGBuilder(nlp=offline_nlp, relation_engine=RelationEngine(scope="sentence")))
+    assert kg.graph.has_edge("s1_ent_1", "s1_ent_2")
+    # Document scope would also link Ana to Acme
+    assert not kg.graph.has_edge("s1_ent_0", "s1_ent_2")
@@ -0,0 +1,38 @@
+import numpy as np
+from src.kg_personality.personality import PersonalityEstimator
+from conftest import make_offline_nlp
+
+
+def estimator():
+    return PersonalityEstimator(nlp=make_offline_nlp())
+
+
+TEXTS = [
+    "She is creative and imaginative, and organized.",
+    "Nothing relevant here.",
+    "Anxious, nervous and worried but kind.",
+    "",
+]
+
+
+def test_batch_matches_per_text():
+    pe = estimator()
+    batch = pe.estimate_traits_batch(TEXTS, batch_size=2)
+    assert batch == [pe.estimate_traits(text) for text in TEXTS]
+    assert batch[1] == {trait: 0.5 for trait in pe.traits}
+
+
+def test_count_matrix_shape_and_keyword_recompile():
+    pe = estimator()
+    counts = pe.count_matrix(TEXTS)
+    assert counts.shape == (len(TEXTS), 5)
+    assert counts[0].tolist() == [2, 1, 0, 0, 0]
+
+    pe.trait_keywords["extraversion"].append("imaginative")
+    assert pe.count_matrix(TEXTS[:1])[0].tolist() == [2, 1, 1, 0, 0]
+
+
+def test_normalize_counts():
+    scores = PersonalityEstimator.normalize_counts(np.array([[3, 1, 0, 0, 0], [0] * 5]))
+    np.testing.assert_allclose(scores[0], [0.6, 0.2, 0, 0, 0])
+    np.testing.assert_allclose(scores[1], [0.5] * 5)
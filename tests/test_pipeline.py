@@ -94,3 +94,17 @@ def test_visualization_export(kg_builder, tmp_path):
     assert 'vis-network' in content  # Should contain vis.js network
     assert 'nodes' in content  # Should have nodes data
     assert 'edges' in content  # Should have edges data
+
+def test_build_from_corpus_matches_per_document():
+    docs = [(f"c{i}", generate_example(num_people=2)) for i in range(5)]
+    single = KGBuilder()
+    for source_id, text in docs:
+        single.build_from_text(text, source_id=source_id)
+
+    batched = KGBuilder()
+    G = batched.build_from_corpus(docs, batch_size=2)
+
+    assert dict(G.nodes(data=True)) == dict(single.graph.nodes(data=True))
+    assert set(G.edges()) == set(single.graph.edges())
+    assert batched.ingest_stats["documents"] == len(docs)
+    assert batched.ingest_stats["docs_per_sec"] > 0
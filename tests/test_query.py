@@ -0,0 +1,83 @@
+import numpy as np
+
+from src.kg_personality import query as query_module
+from src.kg_personality.kg_builder import KGBuilder
+from src.kg_personality.resolution import EntityResolver
+
+
+def build(offline_nlp):
+    kg = KGBuilder(nlp=offline_nlp, resolver=EntityResolver(), trait_attributes=False)
+    kg.upsert_document("d1", "Ana works at Acme and knows python.")
+    kg.upsert_document("d2", "Bo works at Acme.")
+    kg.upsert_document("d3", "Cy knows python at Google.")
+    kg.merge_personality(kg.graph, {
+        "PERSON:ana": {"conscientiousness": 0.8, "extraversion": 0.3},
+        "PERSON:bo": {"conscientiousness": 0.6, "extraversion": 0.9},
+    })
+    return kg
+
+
+def test_find_and_top_k(offline_nlp):
+    kg = build(offline_nlp)
+    # Cy is not in the offline patterns; add the person by hand
+    kg.add_entity("PERSON:cy", "PERSON", {"text": "Cy"})
+    kg.add_relation("PERSON:cy", "SKILL:python", "has_skill")
+    kg.merge_personality(kg.graph, {"PERSON:cy": {"extraversion": 0.7}})
+    q = kg.query
+
+    assert q.nodes("PERSON") == {"PERSON:ana", "PERSON:bo", "PERSON:cy"}
+    assert ("PERSON:ana", "ORG:acme") in q.edges("works_at")
+    assert sorted(q.neighbors("ORG:acme", "works_at", direction="in")) == ["PERSON:ana", "PERSON:bo"]
+    assert q.find(label="PERSON", related=[("works_at", "ORG:acme")],
+                  traits={"conscientiousness": (0.7, None)}) == ["PERSON:ana"]
+    assert q.top_k("extraversion", 1, label="PERSON", related=[("has_skill", "SKILL:python")]) == [
+        ("PERSON:cy", np.float32(0.7))]
+    assert [n for n, _ in q.top_k("extraversion", 2)] == ["PERSON:bo", "PERSON:cy"]
+    assert sorted(q.trait_range("extraversion", 0.3, 0.7)) == ["PERSON:ana", "PERSON:cy"]
+
+
+def test_indexes_follow_graph_changes(offline_nlp):
+    kg = build(offline_nlp)
+    q = kg.query
+    assert q.find(label="PERSON", related=[("works_at", "ORG:acme")]) != []
+
+    kg.upsert_document("d2", "Bo joined Google.")
+    assert sorted(q.neighbors("ORG:acme", "works_at", direction="in")) == ["PERSON:ana"]
+    assert ("PERSON:bo", "ORG:google") in q.edges("works_at")
+
+    kg.remove_document("d1")
+    assert "PERSON:ana" not in q.nodes("PERSON") and "ORG:acme" not in q.nodes("ORG")
+    assert q.edges("has_skill") == set()
+    # Trait rows of pruned nodes leave the trait index
+    assert q.trait_range("conscientiousness") == ["PERSON:bo"]
+
+    kg.merge_personality(kg.graph, {"PERSON:bo": {"conscientiousness": 0.1}})
+    assert q.top_k("conscientiousness", 5, largest=False) == [("PERSON:bo", np.float32(0.1))]
+
+
+def test_trait_index_matches_brute_force(monkeypatch):
+    monkeypatch.setattr(query_module, "REBUILD_MIN", 20)
+    rng = np.random.default_rng(0)
+    kg = KGBuilder(nlp=object(), trait_attributes=False)
+    ids = [f"PERSON:p{i}" for i in range(200)]
+    kg.graph.add_nodes_from((n, {"label": "PERSON"}) for n in ids)
+    kg.merge_trait_matrix(ids, rng.random((200, 5)))
+    q = kg.query
+
+    def expected(lo, hi):
+        column = kg.traits.read(ids)[:, 0]
+        return sorted(n for n, v in zip(ids, column) if lo <= v <= hi)
+
+    for step in range(40):
+        # Mix of updates below and above the rebuild threshold
+        changed = rng.choice(len(ids), size=int(rng.integers(1, 15)), replace=False)
+        kg.merge_trait_matrix([ids[i] for i in changed], rng.random((len(changed), 5)))
+        if step % 7 == 0:
+            kg.graph.remove_node(ids[step])
+            kg.traits.remove(ids[step])
+            ids.pop(step)
+        lo, hi = sorted(rng.random(2))
+        assert sorted(q.trait_range("openness", lo, hi)) == expected(lo, hi)
+        scores = kg.traits.read(ids)[:, 0]
+        best = [ids[i] for i in np.argsort(-scores, kind="stable")[:5]]
+        assert [n for n, _ in q.top_k("openness", 5)] == best
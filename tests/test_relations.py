@@ -0,0 +1,50 @@
+import pytest
+from src.kg_personality.relations import Mention, RelationEngine, dependency_distance
+
+# "Ana works at Acme. Bo knows Python and Java."
+MENTIONS = [
+    Mention("d_ent_0", "PERSON", 0, 0, 1, (0, 1)),
+    Mention("d_ent_1", "ORG", 0, 3, 4, (3, 2, 1)),
+    Mention("d_ent_2", "PERSON", 1, 5, 6, (5, 6)),
+    Mention("d_ent_3", "SKILL", 1, 7, 8, (7, 6)),
+    Mention("d_ent_4", "SKILL", 1, 9, 10, (9, 7, 6)),
+]
+
+
+def relations(**kwargs):
+    return set(RelationEngine(**kwargs).infer(MENTIONS))
+
+
+def test_document_scope_links_all_pairs():
+    rels = relations(scope="document")
+    assert ("d_ent_0", "d_ent_1", "works_at") in rels
+    assert ("d_ent_0", "d_ent_3", "has_skill") in rels
+    assert ("d_ent_2", "d_ent_1", "works_at") in rels
+    assert len(rels) == 6
+
+
+def test_sentence_scope():
+    assert relations(scope="sentence") == {
+        ("d_ent_0", "d_ent_1", "works_at"),
+        ("d_ent_2", "d_ent_3", "has_skill"),
+        ("d_ent_2", "d_ent_4", "has_skill"),
+    }
+
+
+def test_window_scope():
+    assert relations(scope="window", window=1) == {
+        ("d_ent_2", "d_ent_1", "works_at"),
+        ("d_ent_2", "d_ent_3", "has_skill"),
+    }
+
+
+def test_dependency_scope():
+    assert dependency_distance(MENTIONS[2], MENTIONS[4]) == 3
+    assert relations(scope="dependency", max_hops=2) == {
+        ("d_ent_2", "d_ent_3", "has_skill"),
+    }
+
+
+def test_unknown_scope():
+    with pytest.raises(ValueError):
+        RelationEngine(scope="paragraph")
@@ -0,0 +1,35 @@
+from src.kg_personality.kg_builder import KGBuilder
+from src.kg_personality.resolution import EntityResolver, normalize
+
+
+def test_normalize():
+    assert normalize("  Google's ") == "google"
+    assert normalize("Machine\n  Learning.") == "machine learning"
+
+
+def test_resolver_aliases():
+    resolver = EntityResolver({"Alphabet": "Google"})
+    google, is_new = resolver.resolve("Google", "ORG")
+    assert is_new
+    assert resolver.resolve("GOOGLE", "ORG") == (google, False)
+    assert resolver.resolve("Alphabet", "ORG") == (google, False)
+    assert resolver.resolve("Google", "PERSON")[0] != google
+    assert len(resolver) == 2
+
+
+def test_canonical_nodes_and_counts(offline_nlp):
+    kg = KGBuilder(nlp=offline_nlp, resolver=EntityResolver({"Alphabet": "Google"}))
+    kg.build_from_corpus([
+        ("d1", "Ana knows python and Python."),
+        ("d2", "Ana joined Google after Alphabet hired her."),
+    ])
+    kg.add_relationships()
+    G = kg.graph
+
+    assert G.nodes["SKILL:python"]["count"] == 2
+    assert G.nodes["PERSON:ana"]["count"] == 2
+    assert G.nodes["ORG:google"]["count"] == 2
+    assert G.edges["d1", "SKILL:python"]["count"] == 2
+    assert G.edges["d2", "ORG:google"]["count"] == 2
+    assert G.edges["PERSON:ana", "ORG:google"]["type"] == "works_at"
+    assert len([n for n, d in G.nodes(data=True) if "label" in d]) == 3
@@ -0,0 +1,88 @@
+import io
+import json
+import threading
+import urllib.request
+
+import pytest
+
+from src.kg_personality.service import (NotRunning, Overloaded, WorkerService, make_http_server,
+                                        serve_jsonl)
+
+
+def test_process_reports_entities_relations_and_traits(offline_nlp):
+    service = WorkerService(nlp=offline_nlp)
+    reply, = service.process([("a", "Ana works at Acme. Ana is creative and imaginative.")])
+    assert reply["id"] == "a"
+    assert [(e["text"], e["label"]) for e in reply["entities"]] == [
+        ("Ana", "PERSON"), ("Acme", "ORG"), ("Ana", "PERSON"), ("creative", "TRAIT")]
+    assert {"source": 0, "target": 1, "type": "works_at"} in reply["relations"]
+    assert reply["entities"][2]["traits"]["openness"] > 0.5
+    assert set(reply["traits"]) == set(service.estimator.traits)
+
+
+def test_requests_are_batched_and_answered(offline_nlp):
+    with WorkerService(nlp=offline_nlp, max_batch=8, max_wait_ms=50) as service:
+        futures = [service.submit(f"Bo knows python {i}.", request_id=i) for i in range(20)]
+        replies = [f.result(timeout=10) for f in futures]
+        stats = service.stats()
+    assert [r["id"] for r in replies] == [str(i) for i in range(20)]
+    assert all(r["entities"][0]["text"] == "Bo" for r in replies)
+    assert stats["completed"] == 20 and stats["mean_batch"] > 1
+    assert stats["latency_ms"]["p99"] >= stats["latency_ms"]["p50"] > 0
+
+
+def test_full_queue_applies_backpressure(offline_nlp, monkeypatch):
+    with WorkerService(nlp=offline_nlp, max_batch=1, queue_size=2) as service:
+        entered, release = threading.Event(), threading.Event()
+        process = service.process
+
+        def blocked(docs):
+            entered.set()
+            release.wait(10)
+            return process(docs)
+
+        monkeypatch.setattr(service, "process", blocked)
+        futures = [service.submit("Ana.")]
+        assert entered.wait(10)  # the worker holds the first request
+        futures += [service.submit("Bo."), service.submit("Ana and Bo.")]
+        with pytest.raises(Overloaded):
+            service.submit("Bo and Ana.")
+        assert service.stats()["rejected"] == 1
+        release.set()
+        assert [f.result(timeout=10)["entities"][0]["text"] for f in futures] == ["Ana", "Bo", "Ana"]
+    assert service.stats()["completed"] == 3
+
+
+def test_submit_requires_running_service(offline_nlp):
+    service = WorkerService(nlp=offline_nlp)
+    with pytest.raises(NotRunning):
+        service.submit("Ana.")
+    with service:
+        assert service.submit("Ana.").result(timeout=10)["entities"]
+    with pytest.raises(NotRunning):
+        service.submit("Ana.")
+
+
+def test_jsonl_and_http_front_ends(offline_nlp):
+    with WorkerService(nlp=offline_nlp) as service:
+        out = io.StringIO()
+        serve_jsonl(service, io.StringIO('{"id": "x", "text": "Ana joined Google."}\nnot json\n'), out)
+        replies = {r["id"]: r for r in map(json.loads, out.getvalue().splitlines())}
+        assert replies["x"]["relations"][0]["type"] == "works_at"
+        assert "error" in replies[1]
+
+        server = make_http_server(service, port=0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}"
+            request = urllib.request.Request(f"{url}/analyze", data=json.dumps(
+                [{"id": 1, "text": "Bo is kind."}, {"id": 2, "text": "Ana."}]).encode("utf-8"))
+            with urllib.request.urlopen(request) as response:
+                body = json.load(response)
+            assert [r["id"] for r in body] == ["1", "2"]
+            with urllib.request.urlopen(f"{url}/stats") as response:
+                assert json.load(response)["completed"] >= 3
+        finally:
+            server.shutdown()
+            server.server_close()
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from src.kg_personality import similarity
+from src.kg_personality.kg_builder import KGBuilder
+from src.kg_personality.similarity import SimilarityIndex
+
+
+def people(n, seed=0):
+    kg = KGBuilder(nlp=object(), trait_attributes=False)
+    ids = [f"PERSON:p{i}" for i in range(n)]
+    kg.graph.add_nodes_from((node, {"label": "PERSON"}) for node in ids)
+    kg.graph.add_node("ORG:acme", label="ORG")
+    kg.merge_trait_matrix(ids + ["ORG:acme"], np.random.default_rng(seed).random((n + 1, 5)))
+    return kg, ids
+
+
+def brute(kg, ids, node, k):
+    vectors = kg.traits.read(ids)
+    d = np.sqrt(((vectors - kg.traits.read([node])[0]) ** 2).sum(axis=1))
+    order = [i for i in np.argsort(d, kind="stable") if ids[i] != node]
+    return [ids[i] for i in order[:k]]
+
+
+@pytest.mark.parametrize("backend", ["brute", "kdtree"])
+def test_knn_and_radius_follow_trait_updates(monkeypatch, backend):
+    monkeypatch.setattr(similarity, "REBUILD_MIN", 10)
+    kg, ids = people(300)
+    index = SimilarityIndex(kg, backend=backend)
+    assert len(index) == 300 and (index.tree is not None) == (backend == "kdtree")
+
+    rng = np.random.default_rng(1)
+    for step in range(6):
+        # Small batches stay in the brute-force overlay; later ones trigger rebuilds
+        changed = rng.choice(300, size=4 * step + 1, replace=False)
+        kg.merge_trait_matrix([ids[i] for i in changed], rng.random((len(changed), 5)))
+        queries = [ids[i] for i in rng.choice(300, size=5, replace=False)]
+        results = index.knn(queries, k=7)
+        for query, found in zip(queries, results):
+            assert [n for n, _ in found] == brute(kg, ids, query, 7)
+        within = index.radius(queries[0], 0.3)[0]
+        d = np.sqrt(((kg.traits.read(ids) - kg.traits.read([queries[0]])[0]) ** 2).sum(axis=1))
+        assert sorted(n for n, _ in within) == sorted(
+            ids[i] for i in np.flatnonzero(d <= 0.3) if ids[i] != queries[0])
+    # ORG nodes have scores but are not indexed
+    assert all(n.startswith("PERSON:") for n, _ in index.most_similar(ids[0], k=300))
+
+
+def test_filters_and_vector_queries():
+    kg, ids = people(50)
+    for node in ids[:10]:
+        kg.add_relation(node, "ORG:acme", "works_at")
+    index = SimilarityIndex(kg)
+
+    colleagues = index.most_similar(ids[0], k=20, share="works_at")
+    assert len(colleagues) == 9 and {n for n, _ in colleagues} == set(ids[1:10])
+    assert [n for n, _ in colleagues] == brute(kg, ids[:10], ids[0], 9)
+    assert index.knn(ids[20], k=3, related=[("works_at", "ORG:acme")])[0][0][0] in ids[:10]
+
+    kg.traits.remove(ids[1])
+    assert ids[1] not in {n for n, _ in index.most_similar(ids[0], k=50)}
+    vector = kg.traits.read([ids[2]])
+    assert index.knn(vector, k=1)[0][0] == (ids[2], 0.0)
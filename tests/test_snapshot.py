@@ -0,0 +1,100 @@
+import pytest
+from src.kg_personality.kg_builder import KGBuilder
+from src.kg_personality.resolution import EntityResolver
+from src.kg_personality.snapshot import GraphSnapshot
+
+
+@pytest.fixture
+def kg():
+    kg = KGBuilder(nlp=object())
+    kg.add_entity("PERSON:ana", "PERSON", {"text": "Ana", "count": 3})
+    kg.add_entity("ORG:acme", "ORG", {"text": "Acme"})
+    kg.add_entity("SKILL:c++", "SKILL", {"text": "C++ ✓"})
+    kg.add_relation("doc1", "PERSON:ana", "mentions", {"count": 2})
+    kg.add_relation("PERSON:ana", "ORG:acme", "works_at")
+    kg.add_relation("PERSON:ana", "SKILL:c++", "has_skill")
+    kg.merge_personality(kg.graph, {"PERSON:ana": {"openness": 0.75, "neuroticism": 0.25}})
+    return kg
+
+
+def test_round_trip(kg, tmp_path):
+    path = tmp_path / "graph.kgs"
+    kg.save(path)
+    loaded = KGBuilder.load(path, nlp=object())
+
+    assert dict(loaded.graph.nodes(data=True)) == dict(kg.graph.nodes(data=True))
+    assert sorted(loaded.graph.edges(data=True)) == sorted(kg.graph.edges(data=True))
+    assert loaded.node_traits("PERSON:ana") == {"openness": 0.75, "neuroticism": 0.25}
+    assert loaded.node_traits("ORG:acme") == {}
+
+
+def test_mmap_access_without_materializing(kg, tmp_path):
+    path = tmp_path / "graph.kgs"
+    kg.save(path)
+    snap = GraphSnapshot.open(path)
+
+    assert (snap.n_nodes, snap.n_edges) == (4, 3)
+    assert not snap.arrays["indptr"].flags.writeable
+    ana = snap.node_index("PERSON:ana")
+    assert snap.label(ana) == "PERSON" and snap.text(ana) == "Ana"
+    assert snap.text(snap.node_index("SKILL:c++")) == "C++ ✓"
+    assert {(snap.node_id(t), rel) for t, rel in snap.neighbors(ana)} == {
+        ("ORG:acme", "works_at"), ("SKILL:c++", "has_skill")}
+    assert snap.label(snap.node_index("doc1")) is None
+    assert snap.node_traits(ana)["openness"] == 0.75
+    with pytest.raises(KeyError):
+        snap.node_index("PERSON:bo")
+
+
+def test_empty_graph_and_bad_file(tmp_path):
+    path = tmp_path / "empty.kgs"
+    KGBuilder(nlp=object()).save(path)
+    snap = GraphSnapshot.open(path)
+    assert snap.n_nodes == 0 and snap.trait_rows()[0] == []
+
+    bad = tmp_path / "bad.kgs"
+    bad.write_bytes(b"not a snapshot")
+    with pytest.raises(ValueError):
+        GraphSnapshot.open(bad)
+
+    future = tmp_path / "future.kgs"
+    future.write_bytes(path.read_bytes().replace(b'"version": 1', b'"version": 9', 1))
+    with pytest.raises(ValueError, match="version"):
+        GraphSnapshot.open(future)
+
+
+def test_loaded_canonical_nodes_are_resolved(offline_nlp, tmp_path):
+    kg = KGBuilder(nlp=offline_nlp, resolver=EntityResolver())
+    kg.build_from_corpus([("d1", "Ana met Ana."), ("d2", "Ana works at Acme.")])
+    path = tmp_path / "graph.kgs"
+    kg.save(path)
+
+    loaded = KGBuilder.load(path, nlp=offline_nlp, resolver=EntityResolver())
+    loaded.upsert_document("d3", "Ana met Bo.")
+    assert loaded.graph.nodes["PERSON:ana"]["count"] == 4
+    assert loaded.graph.nodes["PERSON:bo"]["count"] == 1
+    assert loaded.graph.nodes["ORG:acme"]["text"] == "Acme"
+
+
+@pytest.mark.parametrize("canonical", [False, True])
+def test_loaded_graph_supports_upsert_and_remove(offline_nlp, tmp_path, canonical):
+    def builder(**kwargs):
+        return KGBuilder(nlp=offline_nlp, resolver=EntityResolver() if canonical else None, **kwargs)
+
+    kg = builder()
+    kg.build_from_corpus([("d1", "Ana works at Acme."), ("d2", "Ana joined Acme and knows python.")])
+    kg.add_relationships()
+    path = tmp_path / "graph.kgs"
+    kg.save(path)
+
+    loaded = KGBuilder.load(path, nlp=offline_nlp, resolver=EntityResolver() if canonical else None)
+    loaded.upsert_document("d1", "Bo knows java.")
+    loaded.remove_document("d2")
+    with pytest.raises(KeyError):
+        loaded.remove_document("d2")
+
+    fresh = builder()
+    fresh.build_from_corpus([("d1", "Bo knows java.")])
+    fresh.add_relationships()
+    assert sorted(loaded.graph.nodes(data=True)) == sorted(fresh.graph.nodes(data=True))
+    assert sorted(loaded.graph.edges(data=True)) == sorted(fresh.graph.edges(data=True))
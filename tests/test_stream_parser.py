@@ -0,0 +1,70 @@
+from types import SimpleNamespace
+
+import pytest
+from src.kg_personality import api_integration
+from src.kg_personality.api_integration import GroqAPIIntegrator, config, parse_scores
+from src.kg_personality.stream_parser import TraitStreamParser
+
+REPLY = ('Here are the scores:\n{"Openness": 0.85, "CONSCIENTIOUSNESS": "0.7", '
+         '"notes": {"why": "a \\"quoted\\" }"}, "extraversion_score": 1.4, '
+         '"Agreeableness": -0.2, "Neuroticism": 0.35}\nThese reflect...')
+
+EXPECTED = {"openness": 0.85, "conscientiousness": 0.7, "extraversion": 1.0,
+            "agreeableness": 0.0, "neuroticism": 0.35}
+
+
+def test_char_by_char_matches_whole_reply():
+    parser = TraitStreamParser()
+    done_at = None
+    for i, ch in enumerate(REPLY):
+        if parser.feed(ch):
+            done_at = i
+            break
+    assert parser.result() == EXPECTED
+    # Stops right after the last number is delimited, before the trailing prose
+    assert REPLY[done_at] == "}"
+    assert parse_scores(REPLY) == EXPECTED
+
+
+def test_missing_traits_default_and_errors():
+    assert parse_scores('{"openness": 0.2}')["neuroticism"] == 0.5
+    with pytest.raises(ValueError):
+        parse_scores("I cannot rate this text.")
+    with pytest.raises(ValueError):
+        parse_scores('{"openness": null, "mood": 0.4}')
+
+
+class FakeStream:
+    def __init__(self, pieces):
+        self.pieces = pieces
+        self.consumed = 0
+        self.closed = False
+
+    def __iter__(self):
+        for piece in self.pieces:
+            self.consumed += 1
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))])
+
+    def close(self):
+        self.closed = True
+
+
+def test_integrator_stops_stream_early(monkeypatch):
+    monkeypatch.setattr(config, "STREAM", True, raising=False)
+    stream = FakeStream([REPLY[:40], REPLY[40:150], REPLY[150:], " more", " tokens"])
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(
+        create=lambda **kwargs: stream)))
+    api = GroqAPIIntegrator(client=client, personality_estimator=object())
+    assert api.analyze_text_with_llm("text") == EXPECTED
+    assert stream.closed and stream.consumed == 3
+    assert api.stream_stats["early_stops"] == 1
+
+
+def test_template_placeholder_key_is_not_a_key(monkeypatch):
+    monkeypatch.delenv("GROQ_API_KEY", raising=False)
+    monkeypatch.setattr(config, "GROQ_API_KEY", api_integration.PLACEHOLDER_API_KEY)
+    assert api_integration.configured_api_key() is None
+    with pytest.raises(ValueError, match="API key not found"):
+        GroqAPIIntegrator()
+    monkeypatch.setattr(config, "GROQ_API_KEY", "gsk-local")
+    assert api_integration.configured_api_key() == "gsk-local"
@@ -0,0 +1,45 @@
+import networkx as nx
+import numpy as np
+from src.kg_personality.kg_builder import KGBuilder
+from src.kg_personality.trait_store import TraitStore
+
+
+def test_bulk_assign_read_and_partial_update():
+    store = TraitStore(capacity=2)
+    store.assign(["a", "b", "c"], np.array([[0.1] * 5, [0.2] * 5, [0.3] * 5]))
+    assert store.matrix.dtype == np.float32
+    assert len(store) == 3
+
+    store.update({"b": {"openness": 0.9}})
+    assert store.get("b")["openness"] == np.float32(0.9)
+    assert store.get("b")["neuroticism"] == np.float32(0.2)
+    np.testing.assert_allclose(store.read(["c", "missing"])[0], [0.3] * 5, rtol=1e-6)
+    assert np.isnan(store.read(["missing"])).all()
+    assert store.column("openness").shape == (3,)
+
+
+def test_remove_reuses_rows_and_attribute_view():
+    store = TraitStore()
+    store.update({"a": {"openness": 0.5}, "b": {"openness": 0.25}})
+    store.remove("a")
+    assert "a" not in store and store.get("a") is None
+    store.update({"c": {"openness": 0.75}})
+    assert store.index["c"] == 0
+    assert store.attributes("c") == {"trait_openness": 0.75}
+
+
+def test_merge_personality_fills_store_without_attributes():
+    kg = KGBuilder(nlp=object(), trait_attributes=False)
+    kg.add_entity("p", "PERSON")
+    kg.merge_personality(kg.graph, {"p": {"openness": 0.5}, "ghost": {"openness": 1.0}})
+    assert kg.node_traits("p") == {"openness": 0.5}
+    assert "trait_openness" not in kg.graph.nodes["p"]
+    assert "ghost" not in kg.traits
+
+    kg.merge_trait_matrix(["p"], np.array([[0.25] * 5]))
+    assert kg.node_traits("p")["neuroticism"] == 0.25
+
+    other = nx.DiGraph([("x", "y")])
+    kg.merge_personality(other, {"x": {"openness": 0.5}})
+    assert other.nodes["x"]["trait_openness"] == 0.5
+    assert "x" not in kg.traits